@@ -26,28 +26,105 @@ except ImportError:
     from context import epcis_event_hash_generator  # noqa: F401
 
 import argparse
+import contextlib
+import cProfile
 import logging
 import os
 import sys
 
-from epcis_event_hash_generator import hash_generator, events_from_file_reader
+from epcis_event_hash_generator import hash_generator, events_from_file_reader, interning, metrics
+from epcis_event_hash_generator.event_filter import EventFilter
 
 
-def epcis_hash_from_file(path, hashalg="sha256", enforce="", join_by=""):
+def epcis_hash_from_file(path, hashalg="sha256", enforce="", join_by="", memory_report=False, workers=1,
+                         chunk_size=hash_generator.PARALLEL_CHUNK_SIZE, columnar=False, event_filter=None):
     """
     This method exemplifies how to read all EPCIS Events from the EPCIS document in the file at path.
     The file is parsed extracting the events data. The pre hash string is computed for each event.
     Those pre hash strings are then hashed and both, the pre hashes and hashes, are returned.
+    If memory_report is set, the memory held by the parsed events is logged (level INFO).
+    With workers > 1, large documents are processed in chunks of chunk_size events by that many processes.
+    If columnar is set, all values of the document are canonized column by column up front.
+    If an event_filter is given (e.g. an event_filter.EventFilter), only the events it selects are hashed.
     """
 
     events = events_from_file_reader.event_list_from_file(path, enforce)
+    if memory_report:
+        logging.info("Memory held by the events of '%s': %s", path, interning.memory_report(events))
 
-    prehashes = hash_generator.derive_prehashes_from_events(events, join_by)
-    hashes = hash_generator.calculate_hashes_from_pre_hashes(prehashes, hashalg)
+    prehashes = hash_generator.derive_prehashes_from_events(events, join_by, workers, chunk_size, columnar,
+                                                            event_filter)
+    with metrics.stage("hashing", len(prehashes)):
+        hashes = hash_generator.calculate_hashes_from_pre_hashes(prehashes, hashalg)
 
     return hashes, prehashes
 
 
+def iter_epcis_hashes_from_file(path, hashalg="sha256", enforce="", join_by="", memory_report=False, workers=1,
+                                chunk_size=hash_generator.PARALLEL_CHUNK_SIZE, keep_prehashes=False, columnar=False,
+                                event_filter=None):
+    """
+    Like epcis_hash_from_file, but returns an iterator yielding (index, pre hash string, hash) per event
+    as soon as it is computed, see hash_generator.iter_hashes. The file is parsed right away.
+    Unless keep_prehashes is set, the pre hash strings are never built and None is yielded instead.
+    The index is the position of the event in the document, also if an event_filter leaves out events.
+    """
+    events = events_from_file_reader.event_list_from_file(path, enforce)
+    if memory_report:
+        logging.info("Memory held by the events of '%s': %s", path, interning.memory_report(events))
+
+    return hash_generator.iter_hashes(events, hashalg, join_by, keep_prehashes, workers, chunk_size, columnar,
+                                      event_filter)
+
+
+def _results_from_file(filename, args):
+    """Return an iterator of the (pre hash string, hash) of each event in the file.
+    The pre hash strings are only built if requested. The hashes of several algorithms are joined by a space.
+    If events are filtered, the hashes are preceded by the index of the event in the file and a space.
+    """
+    results = iter_epcis_hashes_from_file(path=filename, hashalg=args.algorithm, join_by=args.join,
+                                          enforce=args.enforce_format, memory_report=args.memory_report,
+                                          workers=args.workers, chunk_size=args.chunk_size,
+                                          keep_prehashes=args.prehash, columnar=args.columnar,
+                                          event_filter=args.event_filter)
+    if args.event_filter is not None:
+        return ((prehash, "{} {}".format(index, " ".join(hash_strings))) for (index, prehash, hash_strings) in results)
+    return ((prehash, " ".join(hash_strings)) for (_, prehash, hash_strings) in results)
+
+
+def _write_batch(filename, results, with_prehashes):
+    """Write the new line separated hashes (and pre hashes) into the sibling .hashes (and .prehashes) file."""
+    base = os.path.splitext(filename)[0]
+    with open(base + '.hashes', 'w') as hash_file, \
+            (open(base + '.prehashes', 'w') if with_prehashes else contextlib.nullcontext()) as prehash_file:
+        separator = ""
+        for (prehash, hash_string) in results:
+            hash_file.write(separator + hash_string)
+            if with_prehashes:
+                prehash_file.write(separator + prehash)
+            separator = "\n"
+
+        hash_file.write("\n")
+        if with_prehashes:
+            prehash_file.write("\n")
+
+
+def _print_results(filename, results, with_prehashes):
+    """Print each hash as soon as it is available, followed by the pre hashes if requested."""
+    sys.stdout.write("\n\nHashes of the events contained in '{}':\n".format(filename))
+    prehashes = []
+    separator = ""
+    for (prehash, hash_string) in results:
+        sys.stdout.write(separator + hash_string)
+        separator = "\n"
+        if with_prehashes:
+            prehashes.append(prehash)
+    sys.stdout.write("\n")
+
+    if with_prehashes:
+        print("\nPre-hash strings:\n" + "\n---\n".join(prehashes))
+
+
 def command_line_parsing():
     logger_cfg = {
         "format":
@@ -60,9 +137,10 @@ def command_line_parsing():
     parser.add_argument(
         "-a",
         "--algorithm",
-        help="Hashing algorithm to use.",
-        choices=["sha256", "sha3-256", "sha384", "sha512"],
-        default="sha256")
+        help="Hashing algorithm to use. Repeat to output the hashes of several algorithms per event,"
+        + " separated by a space. Default: sha256.",
+        choices=list(hash_generator.HASH_ALGORITHMS),
+        action="append")
     parser.add_argument(
         "-l",
         "--log",
@@ -86,6 +164,76 @@ def command_line_parsing():
         help="String used to join the pre hash string." +
         " Defaults to empty string as specified. Values like '\\n' might be useful for debugging.",
         default="")
+    parser.add_argument(
+        "-c",
+        "--cache-size",
+        help="If given, memoize up to this many canonical values in an LRU cache."
+        + " Speeds up documents repeating the same locations, EPC classes, business steps, etc.",
+        type=int,
+        default=0)
+    parser.add_argument(
+        "-d",
+        "--duplicate-cache-size",
+        help="If given, reuse the hashes of events repeated within a document (e.g. retransmitted capture batches),"
+        + " keeping those of up to this many distinct events. Suggested: {}.".format(
+            hash_generator.DUPLICATE_CACHE_SIZE),
+        type=int,
+        default=0)
+    parser.add_argument(
+        "-i",
+        "--intern",
+        help="If given, share a single instance of equal names and values among all parsed events."
+        + " Reduces the memory needed for large documents.",
+        action="store_true")
+    parser.add_argument(
+        "-m",
+        "--memory-report",
+        help="If given, log the memory held by the parsed events and the interning stats of each file (level INFO).",
+        action="store_true")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="Number of processes computing the pre hash strings of large documents. Default: 1, i.e. serially.",
+        type=int,
+        default=1)
+    parser.add_argument(
+        "--chunk-size",
+        help="Number of events per chunk processed by a worker process. Documents with at most this many events"
+        + " are always processed serially. Default: {}.".format(hash_generator.PARALLEL_CHUNK_SIZE),
+        type=int,
+        default=hash_generator.PARALLEL_CHUNK_SIZE)
+    parser.add_argument(
+        "--columnar",
+        help="If given, canonize all values of a document column by column, each distinct value once, before"
+        + " computing the pre hash strings. Speeds up large documents repeating the same values.",
+        action="store_true")
+    parser.add_argument(
+        "--event-type",
+        help="Only hash events of this type, e.g. ObjectEvent. Repeat to hash events of several types."
+        + " If any filter is given, each hash is preceded by the index of the event in the file (from 0).",
+        action="append",
+        default=[])
+    parser.add_argument(
+        "--biz-step",
+        help="Only hash events with this business step, e.g. shipping (CBV business steps also as URN or URI)."
+        + " Repeat to hash events with any of several business steps.",
+        action="append",
+        default=[])
+    parser.add_argument(
+        "--since",
+        help="Only hash events whose event time is at or after this ISO 8601 dateTime.")
+    parser.add_argument(
+        "--until",
+        help="Only hash events whose event time is before this ISO 8601 dateTime.")
+    parser.add_argument(
+        "--profile",
+        help="If given, print the time spent in each stage (reading, parsing, canonicalisation, hashing, ...)"
+        + " per file and in total to stderr.",
+        action="store_true")
+    parser.add_argument(
+        "--profile-dump",
+        help="If given, run under cProfile and dump the profile into this file, e.g. to be read by pstats.",
+        default="")
     parser.add_argument(
         "-e",
         "--enforce_format",
@@ -95,10 +243,19 @@ def command_line_parsing():
         default="")
 
     args = parser.parse_args()
+    if not args.algorithm:
+        args.algorithm = ["sha256"]
 
     logger_cfg["level"] = getattr(logging, args.log)
     logging.basicConfig(**logger_cfg)
 
+    args.event_filter = None
+    if args.event_type or args.biz_step or args.since or args.until:
+        try:
+            args.event_filter = EventFilter(args.event_type, args.biz_step, args.since, args.until)
+        except ValueError as ex:
+            parser.error(str(ex))
+
     # print("Log messages above level: {}".format(logger_cfg["level"]))
 
     if not args.file:
@@ -111,6 +268,27 @@ def command_line_parsing():
     return args
 
 
+def _process_files(args):
+    """Hash the events of each file and output the results.
+    If interning is enabled, the pool is emptied after each file, holding the strings of one document at most.
+    """
+    for filename in args.file:
+        with metrics.document(filename):
+            # ACTUAL ALGORITHM CALL:
+            results = _results_from_file(filename, args)
+
+            # Output, written while the events are processed:
+            if args.batch:
+                _write_batch(filename, results, args.prehash)
+            else:
+                _print_results(filename, results, args.prehash)
+
+        if args.intern:
+            if args.memory_report:
+                logging.info("Interning of '%s': %s", filename, interning.interning_stats())
+            interning.clear_interning()
+
+
 def main():
     """The main function reads the path to the xml file
     and optionally the hash algorithm from the command
@@ -121,22 +299,27 @@ def main():
 
     logging.debug("Running cli tool with arguments %s", args)
 
-    for filename in args.file:
-        # ACTUAL ALGORITHM CALL:
-        (hashes, prehashes) = epcis_hash_from_file(
-            path=filename, hashalg=args.algorithm, join_by=args.join, enforce=args.enforce_format)
-
-        # Output:
-        if args.batch:
-            with open(os.path.splitext(filename)[0] + '.hashes', 'w') as outfile:
-                outfile.write("\n".join(hashes) + "\n")
-            if args.prehash:
-                with open(os.path.splitext(filename)[0] + '.prehashes', 'w') as outfile:
-                    outfile.write("\n".join(prehashes) + "\n")
-        else:
-            print("\n\nHashes of the events contained in '{}':\n".format(filename) + "\n".join(hashes))
-            if args.prehash:
-                print("\nPre-hash strings:\n" + "\n---\n".join(prehashes))
+    if args.cache_size > 0:
+        hash_generator.enable_value_cache(args.cache_size)
+    if args.duplicate_cache_size > 0:
+        hash_generator.enable_duplicate_reuse(args.duplicate_cache_size)
+    if args.intern:
+        interning.enable_interning()
+    if args.profile:
+        timer = metrics.install_hook()
+
+    if args.profile_dump:
+        profiler = cProfile.Profile()
+        profiler.runcall(_process_files, args)
+        profiler.dump_stats(args.profile_dump)
+    else:
+        _process_files(args)
+
+    if args.profile:
+        metrics.remove_hook()
+        sys.stderr.write(timer.format_report() + "\n")
+    if args.cache_size > 0:
+        logging.info("Value cache: %s", hash_generator.value_cache_stats())
 
 
 # goto main if script is run as entrypoint
@@ -8,6 +8,11 @@ It converts all of them into one normalised form, meaning that it
 (b) ensures that it only contains the most fine-granular ID level,
 (c) strips off any further attributes.
 
+EPC URIs are dispatched on their scheme prefix (e.g. 'urn:epc:id:sgtin:'),
+so that only the one precompiled pattern of that scheme is evaluated.
+Values which neither start with 'urn:epc:' nor with 'http' are rejected
+without running any regular expression.
+
 .. module:: dl_normaliser
    :synopsis: Normalises the gs1 id formats to digital link for https://github.com/RalphTro/epcis-event-hash-generator/
 
@@ -25,9 +30,18 @@ file for details.
 
 """
 
-from re import match
+import re
 import logging
-import math
+from collections import namedtuple
+from functools import partial
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional, see check_digits
+    numpy = None
+
+
+_PERCENT_ENCODING = str.maketrans({'!': '%21', '(': '%28', ')': '%29', '*': '%2A', '+': '%2B', ',': '%2C', ':': '%3A'})
 
 
 def __web_uri_percent_encoder(input):
@@ -51,13 +65,14 @@ def __web_uri_percent_encoder(input):
         Percent-encoded equivalent of character.
     """
 
-    return (input.replace('!', '%21')
-            .replace('(', '%28')
-            .replace(')', '%29')
-            .replace('*', '%2A')
-            .replace('+', '%2B')
-            .replace(',', '%2C')
-            .replace(':', '%3A'))
+    return input.translate(_PERCENT_ENCODING)
+
+
+_TRIPLED_DIGITS = {str(digit): 3 * digit for digit in range(10)}
+_DIGITS = {str(digit): digit for digit in range(10)}
+
+_NUMPY_MIN_KEYS = 64
+"""Minimal number of keys for which check_digits uses NumPy. Below, the overhead of building arrays dominates."""
 
 
 def check_digit(key_wo_checkdigit):
@@ -71,270 +86,591 @@ def check_digit(key_wo_checkdigit):
 
     Returns
     -------
-        str: Check digit for GS1 key.
+        int: Check digit for GS1 key.
     """
 
-    # Reverse string
-    key_wo_checkdigit = key_wo_checkdigit[::-1]
-    # Alternatively fetch digits, multiply them by 3 or 1, and sum them up
-    summation = 0
-    for i in range(len(key_wo_checkdigit) - 1, -1, -1):
-        if int(key_wo_checkdigit[i]) == 0:
-            continue
-        elif i % 2 != 0:
-            summation += int(key_wo_checkdigit[i]) * 1
-        else:
-            summation += int(key_wo_checkdigit[i]) * 3
+    # Starting with the rightmost digit, alternatively multiply the digits by 3 and 1 and sum them up
+    try:
+        summation = (sum(map(_TRIPLED_DIGITS.__getitem__, key_wo_checkdigit[::-2]))
+                     + sum(map(_DIGITS.__getitem__, key_wo_checkdigit[-2::-2])))
+    except KeyError:
+        # not an ASCII digit: let int() accept other decimal digits or raise the ValueError
+        summation = 3 * sum(map(int, key_wo_checkdigit[::-2])) + sum(map(int, key_wo_checkdigit[-2::-2]))
     # Subtract sum from nearest equal or higher multiple of ten
-    checkdigit = math.ceil(summation / 10) * 10 - summation
-    return checkdigit
+    return -summation % 10
 
 
-def normaliser(uri):
-    """Function converts any standard URI conveying a GS1 Key in Canonical GS1 DL URI.
+def check_digits(keys):
+    """Returns the check digits for a whole column of GS1 keys, see check_digit.
 
-    Function 'normaliser' expects any URI to be used in EPCIS events
-    that convey a GS1 key, i.e. EPC URIs, EPC Class URIs,
-    EPC ID Pattern URIs, or GS1 Digital Link URIs.
-    It returns a corresponding, constrained version of a
-    canonical GS1 Digital Link URI, i.e. with
-    the lowest level of identification and without CPV/query string.
+    Uses NumPy arithmetic on all keys of the same length at once if NumPy is installed,
+    otherwise falls back to check_digit for each key.
+
+    Parameters
+    ----------
+    keys : iterable of str
+        GS1 keys without check digit.
+
+    Returns
+    -------
+        list of int: Check digit for each of the keys, in input order.
+    """
+
+    keys = list(keys)
+    if numpy is None or len(keys) < _NUMPY_MIN_KEYS:
+        return [check_digit(key) for key in keys]
+
+    indices_by_length = {}
+    for index, key in enumerate(keys):
+        indices_by_length.setdefault(len(key), []).append(index)
+
+    result = [None] * len(keys)
+    for length, indices in indices_by_length.items():
+        column = "".join([keys[index] for index in indices])
+        digits = None
+        if column.isascii():
+            digits = numpy.frombuffer(column.encode("ascii"), dtype=numpy.uint8).reshape(len(indices), length) - 48
+        if digits is None or (digits > 9).any():
+            # not only ASCII digits (bytes below '0' wrap around): check_digit deals with it
+            for index in indices:
+                result[index] = check_digit(keys[index])
+            continue
+
+        weights = numpy.where(numpy.arange(length)[::-1] % 2 == 0, 3, 1)
+        for index, digit in zip(indices, ((-(digits @ weights)) % 10).tolist()):
+            result[index] = digit
+    return result
+
+
+# EPC URIs
+
+EPCKey = namedtuple("EPCKey", ["scheme", "company_prefix", "reference", "serial", "extension"])
+"""GS1 key conveyed in an EPC URI, EPC Class URI or EPC ID Pattern URI, as returned by parse_epc_uri.
+
+`scheme`            EPC scheme, e.g. 'sgtin', 'sscc' or 'lgtin'.
+`company_prefix`    GS1 Company Prefix.
+`reference`         Item/location/asset/... reference, including the indicator/extension digit if any.
+`serial`            Serial component (the lot for lgtin), None for EPC ID Pattern URIs and schemes without serial.
+`extension`         GLN extension (sgln) or piece and total (itip), None for other schemes.
+"""
+
+_AI82_LITERALS = str.maketrans('', '', "!')(*+,.0123456789:;=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_-")
+_AI82_ESCAPED = re.compile(
+    r'(?:\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-])*')
+_CPI_LITERALS = str.maketrans('', '', "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-")
+_CPI_ESCAPED = re.compile(r'(?:\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-])*')
+
+
+def _units(component, literals, escaped):
+    """Number of characters in component, counting an escape sequence like '%2F' as one character.
+    Returns -1 if component contains characters which are not permitted.
+    """
+    if not component.translate(literals):
+        return len(component)
+    if '%' in component and escaped.fullmatch(component):
+        return len(component) - 2 * component.count('%')
+    return -1
+
+
+def _ai82_length_ok(component, max_units):
+    return 1 <= _units(component, _AI82_LITERALS, _AI82_ESCAPED) <= max_units
+
+
+def _cpi_length_ok(component, max_units):
+    return 1 <= _units(component, _CPI_LITERALS, _CPI_ESCAPED) <= max_units
+
+
+def _is_digits(component, length):
+    return len(component) == length and (length == 0 or component.isdecimal())
+
+
+def _serial_number_ok(component):
+    return 1 <= len(component) <= 12 and component.isdecimal()
+
+
+def _split_company_prefix(body):
+    """Split '<company prefix>.<rest>' into its parts. Returns (None, None) unless the prefix has 6 to 12 digits."""
+    dot = body.find('.')
+    if 6 <= dot <= 12 and body[:dot].isdecimal():
+        return body[:dot], body[(dot + 1):]
+    return None, None
+
+
+def _parse_gtin_based(scheme, max_serial_units, body):
+    """sgtin, upui, lgtin: <company prefix>.<indicator digit and item reference>.<serial>"""
+    company_prefix, rest = _split_company_prefix(body)
+    if company_prefix is None:
+        return None
+    length = 13 - len(company_prefix)
+    reference = rest[:length]
+    serial = rest[(length + 1):]
+    if rest[length:(length + 1)] != '.' or not _is_digits(reference, length) or not _ai82_length_ok(
+            serial, max_serial_units):
+        return None
+    return EPCKey(scheme, company_prefix, reference, serial, None)
+
+
+def _parse_gtin_based_pattern(scheme, body):
+    """idpat sgtin, upui: <company prefix>.<indicator digit and item reference>.*"""
+    company_prefix, rest = _split_company_prefix(body)
+    if company_prefix is None:
+        return None
+    length = 13 - len(company_prefix)
+    reference = rest[:length]
+    if rest[length:] != '.*' or not _is_digits(reference, length):
+        return None
+    return EPCKey(scheme, company_prefix, reference, None, None)
+
+
+def _parse_itip(is_pattern, body):
+    """itip: <company prefix>.<indicator digit and item reference>.<piece>.<total>.<serial> or .* for the pattern"""
+    company_prefix, rest = _split_company_prefix(body)
+    if company_prefix is None:
+        return None
+    length = 13 - len(company_prefix)
+    reference = rest[:length]
+    piece = rest[(length + 1):(length + 3)]
+    total = rest[(length + 4):(length + 6)]
+    if not (_is_digits(reference, length) and rest[length:(length + 1)] == '.' and _is_digits(piece, 2)
+            and rest[(length + 3):(length + 4)] == '.' and _is_digits(total, 2)):
+        return None
+    if is_pattern:
+        if rest[(length + 6):] != '.*':
+            return None
+        return EPCKey('itip', company_prefix, reference, None, piece + total)
+    serial = rest[(length + 7):]
+    if rest[(length + 6):(length + 7)] != '.' or not _ai82_length_ok(serial, 20):
+        return None
+    return EPCKey('itip', company_prefix, reference, serial, piece + total)
+
+
+def _parse_numeric(scheme, key_length, body):
+    """sscc, gsrn, gsrnp, gsin, pgln: <company prefix>.<reference>, with key_length digits in total"""
+    company_prefix, rest = _split_company_prefix(body)
+    if company_prefix is None or not _is_digits(rest, key_length - len(company_prefix)):
+        return None
+    return EPCKey(scheme, company_prefix, rest, None, None)
+
+
+def _parse_gln_based(scheme, body):
+    """sgln: <company prefix>.<location reference>.<extension>, sgcn: <company prefix>.<coupon reference>.<serial>"""
+    company_prefix, rest = _split_company_prefix(body)
+    if company_prefix is None:
+        return None
+    length = 12 - len(company_prefix)
+    reference = rest[:length]
+    component = rest[(length + 1):]
+    if rest[length:(length + 1)] != '.' or not _is_digits(reference, length):
+        return None
+    if scheme == 'sgln':
+        if not _ai82_length_ok(component, 20):
+            return None
+        return EPCKey(scheme, company_prefix, reference, None, component)
+    if not _serial_number_ok(component):
+        return None
+    return EPCKey(scheme, company_prefix, reference, component, None)
+
+
+def _parse_grai(body):
+    """grai: <company prefix>.<asset type>.<serial>
+    A 12 digit company prefix is followed by an additional '.', which then becomes part of the serial.
+    """
+    company_prefix, rest = _split_company_prefix(body)
+    if company_prefix is None:
+        return None
+    length = 12 - len(company_prefix)
+    reference = rest[:length]
+    if len(company_prefix) == 12:
+        serial = rest[1:]
+        if rest[:2] != '..' or not _ai82_length_ok(rest[2:], 16):
+            return None
+    else:
+        serial = rest[(length + 1):]
+        if rest[length:(length + 1)] != '.' or not _is_digits(reference, length) or not _ai82_length_ok(serial, 16):
+            return None
+    return EPCKey('grai', company_prefix, reference, serial, None)
+
+
+def _parse_gdti(body):
+    """gdti: <company prefix>.<document type>.<serial>
+    Unless the company prefix has 12 digits, the character following the document type is dropped from the serial.
+    """
+    company_prefix, rest = _split_company_prefix(body)
+    if company_prefix is None:
+        return None
+    length = 12 - len(company_prefix)
+    reference = rest[:length]
+    if len(company_prefix) == 12:
+        serial = rest[1:]
+        if rest[:1] != '.' or not _ai82_length_ok(serial, 20):
+            return None
+    else:
+        serial = rest[(length + 1):]
+        if not _is_digits(reference, length) or not _ai82_length_ok(rest[length:], 20):
+            return None
+    return EPCKey('gdti', company_prefix, reference, serial, None)
+
+
+def _parse_reference_pattern(scheme, body):
+    """idpat grai, gdti, sgcn: <company prefix>.<reference>.* with an additional '.' after a 12 digit company prefix"""
+    company_prefix, rest = _split_company_prefix(body)
+    if company_prefix is None:
+        return None
+    length = 12 - len(company_prefix)
+    reference = rest[:length]
+    if len(company_prefix) == 12:
+        if rest != '..*':
+            return None
+    elif rest[length:] != '.*' or not _is_digits(reference, length):
+        return None
+    return EPCKey(scheme, company_prefix, reference, None, None)
+
+
+def _parse_alphanumeric(scheme, body):
+    """giai, ginc: <company prefix>.<reference> with up to 30 characters in total"""
+    company_prefix, rest = _split_company_prefix(body)
+    if company_prefix is None or not _ai82_length_ok(rest, 30 - len(company_prefix)):
+        return None
+    return EPCKey(scheme, company_prefix, rest, None, None)
+
+
+def _parse_cpi(is_pattern, body):
+    """cpi: <company prefix>.<component/part reference>.<serial> or .* for the pattern"""
+    company_prefix, rest = _split_company_prefix(body)
+    if company_prefix is None:
+        return None
+    separator = rest.find('.')
+    reference = rest[:separator]
+    serial = rest[(separator + 1):]
+    if separator < 0 or not _cpi_length_ok(reference, 30 - len(company_prefix)):
+        return None
+    if is_pattern:
+        if serial != '*':
+            return None
+        serial = None
+    elif not _serial_number_ok(serial):
+        return None
+    return EPCKey('cpi', company_prefix, reference, serial, None)
+
+
+EPC_SCHEMES = {
+    'urn:epc:id:sgtin:': partial(_parse_gtin_based, 'sgtin', 20),
+    'urn:epc:id:sscc:': partial(_parse_numeric, 'sscc', 17),
+    'urn:epc:id:sgln:': partial(_parse_gln_based, 'sgln'),
+    'urn:epc:id:grai:': _parse_grai,
+    'urn:epc:id:giai:': partial(_parse_alphanumeric, 'giai'),
+    'urn:epc:id:gsrn:': partial(_parse_numeric, 'gsrn', 17),
+    'urn:epc:id:gsrnp:': partial(_parse_numeric, 'gsrnp', 17),
+    'urn:epc:id:gdti:': _parse_gdti,
+    'urn:epc:id:cpi:': partial(_parse_cpi, False),
+    'urn:epc:id:sgcn:': partial(_parse_gln_based, 'sgcn'),
+    'urn:epc:id:ginc:': partial(_parse_alphanumeric, 'ginc'),
+    'urn:epc:id:gsin:': partial(_parse_numeric, 'gsin', 16),
+    'urn:epc:id:itip:': partial(_parse_itip, False),
+    'urn:epc:id:upui:': partial(_parse_gtin_based, 'upui', 28),
+    'urn:epc:id:pgln:': partial(_parse_numeric, 'pgln', 12),
+    'urn:epc:class:lgtin:': partial(_parse_gtin_based, 'lgtin', 20),
+    'urn:epc:idpat:sgtin:': partial(_parse_gtin_based_pattern, 'sgtin'),
+    'urn:epc:idpat:grai:': partial(_parse_reference_pattern, 'grai'),
+    'urn:epc:idpat:gdti:': partial(_parse_reference_pattern, 'gdti'),
+    'urn:epc:idpat:sgcn:': partial(_parse_reference_pattern, 'sgcn'),
+    'urn:epc:idpat:cpi:': partial(_parse_cpi, True),
+    'urn:epc:idpat:itip:': partial(_parse_itip, True),
+    'urn:epc:idpat:upui:': partial(_parse_gtin_based_pattern, 'upui'),
+}
+"""Dispatch table of the supported EPC URI schemes.
+
+Maps the scheme prefix up to and including the colon after the scheme token
+(e.g. 'urn:epc:id:sgtin:') to the function scanning the remainder of the URI into an EPCKey.
+"""
+
+
+def _optional(separator, component):
+    return '' if component is None else separator + __web_uri_percent_encoder(component)
+
+
+def _gtin(key):
+    return key.reference[:1] + key.company_prefix + key.reference[1:]
+
+
+_DL_PARTS = {
+    'sgtin': lambda key: ('https://id.gs1.org/01/', _gtin(key), _optional('/21/', key.serial)),
+    'upui': lambda key: ('https://id.gs1.org/01/', _gtin(key), _optional('/235/', key.serial)),
+    'lgtin': lambda key: ('https://id.gs1.org/01/', _gtin(key), _optional('/10/', key.serial)),
+    'itip': lambda key: ('https://id.gs1.org/8006/', _gtin(key), key.extension + _optional('/21/', key.serial)),
+    'sscc': lambda key: ('https://id.gs1.org/00/', _gtin(key), ''),
+    'sgln': lambda key: ('https://id.gs1.org/414/', key.company_prefix + key.reference,
+                         '' if key.extension == '0' else _optional('/254/', key.extension)),
+    'grai': lambda key: ('https://id.gs1.org/8003/', '0' + key.company_prefix + key.reference,
+                         _optional('', key.serial)),
+    'giai': lambda key: ('https://id.gs1.org/8004/' + key.company_prefix + __web_uri_percent_encoder(key.reference),
+                         None, ''),
+    'gsrn': lambda key: ('https://id.gs1.org/8018/', key.company_prefix + key.reference, ''),
+    'gsrnp': lambda key: ('https://id.gs1.org/8017/', key.company_prefix + key.reference, ''),
+    'gdti': lambda key: ('https://id.gs1.org/253/', key.company_prefix + key.reference, _optional('', key.serial)),
+    'cpi': lambda key: ('https://id.gs1.org/8010/' + __web_uri_percent_encoder(key.company_prefix + key.reference),
+                        None, '' if key.serial is None else '/8011/' + key.serial),
+    'sgcn': lambda key: ('https://id.gs1.org/255/', key.company_prefix + key.reference,
+                         '' if key.serial is None else key.serial),
+    'ginc': lambda key: ('https://id.gs1.org/401/' + key.company_prefix + __web_uri_percent_encoder(key.reference),
+                         None, ''),
+    'gsin': lambda key: ('https://id.gs1.org/402/', key.company_prefix + key.reference, ''),
+    'pgln': lambda key: ('https://id.gs1.org/417/', key.company_prefix + key.reference, ''),
+}
+"""Map each EPC scheme to a function splitting the GS1 DL URI of an EPCKey into
+(part before the check digit, GS1 key requiring a check digit or None, part after the check digit)."""
+
+
+def parse_epc_uri(uri):
+    """Function scans an EPC URI, EPC Class URI or EPC ID Pattern URI in a single pass.
 
     Parameters
     ----------
     uri : str
-        Valid EPC URI, EPC Pattern URI, EPC Class URI, GS1 Digital Link URI.
+        EPC URI, EPC Class URI or EPC ID Pattern URI.
 
     Returns
     -------
-    str
-        Constrained, canonicalised GS1 Digital Link URI equivalent.
+    EPCKey
+        Structured GS1 key conveyed by the URI.
     None
+        If uri is not a valid URI of one of the supported EPC schemes.
     """
 
-    if not isinstance(uri, str):
-        logging.warning("dl normaliser called with non-string argument")
+    prefix = _epc_scheme_prefix(uri)
+    scanner = EPC_SCHEMES.get(prefix)
+    if scanner is None:
         return None
+    return scanner(uri[len(prefix):])
 
-    try:
-        partition = uri.index('.')
-    except ValueError:
-        logging.debug("No '.' in %s. Not a normalisable uri.", uri)
+
+def epc_key_to_dl(key, checkdigit=None):
+    """Function builds the canonical GS1 DL URI of an EPCKey.
+
+    Parameters
+    ----------
+    key : EPCKey
+        Structured GS1 key, see parse_epc_uri.
+    checkdigit : int
+        Check digit of the key, if already known. Computed if not given.
+
+    Returns
+    -------
+    str
+        Canonical GS1 Digital Link URI.
+    """
+
+    before, raw_key, after = _DL_PARTS[key.scheme](key)
+    if raw_key is None:
+        return before + after
+    if checkdigit is None:
+        checkdigit = check_digit(raw_key)
+    return before + raw_key + str(checkdigit) + after
+
+
+def _epc_scheme_prefix(uri):
+    """Return the 'urn:epc:<type>:<scheme>:' prefix of uri, or '' if there is none."""
+    scheme_start = uri.find(':', 8) + 1
+    if scheme_start == 0:
+        return ''
+    return uri[:uri.find(':', scheme_start) + 1]
+
+
+# GS1 DL URIs
+_DL_URI = re.compile(
+    r'^https?:(\/\/((([^\/?#]*)@)?([^\/?#:]*)(:([^\/?#]*))?))?((([^?#]*)(\/(01|gtin|8006|itip|8010|cpid|414|gln|417|party|8017|gsrnp|8018|gsrn|255|gcn|00|sscc|253|gdti|401|ginc|402|gsin|8003|grai|8004|giai)\/)(\d{4}[^\/]+)(\/[^/]+\/[^/]+)?[/]?(\?([^?\n]*))?(#([^\n]*))?)|(\/[A-Za-z_-]{10}$))')
+_CANONICAL_DL_URI = re.compile(
+    r'^https:\/\/id.gs1.org\/(01|8006|8010|414|417|8017|8018|255|00|253|401|402|8003|8004)\/(\d{4}[^\/]+)(\/[^\/]+\/[^\/]+)?[\/]?(\?([^?\n]*))?(#([^\n]*))?|(\/[A-Za-z_-]{10}$)')
+_CANONICAL_KEY_PREFIXES = ('/00/', '/01/', '/253/', '/255/', '/401/', '/402/', '/414/', '/417/',
+                           '/8003/', '/8004/', '/8006/', '/8010/', '/8017/', '/8018/')
+_GTIN_14 = re.compile(r'^https:\/\/id.gs1.org\/01\/\d{14}')
+_GTIN_13 = re.compile(r'^https:\/\/id.gs1.org\/01\/\d{13}')
+_GTIN_12 = re.compile(r'^https:\/\/id.gs1.org\/01\/\d{12}')
+_GTIN_8 = re.compile(r'^https:\/\/id.gs1.org\/01\/\d{8}')
+_ITIP_CPV = re.compile(
+    r'https:\/\/id.gs1.org\/8006\/\d{18}\/22\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$')
+_GTIN_CPV = re.compile(
+    r'https:\/\/id.gs1.org\/01\/\d{14}\/22\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$')
+_ITIP_CPV_QUALIFIED = re.compile(
+    r'https:\/\/id.gs1.org\/8006\/\d{18}\/22\/([\x2F\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$')
+_GTIN_CPV_QUALIFIED = re.compile(
+    r'https:\/\/id.gs1.org\/01\/\d{14}\/22\/([\x2F\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$')
+_ITIP_LOT_SERIAL = re.compile(
+    r'https:\/\/id.gs1.org\/8006\/\d{18}\/10\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})\/21\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$')
+_GTIN_LOT_SERIAL = re.compile(
+    r'https:\/\/id.gs1.org\/01\/(\d{14})\/10\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})\/21\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$')
+_DL_OUTPUT_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'https:\/\/id.gs1.org\/00\/(\d{18})$',
+    r'https:\/\/id.gs1.org\/01\/(\d{14})\/21\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
+    r'https:\/\/id.gs1.org\/01\/(\d{14})\/10\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
+    r'https:\/\/id.gs1.org\/01\/(\d{14})$',
+    r'https:\/\/id.gs1.org\/01\/(\d{14})\/235\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,28})$',
+    r'https:\/\/id.gs1.org\/253\/(\d{13})([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,17})$',
+    r'https:\/\/id.gs1.org\/255\/(\d{13})(\d{0,12})$',
+    r'https:\/\/id.gs1.org\/401\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,30})$',
+    r'https:\/\/id.gs1.org\/402\/(\d{17})$',
+    r'https:\/\/id.gs1.org\/414\/(\d{13})$',
+    r'https:\/\/id.gs1.org\/414\/(\d{13})\/254\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
+    r'https:\/\/id.gs1.org\/417\/(\d{13})$',
+    r'https:\/\/id.gs1.org\/8003\/(\d{14})([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,16})$',
+    r'https:\/\/id.gs1.org\/8004\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,30})$',
+    r'https:\/\/id.gs1.org\/8006\/(\d{18})\/21\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
+    r'https:\/\/id.gs1.org\/8006\/(\d{18})\/10\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
+    r'https:\/\/id.gs1.org\/8006\/(\d{18})$',
+    r'https:\/\/id.gs1.org\/8010\/([\x23\x2D\x2F\x30-\x39\x41-\x5A]{0,30})\/8011/(\d{0,12})$',
+    r'https:\/\/id.gs1.org\/8010\/([\x23\x2D\x2F\x30-\x39\x41-\x5A]{0,30})$',
+    r'https:\/\/id.gs1.org\/8017\/(\d{18})$',
+    r'https:\/\/id.gs1.org\/8018\/(\d{18})$',
+))
+"""Valid syntaxes of the constrained, canonical GS1 DL URIs returned by the normaliser."""
+
+
+_DL_SHORT_NAMES = {
+    'gtin': '01', 'itip': '8006', 'cpid': '8010', 'gln': '414', 'party': '417', 'gsrnp': '8017', 'gsrn': '8018',
+    'gcn': '255', 'sscc': '00', 'gdti': '253', 'ginc': '401', 'gsin': '402', 'grai': '8003', 'giai': '8004',
+    'cpv': '22', 'lot': '10', 'ser': '21',
+}
+"""Short names of GS1 keys and key qualifiers in GS1 DL URIs and the AIs they stand for."""
+
+_DL_CHARS = r'[\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]'
+
+
+def _dl_syntax(pattern):
+    return re.compile(pattern.replace('<chars>', _DL_CHARS))
+
+
+_DLKey = namedtuple("_DLKey", ["syntax", "qualifiers"])
+
+_DL_KEYS = {
+    '00': _DLKey(_dl_syntax(r'\d{18}'), ()),
+    '01': _DLKey(_dl_syntax(r'\d{14}(?:\/21\/<chars>{0,20}|\/10\/<chars>{0,20}|\/235\/<chars>{0,28})?'),
+                 ('22', '10', '21')),
+    '253': _DLKey(_dl_syntax(r'\d{13}<chars>{0,17}'), ()),
+    '255': _DLKey(_dl_syntax(r'\d{13}\d{0,12}'), ()),
+    '401': _DLKey(_dl_syntax(r'<chars>{0,30}'), ()),
+    '402': _DLKey(_dl_syntax(r'\d{17}'), ()),
+    '414': _DLKey(_dl_syntax(r'\d{13}(?:\/254\/<chars>{0,20})?'), ()),
+    '417': _DLKey(_dl_syntax(r'\d{13}'), ()),
+    '8003': _DLKey(_dl_syntax(r'\d{14}<chars>{0,16}'), ()),
+    '8004': _DLKey(_dl_syntax(r'<chars>{0,30}'), ()),
+    '8006': _DLKey(_dl_syntax(r'\d{18}(?:\/21\/<chars>{0,20}|\/10\/<chars>{0,20})?'), ('22', '10', '21')),
+    '8010': _DLKey(_dl_syntax(r'[\x23\x2D\x2F\x30-\x39\x41-\x5A]{0,30}(?:\/8011\/\d{0,12})?'), ()),
+    '8017': _DLKey(_dl_syntax(r'\d{18}'), ()),
+    '8018': _DLKey(_dl_syntax(r'\d{18}'), ()),
+}
+"""AI table of the GS1 keys in canonical GS1 DL URIs.
+
+`syntax`        Valid syntax of key value and key qualifiers in the canonical URI.
+`qualifiers`    Key qualifiers in their order. CPV (22) is dropped and a lot (10) followed by a serial (21) is reduced
+                to the serial, since only the lowest level of identification is retained.
+"""
+
+_DL_KEY_NAMES = frozenset(_DL_KEYS) | frozenset(name for name, ai in _DL_SHORT_NAMES.items() if ai in _DL_KEYS)
+_DL_QUALIFIER_NAMES = frozenset(('22', '10', '21', 'cpv', 'lot', 'ser'))
+_DL_RESERVED_NAMES = _DL_KEY_NAMES | _DL_QUALIFIER_NAMES
+_DL_CPV = _dl_syntax(r'<chars>{0,20}')
+_DL_CPV_QUALIFIED = _dl_syntax(r'(?:\/|<chars>){0,20}')
+_DL_LOT_SERIAL = _dl_syntax(r'\/10\/<chars>{0,20}\/21\/<chars>{0,20}')
+_DL_LOOSE_CANONICAL_HOST = re.compile(r'https:\/\/id.gs1.org\/')
+
+_DL_FALLBACK = object()
+
+
+def _parse_dl_uri(uri):
+    """Canonicalise a GS1 Digital Link URI in a single walk over its path segments.
+
+    Returns _DL_FALLBACK for URIs whose canonical form depends on the details of _dl_uri_fallback,
+    e.g. with fragments, repeated key qualifiers or reserved names like 'gtin' used as values.
+    """
+
+    if uri.startswith('https:'):
+        path = uri[6:]
+    elif uri.startswith('http:'):
+        path = uri[5:]
+    else:
+        return None
+    if '#' in path or '\n' in path or (
+            not uri.startswith('https://id.gs1.org/') and _DL_LOOSE_CANONICAL_HOST.match(uri) is not None):
+        return _DL_FALLBACK
+
+    query = path.find('?')
+    if query >= 0:
+        path = path[:query]
+    segments = path.split('/')
+
+    # Only segments enclosed in '/' can be names. The first one must be the key,
+    # any further ones must be key qualifiers in the place of a name.
+    key = 0
+    for index in range(1, len(segments) - 1):
+        if segments[index] in _DL_RESERVED_NAMES:
+            if key == 0:
+                if segments[index] not in _DL_KEY_NAMES:
+                    return _DL_FALLBACK
+                key = index
+            elif (index - key) % 2 or segments[index] not in _DL_QUALIFIER_NAMES:
+                return _DL_FALLBACK
+    if key == 0:
         return None
 
-    # EPC URIs
-    if match(
-            r'^urn:epc:id:sgtin:((\d{6}\.\d{7})|(\d{7}\.\d{6})|(\d{8}\.\d{5})|(\d{9}\.\d{4})|(\d{10}\.\d{3})|(\d{11}\.\d{2})|(\d{12}\.\d{1}))\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,20}$',
-            uri) is not None:
-        gs1companyprefix = uri[17:partition]
-        itemref = uri[(partition + 1):(partition + 1 + (13 - len(gs1companyprefix)))]
-        raw_gtin = itemref[0:1] + gs1companyprefix + itemref[1:]
-        serial = uri[32:]
-        return ('https://id.gs1.org/01/' + raw_gtin + str(check_digit(raw_gtin)) + '/21/' + __web_uri_percent_encoder(
-            serial))
-
-    if match(
-            r'^urn:epc:id:sscc:((\d{6}\.\d{11}$)|(\d{7}\.\d{10}$)|(\d{8}\.\d{9}$)|(\d{9}\.\d{8}$)|(\d{10}\.\d{7}$)|(\d{11}\.\d{6}$)|(\d{12}\.\d{5}$))',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        serialref = uri[(partition + 2):]
-        rawSSCC = uri[(partition + 1):(partition + 2)] + gs1companyprefix + serialref
-        return ('https://id.gs1.org/00/' + rawSSCC + str(check_digit(rawSSCC)))
-
-    if match(
-            r'^urn:epc:id:sgln:((\d{6}\.\d{6})|(\d{7}\.\d{5})|(\d{8}\.\d{4})|(\d{9}\.\d{3})|(\d{10}\.\d{2})|(\d{11}\.\d{1})|(\d{12}\.))\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,20}$',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        locationref = uri[(partition + 1):(partition + 1 +
-                                           (12 - len(gs1companyprefix)))]
-        rawGLN = gs1companyprefix + locationref
-        extension = uri[30:]
-        if extension == '0':
-            return ('https://id.gs1.org/414/' + rawGLN + str(check_digit(rawGLN)))
-        else:
-            return ('https://id.gs1.org/414/' + rawGLN + str(check_digit(rawGLN)) + '/254/' + __web_uri_percent_encoder(
-                extension))
-
-    if match(
-            r'^urn:epc:id:grai:(([\d]{6}\.[\d]{6})|([\d]{7}\.[\d]{5})|([\d]{8}\.[\d]{4})|([\d]{9}\.[\d]{3})|([\d]{10}\.[\d]{2})|([\d]{11}\.[\d]{1})|([\d]{12}\.\.))\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,16}$',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        assetref = uri[(partition + 1):(partition + 1 + (12 - len(gs1companyprefix)))]
-        raw_grai = '0' + gs1companyprefix + assetref
-        serial = uri[30:]
-        return ('https://id.gs1.org/8003/' + raw_grai + str(check_digit(raw_grai)) + __web_uri_percent_encoder(serial))
-
-    if match(
-            r'^urn:epc:id:giai:(([\d]{6}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,24})|([\d]{7}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,23})|([\d]{8}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,22})|([\d]{9}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,21})|([\d]{10}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,20})|([\d]{11}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,19})|([\d]{12}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,18}))$',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        assetref = uri[(partition + 1):]
-        return ('https://id.gs1.org/8004/' + gs1companyprefix + __web_uri_percent_encoder(assetref))
-
-    if match(
-            r'^urn:epc:id:gsrn:(([\d]{6}\.[\d]{11}$)|([\d]{7}\.[\d]{10}$)|([\d]{8}\.[\d]{9}$)|([\d]{9}\.[\d]{8}$)|([\d]{10}\.[\d]{7}$)|([\d]{11}\.[\d]{6}$)|([\d]{12}\.[\d]{5}$))',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        serviceref = uri[(partition + 1):]
-        rawGSRN = gs1companyprefix + serviceref
-        return ('https://id.gs1.org/8018/' + rawGSRN + str(check_digit(rawGSRN)))
-
-    if match(
-            r'^urn:epc:id:gsrnp:(([\d]{6}\.[\d]{11}$)|([\d]{7}\.[\d]{10}$)|([\d]{8}\.[\d]{9}$)|([\d]{9}\.[\d]{8}$)|([\d]{10}\.[\d]{7}$)|([\d]{11}\.[\d]{6}$)|([\d]{12}\.[\d]{5}$))',
-            uri) is not None:
-        gs1companyprefix = uri[17:partition]
-        serviceref = uri[(partition + 1):]
-        rawGSRNP = gs1companyprefix + serviceref
-        return ('https://id.gs1.org/8017/' + rawGSRNP + str(check_digit(rawGSRNP)))
-
-    if match(
-            r'^urn:epc:id:gdti:(([\d]{6}\.[\d]{6})|([\d]{7}\.[\d]{5})|([\d]{8}\.[\d]{4})|([\d]{9}\.[\d]{3})|([\d]{10}\.[\d]{2})|([\d]{11}\.[\d]{1})|([\d]{12}\.\.))(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,20}$',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        documenttype = uri[(partition + 1):(partition + 1 +
-                                            (12 - len(gs1companyprefix)))]
-        raw_gdti = gs1companyprefix + documenttype
-        serial = uri[30:]
-        return 'https://id.gs1.org/253/' + raw_gdti + str(check_digit(raw_gdti)) + __web_uri_percent_encoder(serial)
-
-    if match(
-            r'^urn:epc:id:cpi:((\d{6}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,24})|(\d{7}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,23})|(\d{8}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,22})|(\d{9}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,21})|(\d{10}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,20})|(\d{11}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,19})|(\d{12}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,18}))\.[\d]{1,12}$',
-            uri) is not None:
-        gs1companyprefix = uri[15:partition]
-        separator = uri.rfind('.')
-        cpref = uri[(partition + 1):separator]
-        raw_cpi = gs1companyprefix + cpref
-        serial = uri[(separator + 1):]
-        return 'https://id.gs1.org/8010/' + __web_uri_percent_encoder(raw_cpi) + '/8011/' + serial
-
-    if match(
-            r'^urn:epc:id:sgcn:(([\d]{6}\.[\d]{6})|([\d]{7}\.[\d]{5})|([\d]{8}\.[\d]{4})|([\d]{9}\.[\d]{3})|([\d]{10}\.[\d]{2})|([\d]{11}\.[\d]{1})|([\d]{12}\.))\.[\d]{1,12}$',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        couponref = uri[(partition + 1):(partition + 1 + (12 - len(gs1companyprefix)))]
-        raw_sgcn = gs1companyprefix + couponref
-        serial = uri[30:]
-        return 'https://id.gs1.org/255/' + raw_sgcn + str(check_digit(raw_sgcn)) + serial
-
-    if match(
-            r'^urn:epc:id:ginc:([\d]{6}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,24}|[\d]{7}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,23}|[\d]{8}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,22}|[\d]{9}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,21}|[\d]{10}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,20}|[\d]{11}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,19}|[\d]{12}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,18})$',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        consignmentref = uri[(partition + 1):]
-        return 'https://id.gs1.org/401/' + gs1companyprefix + __web_uri_percent_encoder(consignmentref)
-
-    if match(
-            r'^urn:epc:id:gsin:(([\d]{6}\.[\d]{10}$)|([\d]{7}\.[\d]{9}$)|([\d]{8}\.[\d]{8}$)|([\d]{9}\.[\d]{7}$)|([\d]{10}\.[\d]{6}$)|([\d]{11}\.[\d]{5}$)|([\d]{12}\.[\d]{4}$))',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        shipperref = uri[(partition + 1):]
-        rawGSIN = gs1companyprefix + shipperref
-        return 'https://id.gs1.org/402/' + rawGSIN + str(check_digit(rawGSIN))
-
-    if match(
-            r'^urn:epc:id:itip:(([\d]{6}\.[\d]{7})|([\d]{7}\.[\d]{6})|([\d]{8}\.[\d]{5})|([\d]{9}\.[\d]{4})|([\d]{10}\.[\d]{3})|([\d]{11}\.[\d]{2})|([\d]{12}\.[\d]{1}))\.[\d]{2}\.[\d]{2}\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,20}$',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        itemref = uri[(partition + 1):(partition + 1 + (13 - len(gs1companyprefix)))]
-        raw_gtin = itemref[0:1] + gs1companyprefix + itemref[1:]
-        piece = uri[31:33]
-        total = uri[34:36]
-        serial = uri[37:]
-        return 'https://id.gs1.org/8006/' + raw_gtin + str(check_digit(raw_gtin)) + piece + total + \
-               '/21/' + __web_uri_percent_encoder(serial)
-
-    if match(
-            r'^urn:epc:id:upui:((\d{6}\.\d{7})|(\d{7}\.\d{6})|(\d{8}\.\d{5})|(\d{9}\.\d{4})|(\d{10}\.\d{3})|(\d{11}\.\d{2})|(\d{12}\.\d{1}))\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,28}$',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        itemref = uri[(partition + 1):(partition + 1 + (13 - len(gs1companyprefix)))]
-        raw_gtin = itemref[0:1] + gs1companyprefix + itemref[1:]
-        serial = uri[31:]
-        return 'https://id.gs1.org/01/' + raw_gtin + str(check_digit(raw_gtin)) + '/235/' + __web_uri_percent_encoder(serial)
-
-    if match(
-            r'^urn:epc:id:pgln:(([\d]{6}\.[\d]{6})|([\d]{7}\.[\d]{5})|([\d]{8}\.[\d]{4})|([\d]{9}\.[\d]{3})|([\d]{10}\.[\d]{2})|([\d]{11}\.[\d]{1})|([\d]{12}\.))$',
-            uri) is not None:
-        gs1companyprefix = uri[16:partition]
-        partyref = uri[(partition + 1):(partition + 1 + (12 - len(gs1companyprefix)))]
-        rawGLN = gs1companyprefix + partyref
-        return 'https://id.gs1.org/417/' + rawGLN + str(check_digit(rawGLN))
-
-    # EPC Class URIs
-    if match(
-            r'^urn:epc:class:lgtin:(([\d]{6}\.[\d]{7})|([\d]{7}\.[\d]{6})|([\d]{8}\.[\d]{5})|([\d]{9}\.[\d]{4})|([\d]{10}\.[\d]{3})|([\d]{11}\.[\d]{2})|([\d]{12}\.[\d]{1}))\.(\%2[125-9A-Fa-f]|\%3[0-9A-Fa-f]|\%4[1-9A-Fa-f]|\%5[0-9AaFf]|\%6[1-9A-Fa-f]|\%7[0-9Aa]|[!\')(*+,.0-9:;=A-Za-z_-]){1,20}$',
-            uri) is not None:
-        gs1companyprefix = uri[20:partition]
-        itemref = uri[(partition + 1):(partition + 1 + (13 - len(gs1companyprefix)))]
-        raw_gtin = itemref[0:1] + gs1companyprefix + itemref[1:]
-        lot = uri[35:]
-        return 'https://id.gs1.org/01/' + raw_gtin + str(check_digit(raw_gtin)) + '/10/' + __web_uri_percent_encoder(lot)
-
-    # EPC ID Pattern URIs
-    if match(
-            r'^urn:epc:idpat:sgtin:((\d{6}\.\d{7})|(\d{7}\.\d{6})|(\d{8}\.\d{5})|(\d{9}\.\d{4})|(\d{10}\.\d{3})|(\d{11}\.\d{2})|(\d{12}\.\d{1}))\.\*$',
-            uri) is not None:
-        gs1companyprefix = uri[20:partition]
-        itemref = uri[(partition + 1):(partition + 1 + (13 - len(gs1companyprefix)))]
-        raw_gtin = itemref[0:1] + gs1companyprefix + itemref[1:]
-        return 'https://id.gs1.org/01/' + raw_gtin + str(check_digit(raw_gtin))
-
-    if match(
-            r'^urn:epc:idpat:grai:(([\d]{6}\.[\d]{6})|([\d]{7}\.[\d]{5})|([\d]{8}\.[\d]{4})|([\d]{9}\.[\d]{3})|([\d]{10}\.[\d]{2})|([\d]{11}\.[\d]{1})|([\d]{12}\.\.))\.\*$',
-            uri) is not None:
-        gs1companyprefix = uri[19:partition]
-        assetref = uri[(partition + 1):(partition + 1 + (12 - len(gs1companyprefix)))]
-        raw_grai = '0' + gs1companyprefix + assetref
-        return 'https://id.gs1.org/8003/' + raw_grai + str(check_digit(raw_grai))
-
-    if match(
-            r'^urn:epc:idpat:gdti:(([\d]{6}\.[\d]{6})|([\d]{7}\.[\d]{5})|([\d]{8}\.[\d]{4})|([\d]{9}\.[\d]{3})|([\d]{10}\.[\d]{2})|([\d]{11}\.[\d]{1})|([\d]{12}\.\.))\.\*$',
-            uri) is not None:
-        gs1companyprefix = uri[19:partition]
-        documenttype = uri[(partition + 1):(partition + 1 +
-                                            (12 - len(gs1companyprefix)))]
-        raw_gdti = gs1companyprefix + documenttype
-        return 'https://id.gs1.org/253/' + raw_gdti + str(check_digit(raw_gdti))
-
-    if match(
-            r'^urn:epc:idpat:sgcn:(([\d]{6}\.[\d]{6})|([\d]{7}\.[\d]{5})|([\d]{8}\.[\d]{4})|([\d]{9}\.[\d]{3})|([\d]{10}\.[\d]{2})|([\d]{11}\.[\d]{1})|([\d]{12}\.\.))\.\*$',
-            uri) is not None:
-        gs1companyprefix = uri[19:partition]
-        couponref = uri[(partition + 1):(partition + 1 + (12 - len(gs1companyprefix)))]
-        raw_sgcn = gs1companyprefix + couponref
-        return 'https://id.gs1.org/255/' + raw_sgcn + str(check_digit(raw_sgcn))
-
-    if match(
-            r'^urn:epc:idpat:cpi:((\d{6}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,24})|(\d{7}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,23})|(\d{8}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,22})|(\d{9}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,21})|(\d{10}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,20})|(\d{11}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,19})|(\d{12}\.(\%2[3dfDF]|\%3[0-9]|\%4[1-9A-Fa-f]|\%5[0-9Aa]|[0-9A-Z-]){1,18}))\.\*$',
-            uri) is not None:
-        gs1companyprefix = uri[18:partition]
-        separator = uri.rfind('.')
-        cpref = uri[(partition + 1):(separator)]
-        raw_cpi = gs1companyprefix + cpref
-        return 'https://id.gs1.org/8010/' + __web_uri_percent_encoder(raw_cpi)
-
-    if match(
-            r'^urn:epc:idpat:itip:(([\d]{6}\.[\d]{7})|([\d]{7}\.[\d]{6})|([\d]{8}\.[\d]{5})|([\d]{9}\.[\d]{4})|([\d]{10}\.[\d]{3})|([\d]{11}\.[\d]{2})|([\d]{12}\.[\d]{1}))\.[\d]{2}\.[\d]{2}\.\*$',
-            uri) is not None:
-        gs1companyprefix = uri[19:partition]
-        itemref = uri[(partition + 1):(partition + 1 + (13 - len(gs1companyprefix)))]
-        raw_gtin = itemref[0:1] + gs1companyprefix + itemref[1:]
-        piece = uri[34:36]
-        total = uri[37:39]
-        return 'https://id.gs1.org/8006/' + raw_gtin + str(check_digit(raw_gtin)) + piece + total
-
-    if match(
-            r'^urn:epc:idpat:upui:((\d{6}\.\d{7})|(\d{7}\.\d{6})|(\d{8}\.\d{5})|(\d{9}\.\d{4})|(\d{10}\.\d{3})|(\d{11}\.\d{2})|(\d{12}\.\d{1}))\.\*$',
-            uri) is not None:
-        gs1companyprefix = uri[19:partition]
-        itemref = uri[(partition + 1):(partition + 1 + (13 - len(gs1companyprefix)))]
-        raw_gtin = itemref[0:1] + gs1companyprefix + itemref[1:]
-        return 'https://id.gs1.org/01/' + raw_gtin + str(check_digit(raw_gtin))
-
-    # GS1 DL URIs
-    if match(
-            r'^https?:(\/\/((([^\/?#]*)@)?([^\/?#:]*)(:([^\/?#]*))?))?((([^?#]*)(\/(01|gtin|8006|itip|8010|cpid|414|gln|417|party|8017|gsrnp|8018|gsrn|255|gcn|00|sscc|253|gdti|401|ginc|402|gsin|8003|grai|8004|giai)\/)(\d{4}[^\/]+)(\/[^/]+\/[^/]+)?[/]?(\?([^?\n]*))?(#([^\n]*))?)|(\/[A-Za-z_-]{10}$))',
-            uri) is None:
+    value = segments[key + 1]
+    if not (value[:4].isdecimal() and len(value) >= 4 and (len(value) > 4 or (
+            query >= 0 and key + 2 == len(segments)))):
+        return None
+
+    ai = _DL_SHORT_NAMES.get(segments[key], segments[key])
+    dl_key = _DL_KEYS[ai]
+    qualifiers = segments[(key + 2):]
+    if len(qualifiers) > 1:
+        names = [_DL_SHORT_NAMES.get(name, name) for name in qualifiers[:-1:2]]
+        if len(set(names)) != len(names):
+            return _DL_FALLBACK
+        qualifiers[:-1:2] = names
+        tail = '/' + '/'.join(qualifiers)
+    elif qualifiers:
+        tail = '/' + qualifiers[0]
+    else:
+        tail = ''
+
+    # pad all GTIN formats to 14 digits
+    if ai == '01':
+        digits = len(value) if value.isdecimal() else next(
+            index for index, character in enumerate(value) if not character.isdecimal())
+        if digits < 14:
+            if digits == 13:
+                value = '0' + value
+            elif digits == 12:
+                value = '00' + value
+            elif digits >= 8:
+                value = '000000' + value
+
+    if dl_key.qualifiers and value.isdecimal() and len(value) == (14 if ai == '01' else 18):
+        if tail.startswith('/22/'):
+            cpv = tail[4:]
+            if _DL_CPV.fullmatch(cpv) is not None:
+                tail = ''
+            elif _DL_CPV_QUALIFIED.fullmatch(cpv) is not None:
+                tail = cpv[cpv.find('/'):]
+        if _DL_LOT_SERIAL.fullmatch(tail) is not None:
+            tail = tail[tail.find('/', 4):]
+
+    if dl_key.syntax.fullmatch(value + tail) is None:
+        return None
+    return 'https://id.gs1.org/' + ai + '/' + value + tail
+
+
+def _dl_uri_normaliser(uri):
+    """Canonicalise a GS1 Digital Link URI, see normaliser."""
+
+    canonical = _parse_dl_uri(uri)
+    if canonical is _DL_FALLBACK:
+        return _dl_uri_fallback(uri)
+    return canonical
+
+
+def _dl_uri_fallback(uri):
+    """Canonicalise a GS1 Digital Link URI with the original sequence of regular expressions and replacements."""
+
+    if _DL_URI.match(uri) is None:
         return None
 
     # remove query string
@@ -361,115 +697,124 @@ def normaliser(uri):
            .replace('/ser/', '/21/'))
 
     # prefix with canonical domain name
-    if match(
-            r'^https:\/\/id.gs1.org\/(01|8006|8010|414|417|8017|8018|255|00|253|401|402|8003|8004)\/(\d{4}[^\/]+)(\/[^\/]+\/[^\/]+)?[\/]?(\?([^?\n]*))?(#([^\n]*))?|(\/[A-Za-z_-]{10}$)',
-            uri) is None:
-        if uri.find('/00/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/00/')):]
-        elif uri.find('/01/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/01/')):]
-        elif uri.find('/253/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/253/')):]
-        elif uri.find('/255/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/255/')):]
-        elif uri.find('/401/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/401/')):]
-        elif uri.find('/402/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/402/')):]
-        elif uri.find('/414/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/414/')):]
-        elif uri.find('/417/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/417/')):]
-        elif uri.find('/8003/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/8003/')):]
-        elif uri.find('/8004/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/8004/')):]
-        elif uri.find('/8006/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/8006/')):]
-        elif uri.find('/8010/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/8010/')):]
-        elif uri.find('/8017/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/8017/')):]
-        elif uri.find('/8018/') != -1:
-            uri = 'https://id.gs1.org' + uri[(uri.find('/8018/')):]
+    if _CANONICAL_DL_URI.match(uri) is None:
+        for key_prefix in _CANONICAL_KEY_PREFIXES:
+            if uri.find(key_prefix) != -1:
+                uri = 'https://id.gs1.org' + uri[(uri.find(key_prefix)):]
+                break
 
     # ensure that all GTIN formats are padded to 14 digits
-    if match(r'^https:\/\/id.gs1.org\/01\/\d{14}', uri) is None:
-        if match(r'^https:\/\/id.gs1.org\/01\/\d{13}', uri) is not None:
+    if _GTIN_14.match(uri) is None:
+        if _GTIN_13.match(uri) is not None:
             uri = uri.replace('/01/', '/01/0')
-        elif match(r'^https:\/\/id.gs1.org\/01\/\d{12}', uri) is not None:
+        elif _GTIN_12.match(uri) is not None:
             uri = uri.replace('/01/', '/01/00')
-        elif match(r'^https:\/\/id.gs1.org\/01\/\d{8}', uri) is not None:
+        elif _GTIN_8.match(uri) is not None:
             uri = uri.replace('/01/', '/01/000000')
 
     # remove cpv
     x = uri[(uri.find('/22/') + 4):]
 
     # for 01/8006 only:
-    if (
-            match(
-                r'https:\/\/id.gs1.org\/8006\/\d{18}\/22\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
-                uri) or match(
-                    r'https:\/\/id.gs1.org\/01\/\d{14}\/22\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
-                    uri)) is not None:
+    if (_ITIP_CPV.match(uri) or _GTIN_CPV.match(uri)) is not None:
         uri = (uri[:(uri.find('/22/'))]) + (x[x.find('/'):-1])
 
     # for 01/8006 followed by other key qualifiers:
-    if (
-            match(
-                r'https:\/\/id.gs1.org\/8006\/\d{18}\/22\/([\x2F\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
-                uri) or match(
-                    r'https:\/\/id.gs1.org\/01\/\d{14}\/22\/([\x2F\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
-                    uri)) is not None:
+    if (_ITIP_CPV_QUALIFIED.match(uri) or _GTIN_CPV_QUALIFIED.match(uri)) is not None:
         uri = (uri[:(uri.find('/22/'))]) + (x[x.find('/'):])
 
     # take only lowest ID granularity level (i.e. if serial is present, omit lot)
-    if (match(
-            r'https:\/\/id.gs1.org\/8006\/\d{18}\/10\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})\/21\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
-            uri) or match(
-                r'https:\/\/id.gs1.org\/01\/(\d{14})\/10\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})\/21\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
-                uri)) is not None:
+    if (_ITIP_LOT_SERIAL.match(uri) or _GTIN_LOT_SERIAL.match(uri)) is not None:
         y = uri[(uri.find('/10/') + 4):]
         uri = (uri[:(uri.find('/10/'))]) + (y[y.find('/'):])
 
     # ensure that output has a valid syntax
-    if (match(r'https:\/\/id.gs1.org\/00\/(\d{18})$', uri) or
-        match(
-            r'https:\/\/id.gs1.org\/01\/(\d{14})\/21\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
-            uri) or
-        match(
-            r'https:\/\/id.gs1.org\/01\/(\d{14})\/10\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
-            uri) or
-        match(r'https:\/\/id.gs1.org\/01\/(\d{14})$', uri) or
-        match(
-            r'https:\/\/id.gs1.org\/01\/(\d{14})\/235\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,28})$',
-            uri) or
-        match(r'https:\/\/id.gs1.org\/253\/(\d{13})([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,17})$',
-              uri) or
-        match(r'https:\/\/id.gs1.org\/255\/(\d{13})(\d{0,12})$', uri) or
-        match(r'https:\/\/id.gs1.org\/401\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,30})$', uri) or
-        match(r'https:\/\/id.gs1.org\/402\/(\d{17})$', uri) or
-        match(r'https:\/\/id.gs1.org\/414\/(\d{13})$', uri) or
-        match(
-            r'https:\/\/id.gs1.org\/414\/(\d{13})\/254\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
-            uri) or
-        match(r'https:\/\/id.gs1.org\/417\/(\d{13})$', uri) or
-        match(
-            r'https:\/\/id.gs1.org\/8003\/(\d{14})([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,16})$',
-            uri) or
-        match(r'https:\/\/id.gs1.org\/8004\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,30})$',
-              uri) or
-        match(
-            r'https:\/\/id.gs1.org\/8006\/(\d{18})\/21\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
-            uri) or
-        match(
-            r'https:\/\/id.gs1.org\/8006\/(\d{18})\/10\/([\x22\x27\x2D\x2E\x30-\x39\x3B-\x3F\x41-\x5A\x5F\x61-\x7A]{0,20})$',
-            uri) or
-        match(r'https:\/\/id.gs1.org\/8006\/(\d{18})$', uri) or
-        match(r'https:\/\/id.gs1.org\/8010\/([\x23\x2D\x2F\x30-\x39\x41-\x5A]{0,30})\/8011/(\d{0,12})$', uri) or
-        match(r'https:\/\/id.gs1.org\/8010\/([\x23\x2D\x2F\x30-\x39\x41-\x5A]{0,30})$', uri) or
-        match(r'https:\/\/id.gs1.org\/8017\/(\d{18})$', uri) or
-        match(r'https:\/\/id.gs1.org\/8018\/(\d{18})$', uri)
-    ) is not None:  # noqa E124
-        return uri
+    for pattern in _DL_OUTPUT_PATTERNS:
+        if pattern.match(uri) is not None:
+            return uri
     return None
+
+
+def normaliser(uri):
+    """Function converts any standard URI conveying a GS1 Key in Canonical GS1 DL URI.
+
+    Function 'normaliser' expects any URI to be used in EPCIS events
+    that convey a GS1 key, i.e. EPC URIs, EPC Class URIs,
+    EPC ID Pattern URIs, or GS1 Digital Link URIs.
+    It returns a corresponding, constrained version of a
+    canonical GS1 Digital Link URI, i.e. with
+    the lowest level of identification and without CPV/query string.
+
+    Parameters
+    ----------
+    uri : str
+        Valid EPC URI, EPC Pattern URI, EPC Class URI, GS1 Digital Link URI.
+
+    Returns
+    -------
+    str
+        Constrained, canonicalised GS1 Digital Link URI equivalent.
+    None
+    """
+
+    if not isinstance(uri, str):
+        logging.warning("dl normaliser called with non-string argument")
+        return None
+
+    if '.' not in uri:
+        logging.debug("No '.' in %s. Not a normalisable uri.", uri)
+        return None
+
+    if uri.startswith('urn:epc:'):
+        key = parse_epc_uri(uri)
+        if key is None:
+            return None
+        return epc_key_to_dl(key)
+
+    if uri.startswith('http'):
+        return _dl_uri_normaliser(uri)
+
+    return None
+
+
+def normalise_many(uris, as_mapping=False):
+    """Function converts many URIs at once, normalising every distinct URI only once.
+
+    Parameters
+    ----------
+    uris : iterable of str
+        URIs as accepted by 'normaliser'. Duplicates are converted only once.
+    as_mapping : bool
+        Return a mapping instead of a list.
+
+    Returns
+    -------
+    list
+        Results of 'normaliser' for each of the uris, in input order.
+    dict
+        If as_mapping is set: Mapping of each distinct URI to the result of 'normaliser'.
+    """
+
+    uris = list(uris)
+    converted = dict.fromkeys(uris)
+    epc_keys = {}
+    for uri in converted:
+        if isinstance(uri, str) and uri.startswith('urn:epc:'):
+            key = parse_epc_uri(uri)
+            if key is not None:
+                epc_keys[uri] = _DL_PARTS[key.scheme](key)
+        else:
+            converted[uri] = normaliser(uri)
+
+    # check digits of all EPCs are computed in one go
+    raw_keys = [parts[1] for parts in epc_keys.values() if parts[1] is not None]
+    checkdigits = iter(check_digits(raw_keys))
+    for uri, (before, raw_key, after) in epc_keys.items():
+        if raw_key is None:
+            converted[uri] = before + after
+        else:
+            converted[uri] = before + raw_key + str(next(checkdigits)) + after
+
+    if as_mapping:
+        return converted
+    return [converted[uri] for uri in uris]
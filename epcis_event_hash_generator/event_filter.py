@@ -0,0 +1,101 @@
+"""Predicates selecting the events to be hashed, e.g. to reconcile the events of one type, business step or time
+window with a partner.
+
+A predicate is called with an event in its raw form, i.e. the (name, value, children) tuple produced by the XML or
+JSON conversion, before any canonicalisation. It returns whether the event is to be hashed, see
+hash_generator.EventHasher. EventFilter covers the common cases.
+
+.. module:: event_filter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms given in the LICENSE file.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the LICENSE
+file for details.
+
+"""
+
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+from epcis_event_hash_generator.hash_generator import canonical_time_stamp
+
+_BIZ_STEP_PREFIXES = ("urn:epcglobal:cbv:bizstep:", "https://ref.gs1.org/cbv/BizStep-")
+"""Prefixes of the CBV business steps, left out when comparing business steps."""
+
+
+def _biz_step_key(biz_step):
+    """Reduce a CBV business step given as bare word, URN or web vocabulary URI to the bare word.
+    Other business steps are left as they are.
+    """
+    biz_step = biz_step.strip()
+    for prefix in _BIZ_STEP_PREFIXES:
+        if biz_step.startswith(prefix):
+            return biz_step[len(prefix):]
+    return biz_step
+
+
+def _value_of(event, name):
+    """Return the value of the first child of event named name or None if there is none."""
+    for child in event[2]:
+        if child[0] == name and isinstance(child[1], str):
+            return child[1]
+    return None
+
+
+class EventFilter:
+    """Select events by type, business step and event time. Events have to meet all given criteria.
+
+    `event_types`   Event types (e.g. ObjectEvent), one of which the event has to be of.
+    `biz_steps`     Business steps, one of which the event has to have. CBV business steps match whether given as bare
+                    word (e.g. shipping), URN or web vocabulary URI.
+    `since`         Earliest event time (inclusive) as ISO 8601 dateTime. Times without time zone are taken as local.
+    `until`         Event time (exclusive) before which the event has to have happened.
+
+    Events lacking a criterion's property, e.g. without bizStep when filtering by business step, or whose event time
+    cannot be parsed are not selected. Instances can be passed to worker processes.
+    """
+
+    def __init__(self, event_types=(), biz_steps=(), since=None, until=None):
+        self.event_types = frozenset(event_types)
+        self.biz_steps = frozenset(_biz_step_key(biz_step) for biz_step in biz_steps)
+        self.since = self._bound(since)
+        self.until = self._bound(until)
+
+    @staticmethod
+    def _bound(timestamp):
+        if timestamp is None:
+            return None
+        canonical = canonical_time_stamp(timestamp)
+        if canonical is None:
+            raise ValueError("'{}' is not an ISO 8601 dateTime".format(timestamp))
+        return canonical
+
+    def __call__(self, event):
+        """Whether the event in its raw form meets all criteria."""
+        try:
+            if self.event_types and event[0] not in self.event_types:
+                return False
+            if self.biz_steps:
+                biz_step = _value_of(event, "bizStep")
+                if biz_step is None or _biz_step_key(biz_step) not in self.biz_steps:
+                    return False
+            if self.since is not None or self.until is not None:
+                return self._in_time_window(_value_of(event, "eventTime"))
+        except (IndexError, TypeError):
+            return False
+        return True
+
+    def _in_time_window(self, event_time):
+        event_time = canonical_time_stamp(event_time) if event_time is not None else None
+        if event_time is None:
+            return False
+        return (self.since is None or self.since <= event_time) and (self.until is None or event_time < self.until)
+
+    def __repr__(self):
+        return "EventFilter(event_types={}, biz_steps={}, since={}, until={})".format(
+            sorted(self.event_types), sorted(self.biz_steps), self.since, self.until)
@@ -25,13 +25,14 @@ except ImportError:
 
 from epcis_event_hash_generator import json_to_py
 from epcis_event_hash_generator import xml_to_py
+from epcis_event_hash_generator import metrics
 
 
 def _event_list_from_epcis_document_xml(path):
     """Read EPCIS XML document and generate the event List in the form of a simple python object
 
     """
-    with open(path, 'r') as file:
+    with metrics.stage("read"), open(path, 'r') as file:
         data = file.read()
 
     return xml_to_py.event_list_from_epcis_document_str(data)
@@ -41,7 +42,7 @@ def _event_list_from_epcis_document_json(path):
     """Read EPCIS JSON document and generate the event List in the form of a simple python object
 
     """
-    with open(path, 'r') as file:
+    with metrics.stage("read"), open(path, 'r') as file:
         data = file.read()
 
     return json_to_py.event_list_from_epcis_document_str(data)
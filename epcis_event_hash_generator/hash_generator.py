@@ -18,10 +18,14 @@ file for details.
 """
 
 import datetime
+import functools
 import hashlib
-import copy
+import itertools
 import logging
+import re
 import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import dateutil.parser
 
@@ -30,11 +34,29 @@ try:  # import syntax differs depending on whether this is run as a module or as
 except ImportError:
     from context import epcis_event_hash_generator  # noqa: F401
 
-from epcis_event_hash_generator.dl_normaliser import normaliser as dl_normaliser
-from epcis_event_hash_generator import PROP_ORDER
+from epcis_event_hash_generator.dl_normaliser import normaliser as dl_normaliser, normalise_many
+from epcis_event_hash_generator.lru_cache import LRUCache, DEFAULT_MAXSIZE
+from epcis_event_hash_generator.prehash_plan import plan_for_event
+from epcis_event_hash_generator import metrics
 from epcis_event_hash_generator import JOIN_BY as DEFAULT_JOIN_BY
 
-JOIN_BY = DEFAULT_JOIN_BY
+EPC_LIST_NAMES = ["epcList", "inputEPCList", "outputEPCList", "childEPCs"]
+QUANTITY_LIST_NAMES = ["quantityList", "childQuantityList", "inputQuantityList", "outputQuantityList"]
+
+_TIMESTAMP = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})(?:\.([0-9]+))?"
+                        r"(Z|[+-][0-9]{2}:[0-9]{2})")
+"""The XSD dateTime form used by EPCIS: fractional seconds of any length and a time zone of either 'Z' or +-hh:mm."""
+
+TIMESTAMP_CACHE_SIZE = 4096
+"""Default number of canonical timestamps memoized by an EventHasher. Sensor reports repeat timestamps a lot."""
+
+DUPLICATE_CACHE_SIZE = 4096
+"""Default number of distinct events whose results are kept per event list, once the reuse of the results of identical
+events is enabled, see enable_duplicate_reuse. Retransmitted capture batches repeat the same events."""
+
+PARALLEL_CHUNK_SIZE = 1000
+"""Default number of events processed at once by a worker process, see EventHasher.
+Event lists of at most this many events are always processed serially."""
 
 
 def _fix_time_stamp_format(timestamp):
@@ -42,6 +64,50 @@ def _fix_time_stamp_format(timestamp):
     and in UTC."""
     logging.debug("correcting timestamp format for '{}'".format(timestamp))
 
+    fixed = _fast_fix_time_stamp_format(timestamp)
+    if fixed is None:
+        fixed = _parse_fix_time_stamp_format(timestamp)
+
+    logging.debug("corrected timestamp '{}'".format(fixed))
+    return fixed
+
+
+def _fast_fix_time_stamp_format(timestamp):
+    """Canonize timestamps in the usual EPCIS form (see _TIMESTAMP) without the general purpose parser.
+    Returns None for any other form and for values the general parser handles specially
+    (invalid dates, rounding up to the next second, out of range after conversion to UTC).
+    """
+    match = _TIMESTAMP.fullmatch(timestamp)
+    if match is None:
+        return None
+    (year, month, day, hour, minute, second, fraction, offset) = match.groups()
+
+    # like dateutil, ignore digits beyond microseconds, then round off to milliseconds (ties to even)
+    microsecond = round(int(fraction[:6].ljust(6, "0")), -3) if fraction else 0
+    if microsecond > 999000:
+        return None
+
+    if offset == "Z":
+        tz = datetime.timezone.utc
+    else:
+        (hours, minutes) = (int(offset[1:3]), int(offset[4:6]))
+        if hours > 23 or minutes > 59:
+            return None
+        delta = datetime.timedelta(hours=hours, minutes=minutes)
+        tz = datetime.timezone(-delta if offset[0] == "-" else delta)
+
+    try:
+        utc = datetime.datetime(int(year), int(month), int(day), int(hour), int(minute), int(second), microsecond,
+                                tz).astimezone(datetime.timezone.utc)
+    except (ValueError, OverflowError):
+        return None
+
+    return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}.{:03d}Z".format(
+        utc.year, utc.month, utc.day, utc.hour, utc.minute, utc.second, utc.microsecond // 1000)
+
+
+def _parse_fix_time_stamp_format(timestamp):
+    """Canonize the timestamp using the general purpose dateutil parser."""
     try:
         abstract_date_time = dateutil.parser.parse(timestamp)
     except ValueError:
@@ -57,123 +123,285 @@ def _fix_time_stamp_format(timestamp):
     abstract_date_time = abstract_date_time.replace(microsecond=round(microsecond, -3))
 
     # normalise precision to ms and convert to ISO string using "Z" instead of +00:00
-    fixed = abstract_date_time.isoformat(timespec='milliseconds')[:-6] + "Z"
+    return abstract_date_time.isoformat(timespec='milliseconds')[:-6] + "Z"
 
-    logging.debug("corrected timestamp '{}'".format(fixed))
-    return fixed
 
+_CANONICAL_TIME_STAMP = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}\.[0-9]{3}Z")
+"""Form of the canonical timestamps, which compare like the points in time they denote."""
 
-def _child_to_pre_hash_string(child, sub_child_order):
-    logging.debug("Processing '%s'", child)
-    text = ""
-    grand_child_text = ""
-    if sub_child_order:
-        grand_child_text = _recurse_through_children_in_order(child[2], sub_child_order)
-    if child[1]:
-        text = child[1].strip()
-        if child[0].lower().find("time") >= 0 and child[0].lower().find("offset") < 0:
-            text = _fix_time_stamp_format(text)
-        else:
-            text = _canonize_value(text)
 
-        if text:
-            text = "=" + text
+def canonical_time_stamp(timestamp):
+    """Return the canonical form of an ISO 8601 dateTime as added to the pre hash string, i.e. in UTC at millisecond
+    precision (e.g. 2020-03-04T10:00:30.000Z), or None if it cannot be parsed.
+    Canonical timestamps compare (as strings) like the points in time they denote.
+    """
+    try:
+        canonical = _fix_time_stamp_format(timestamp.strip())
+    except (ValueError, OverflowError):
+        return None
+    return canonical if _CANONICAL_TIME_STAMP.fullmatch(canonical) else None
+
+
+_CBV_URN = "urn:epcglobal:cbv:"
+
+_CBV_WEB_VOCABULARY = {
+    "bizstep": "https://ref.gs1.org/cbv/BizStep-",
+    "disp": "https://ref.gs1.org/cbv/Disp-",
+    "btt": "https://ref.gs1.org/cbv/BTT-",
+    "sdt": "https://ref.gs1.org/cbv/SDT-",
+    "er": "https://ref.gs1.org/cbv/ER-",
+}
+"""Web vocabulary prefix replacing the 'urn:epcglobal:cbv:<type>:' prefix of CBV URNs, by type.
+See _try_format_web_vocabulary."""
+
+_NUMERIC_START = frozenset("0123456789+-.iInN")
+"""Characters a value accepted by float may start with, apart from unicode digits and white space."""
+
+_CBV_VALUE = "cbv"
+_URI_VALUE = "uri"
+_NUMERIC_VALUE = "numeric"
+_OTHER_VALUE = "other"
+_MIXED_VALUE = "mixed"
+
+
+def _classify_value(text):
+    """Tell by a look at the leading characters which of the canonizations can change the value:
+
+    `_CBV_VALUE`        CBV URN, replaced by its web vocabulary equivalent (see _cbv_web_vocabulary).
+    `_URI_VALUE`        EPC URN or URI, passed to the dl_normaliser.
+    `_NUMERIC_VALUE`    Possibly a number, see _try_format_numeric.
+    `_OTHER_VALUE`      None of them, the value is left untouched.
+    `_MIXED_VALUE`      Containing a CBV URN elsewhere, run through all canonizations in turn.
+    """
+    if _CBV_URN in text:
+        return _CBV_VALUE if text.startswith(_CBV_URN) else _MIXED_VALUE
+    if text.startswith("urn:epc:") or text.startswith("http"):
+        return _URI_VALUE
+    first = text[:1]
+    if first in _NUMERIC_START or first.isdecimal() or first.isspace():
+        return _NUMERIC_VALUE
+    return _OTHER_VALUE
+
+
+def _cbv_web_vocabulary(text):
+    """Look up the web vocabulary equivalent of a CBV URN.
+    Returns None if the URN is of an unknown type or if its remainder might be changed by the other canonizations,
+    i.e. contains another CBV URN or any of the characters giving meaning to a (GS1 Digital Link) URI.
+    """
+    separator = text.find(":", len(_CBV_URN))
+    prefix = _CBV_WEB_VOCABULARY.get(text[len(_CBV_URN):separator]) if separator > 0 else None
+    if prefix is None:
+        return None
+    remainder = text[separator + 1:]
+    if "/" in remainder or "#" in remainder or "?" in remainder or "\n" in remainder or _CBV_URN in remainder:
+        return None
+    return prefix + remainder
+
+
+def _canonize_value_uncached(text, hook=None):
+    """Run a value through the format canonizations applying to it, see _classify_value.
+    The normaliser call is reported to the MetricsHook if given.
+    """
+    kind = _classify_value(text)
+    if kind is _CBV_VALUE:
+        converted = _cbv_web_vocabulary(text)
+        if converted is not None:
+            logging.debug("Converted %s to %s", text, converted)
+            return converted
+        kind = _MIXED_VALUE
+
+    if kind is _NUMERIC_VALUE:
+        text = _try_format_numeric(text)
+    elif kind is _MIXED_VALUE:
+        text = _try_format_numeric(_try_format_web_vocabulary(text))
+    if kind is _NUMERIC_VALUE or kind is _OTHER_VALUE:
+        logging.debug("No canonical form for '%s'", text)
+        return text
+
+    converted = dl_normaliser(text) if hook is None else metrics.timed(hook, "normaliser", dl_normaliser, text)
+    if converted:
+        logging.debug("Converted %s to %s", text, converted)
+        return converted
+    logging.debug("No canonical form for '%s'", text)
+    return text
+
 
-    if text or grand_child_text:
-        re = child[0] + text + grand_child_text
-        logging.debug("pre hash string element: '%s'", text)
-        return re
+def _canonize_values(texts, hook=None):
+    """Canonize many values at once, each distinct value only once.
+    Returns a dict mapping the values to their canonical form.
+    Values whose canonization fails are left out, so that the error surfaces for the event containing them.
+    The URIs are normalised in bulk, which is reported to the MetricsHook if given.
+    """
+    canonical = {}
+    uris = []
+    for text in dict.fromkeys(texts):
+        if _classify_value(text) is _URI_VALUE:
+            uris.append(text)
+            continue
+        try:
+            canonical[text] = _canonize_value_uncached(text, hook)
+        except Exception:
+            logging.debug("Could not canonize '%s' in bulk", text)
 
-    return ""
+    converted = metrics.timed(hook, "normaliser", normalise_many, uris, as_mapping=True)
+    for text in uris:
+        canonical[text] = converted[text] or text
+    return canonical
 
 
-def _recurse_through_children_in_order(child_list, child_order):
+def _canonize_timestamps(timestamps):
+    """Canonize many timestamps at once, each distinct one only once.
+    Returns a dict mapping the timestamps to their canonical form, leaving out those whose canonization fails.
     """
-    Loop over child order, look for a child of root with matching key and build the pre-hash string (mostly key=value)
-    Recurse through the grand children applying the sub order.
-    All elements added to the returned pre hash string are removed from the tree below the root.
-    After the recursion completes, only elements NOT added to the pre-hash string are left in the tree.
+    canonical = {}
+    for timestamp in dict.fromkeys(timestamps):
+        try:
+            canonical[timestamp] = _fix_time_stamp_format(timestamp)
+        except Exception:
+            logging.debug("Could not canonize timestamp '%s' in bulk", timestamp)
+    return canonical
 
-    `child_list`    is to be a list of simple python object, i.e. triples of two strings (key/value) and a list of
-                    simple python objects (grand children).
-    `child_order`   is expected to be a property order, see PROP_ORDER.
 
+def _gather_epc_values(events):
+    """Yield the (stripped) values of all EPCs in EPC lists and of all EPC classes in quantity lists of the events."""
+    for event in events:
+        values = []
+        try:
+            for child in event[2]:
+                if child[0] in EPC_LIST_NAMES:
+                    values += [epc[1].strip() for epc in child[2] if epc[0] == "epc" and epc[1]]
+                elif child[0] in QUANTITY_LIST_NAMES:
+                    for quantity_element in child[2]:
+                        if quantity_element[0] == "quantityElement":
+                            values += [prop[1].strip() for prop in quantity_element[2]
+                                       if prop[0] == "epcClass" and prop[1]]
+        except (IndexError, TypeError, AttributeError):
+            logging.debug("Skipping malformed event when gathering EPC values: %s", event)
+            continue
+        yield from values
+
+
+def _gather_columns(events):
+    """Gather the (stripped) values of all elements of the events in a single walk, split into two columns:
+    the timestamps, i.e. the values of elements labelled as time by the property order, and all other values.
+    Returns both columns as dicts with the distinct values as keys, in order of their first occurrence.
     """
-    pre_hash = ""
-    logging.debug("Calculating pre hash for child list %s \nWith order %s", child_list, child_order)
-
-    user_extensions = _gather_user_extensions(child_list)
+    values = {}
+    timestamps = {}
+    for event in events:
+        try:
+            _gather_column_values(event[2], plan_for_event(event), values, timestamps)
+        except (IndexError, TypeError, AttributeError):
+            logging.debug("Skipping malformed event when gathering values: %s", event)
+    return values, timestamps
 
-    for (child_name, sub_child_order) in child_order:
-        children = [x for x in child_list if x[0] == child_name]  # elements with the same name
-        list_of_values = []
 
-        for child in children:
-            child_pre_hash = _child_to_pre_hash_string(child, sub_child_order)
-            if child_pre_hash:
-                list_of_values.append(child_pre_hash)
+def _gather_column_values(children, plan, values, timestamps):
+    """Add the values of the children and of all their descendants to the columns, see _gather_columns.
+    plan is the PrehashPlan of the children or None if they are not covered by the property order.
+    """
+    for child in children:
+        name = child[0]
+        if not isinstance(name, str):  # (type, value) pair of bizTransaction, source and destination
+            _gather_column_values(child, None, values, timestamps)
+            continue
+        entry = plan.by_name.get(name) if plan is not None else None
+        if child[1]:
+            if entry is not None and entry.is_time:
+                timestamps[child[1].strip()] = None
             else:
-                logging.debug("Empty element ignored: %s", child)
-
-            if len(child[2]) == 0:
-                logging.debug("Finished processing %s", child)
-                child_list.remove(child)
-
-        # sort list of values to fix #10
-        list_of_values.sort()
+                values[child[1].strip()] = None
+        if child[2]:
+            _gather_column_values(child[2], entry.sub_plan if entry is not None else None, values, timestamps)
 
-        if "".join(list_of_values):  # fixes #16
-            if pre_hash:
-                list_of_values.insert(0, pre_hash)  # yields correct Joining behavior
-            pre_hash = JOIN_BY.join(list_of_values)
 
-    if len(user_extensions) > 0:
-        user_extensions_prehash = _generic_child_list_to_prehash_string(user_extensions)
-        pre_hash = pre_hash + JOIN_BY + user_extensions_prehash
+def _canonize_columns(events, hook=None):
+    """Canonize the values and the timestamps of the events column by column, see _gather_columns.
+    Returns two dicts mapping the values and the timestamps to their canonical form, see _canonize_values.
+    """
+    (values, timestamps) = _gather_columns(events)
+    return _canonize_values(values, hook), _canonize_timestamps(timestamps)
 
-    logging.debug("child list pre hash is %s", pre_hash)
 
-    return pre_hash
+FINGERPRINT_FLUSH_SIZE = 4096
+"""Number of parts collected by _fingerprint before they are fed to the digest."""
 
 
-def _canonize_value(text):
-    """Run a value through all format canonizations"""
-    text = _try_format_web_vocabulary(text)
-    text = _try_format_numeric(text)
-    converted = dl_normaliser(text)
-    if converted:
-        logging.debug("Converted %s to %s", text, converted)
-        return converted
-    logging.debug("No canonical form for '%s'", text)
-    return text
+def _fingerprint(event):
+    """Fixed size digest of the event tree, equal for equal events.
+    The tree is walked once, feeding its strings (each prefixed by its length) and the boundaries of its tuples and
+    lists to a blake2b digest in batches, so that neither the tree nor its strings are kept alive by the digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    parts = []
+    _feed_fingerprint(event, parts, digest)
+    digest.update("".join(parts).encode("utf-8", "surrogatepass"))
+    return digest.digest()
+
+
+def _feed_fingerprint(node, parts, digest):
+    """Append the parts of the node (see _fingerprint) to parts, feeding them to the digest once there are many."""
+    if isinstance(node, (tuple, list)):
+        parts.append("(")
+        for child in node:
+            if isinstance(child, str):
+                parts += (str(len(child)), ":", child)
+            elif type(child) is tuple and len(child) == 3 and child[2] == [] and type(child[0]) is str \
+                    and type(child[1]) is str:  # leaf, the same parts as by recursion
+                parts += ("(", str(len(child[0])), ":", child[0], str(len(child[1])), ":", child[1], "())")
+            else:
+                _feed_fingerprint(child, parts, digest)
+        parts.append(")")
+        if len(parts) > FINGERPRINT_FLUSH_SIZE:
+            digest.update("".join(parts).encode("utf-8", "surrogatepass"))
+            parts.clear()
+    elif isinstance(node, str):
+        parts += (str(len(node)), ":", node)
+    else:  # e.g. None instead of a child list
+        text = repr(node)
+        parts += ("!", str(len(text)), ":", text)
+
+
+def _group_by_name(child_list):
+    """Index the children by name in a single pass.
+    Returns a dict mapping each name to the (ascending) positions of the children with that name in child_list.
+    Children without a string name, like the (type, value) pairs of bizTransaction, source and destination,
+    are left out since no property order refers to them.
+    """
+    buckets = {}
+    for (i, child) in enumerate(child_list):
+        if isinstance(child[0], str):
+            buckets.setdefault(child[0], []).append(i)
+    return buckets
 
 
 def _gather_user_extensions(child_list):
     """
     Collect user extensions enclosed in child like sensorElementList, readPoint, etc.
-    So that user extensions can be appended to its enclosing element only
+    So that user extensions can be appended to its enclosing element only.
+    Returns the user extensions and the other children, which is child_list itself if there are no user extensions.
+    The children are classified in a single pass.
     """
-    user_extensions = []
-
     if len(child_list) <= 1:
-        return user_extensions
+        return [], child_list
 
-    # ignore top level user extensions
+    user_extensions = []
+    others = []
     for child in child_list:
-        if 'eventTime' in child[0] or 'action' in child[0]:
-            return user_extensions
+        name = child[0]
+        # ignore top level user extensions
+        if 'eventTime' in name or 'action' in name:
+            return [], child_list
 
-    # collect user extensions in a separate list
-    for x in child_list:
-        if isinstance(x, tuple) and ('{' in x[0] and '/}' in x[0]):
-            user_extensions.append(x)
+        if isinstance(child, tuple) and '{' in name and '/}' in name:
+            user_extensions.append(child)
+        else:
+            others.append(child)
 
-    # remove user extensions from original list
-    if user_extensions:
-        for element_to_remove in user_extensions:
-            child_list.remove(element_to_remove)
+    if not user_extensions:
+        return user_extensions, child_list
 
-    return user_extensions
+    return user_extensions, others
 
 
 def _try_format_web_vocabulary(text):
@@ -201,24 +429,15 @@ def _try_format_numeric(text):
     return text
 
 
-def _generic_child_list_to_prehash_string(children):
-    list_of_values = []
+def _interleave(values, join_by):
+    """Return the list of values with join_by between each two of them (the list itself if join_by is empty)."""
+    if not join_by or not values:
+        return values
 
-    logging.debug("Parsing remaining elements in: %s", children)
-
-    for child in children:
-        if isinstance(child, tuple) and len(child) == 2 and isinstance(child[0], tuple):
-            list_of_values.append(_generic_child_list_to_prehash_string(child))
-        else:
-            text = child[1].strip()
-            if text:
-                text = _canonize_value(text)
-                text = "=" + text
-            list_of_values.append(child[0] + text + _generic_child_list_to_prehash_string(child[2]))
-
-    if len(children) > 1 and should_sort(children):
-        list_of_values.sort()
-    return JOIN_BY.join(list_of_values)
+    fragments = [values[0]]
+    for value in values[1:]:
+        fragments += (join_by, value)
+    return fragments
 
 
 def should_sort(children):
@@ -233,79 +452,769 @@ def should_sort(children):
     return True
 
 
-def _gather_elements_not_in_order(children, child_order):
-    """
-    Collects vendor extensions not covered by the defined child order. Consumes the root.
-    """
+HashAlgorithm = namedtuple("HashAlgorithm", ["ni_name", "constructor"])
+"""A hashing algorithm: its name in the Named Information Hash Algorithm Registry and a hashlib style constructor."""
 
-    # remove fields that are to be ignored in the hash:
-    # remove all elements from XML tree which do shouldn't take part in hash calculation
-    to_be_ignored = ["recordTime", "eventID", "type", "errorDeclaration"]
-    children = [child for child in children if child[0] not in to_be_ignored]
-    if children:
-        return _generic_child_list_to_prehash_string(children)
+HASH_ALGORITHMS = {
+    "sha256": HashAlgorithm("sha-256", hashlib.sha256),
+    "sha3-256": HashAlgorithm("sha3-256", hashlib.sha3_256),
+    "sha384": HashAlgorithm("sha-384", hashlib.sha384),
+    "sha512": HashAlgorithm("sha-512", hashlib.sha512),
+    "blake2b-256": HashAlgorithm("blake2b-256", functools.partial(hashlib.blake2b, digest_size=32)),
+    "blake2b-512": HashAlgorithm("blake2b-512", hashlib.blake2b),
+}
+"""Registry of the supported hashing algorithms by name, see register_hash_algorithm."""
 
-    return ""
+HASH_THREADING_THRESHOLD = 1 << 20
+"""Pre hash strings of at least this many bytes are hashed by all requested algorithms in parallel threads.
+hashlib releases the GIL while hashing large buffers. When hashing incrementally, this many bytes are fed to the
+hash objects in parallel at a time."""
 
 
-def derive_prehashes_from_events(events, join_by=DEFAULT_JOIN_BY):
-    """
-    Compute a normalized form (pre-hash string) for each event.
-    This is the main functionality of the hash generator.
+HASH_CHUNK_SIZE = 1 << 16
+"""Number of characters of pre hash fragments encoded and fed to the hash objects at once when hashing
+incrementally, see calculate_hash_from_fragments."""
+
+
+def register_hash_algorithm(name, ni_name, constructor):
+    """Make a hashing algorithm available under the given name, e.g.
+    register_hash_algorithm("sha512-256", "sha-512-256", functools.partial(hashlib.new, "sha512_256"))
+    `constructor` is called with the encoded pre hash string or without arguments (to be fed via update) and must
+    return an object with the update and hexdigest methods like those of hashlib.
     """
+    HASH_ALGORITHMS[name] = HashAlgorithm(ni_name, constructor)
 
-    events = copy.deepcopy(events)  # do not change parameter!
 
-    global JOIN_BY
-    join_by = join_by.replace(r"\n", "\n").replace(r"\t", "\t")
-    logging.debug("Setting JOIN_BY='%s'", join_by)
-    JOIN_BY = join_by
+def _hash_algorithms(hashalgs):
+    """Look up the algorithms by name in the registry."""
+    algorithms = []
+    for hashalg in hashalgs:
+        if hashalg not in HASH_ALGORITHMS:
+            raise ValueError("Unsupported Hashing Algorithm: " + hashalg)
+        algorithms.append(HASH_ALGORITHMS[hashalg])
+    return algorithms
 
-    logging.info("#events = %s", len(events[2]))
-    for i in range(len(events[2])):
-        logging.info("%s: %s\n", i, events[2][i])
 
-    prehash_string_list = []
-    for event in events[2]:
-        logging.debug("prehashing event:\n%s", event)
-        try:
-            prehash_string_list.append("eventType=" + event[0] + JOIN_BY
-                                       + _recurse_through_children_in_order(event[2], PROP_ORDER) + JOIN_BY
-                                       + _gather_elements_not_in_order(event[2], PROP_ORDER)
-                                       )
-        except Exception as ex:
-            logging.error("could not parse event:\n%s\n\nerror: %s", event, ex)
-            logging.debug("".join(traceback.format_tb(ex.__traceback__)))
-            pass
+def _ni_format(algorithms, digests):
+    return ['ni:///' + algorithm.ni_name + ';' + digest + '?ver=CBV2.0'
+            for (algorithm, digest) in zip(algorithms, digests)]
+
+
+def _ni_hashes(pre_hash_string, hashalgs):
+    """Hash the string with each of the algorithms, encoding it only once. Returns the list of hashes in NI format."""
+    algorithms = _hash_algorithms(hashalgs)
+
+    data = pre_hash_string.encode('utf-8')
+    if len(algorithms) > 1 and len(data) >= HASH_THREADING_THRESHOLD:
+        with ThreadPoolExecutor(max_workers=len(algorithms)) as executor:
+            digests = list(executor.map(lambda algorithm: algorithm.constructor(data).hexdigest(), algorithms))
+    else:
+        digests = [algorithm.constructor(data).hexdigest() for algorithm in algorithms]
+
+    return _ni_format(algorithms, digests)
+
+
+def _encoded_chunks(fragments):
+    """Concatenate the fragments to chunks of about HASH_CHUNK_SIZE characters and yield them UTF-8 encoded."""
+    chunk = []
+    size = 0
+    for fragment in fragments:
+        chunk.append(fragment)
+        size += len(fragment)
+        if size >= HASH_CHUNK_SIZE:
+            yield "".join(chunk).encode('utf-8')
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk).encode('utf-8')
+
+
+def _update_in_threads(hash_objects, chunks):
+    """Feed the encoded chunks to each of several hash objects, gathering them to batches of HASH_THREADING_THRESHOLD
+    bytes, each fed to all hash objects in parallel threads. A remainder below the threshold is fed in this thread.
+    """
+    def update(hash_object):
+        for data in batch:
+            hash_object.update(data)
+
+    executor = None
+    batch = []
+    size = 0
+    try:
+        for data in chunks:
+            batch.append(data)
+            size += len(data)
+            if size >= HASH_THREADING_THRESHOLD:
+                if executor is None:
+                    executor = ThreadPoolExecutor(max_workers=len(hash_objects))
+                list(executor.map(update, hash_objects))
+                batch = []
+                size = 0
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    for hash_object in hash_objects:
+        update(hash_object)
+
+
+def calculate_hash_from_pre_hash(pre_hash_string, hashalg="sha256"):
+    """Hash the string with the given algorithm. Returned in the appropriate NI format.
+    If hashalg is a list of algorithm names instead of a single one, the list of the respective hashes is returned.
+    """
+    if isinstance(hashalg, str):
+        return _ni_hashes(pre_hash_string, [hashalg])[0]
+    return _ni_hashes(pre_hash_string, hashalg)
 
-    # To see/check concatenated value string before hash algorithm is performed:
-    logging.debug("prehash_string_list = {}".format(prehash_string_list))
-    return prehash_string_list
+
+def calculate_hash_from_fragments(fragments, hashalg="sha256"):
+    """Hash the concatenation of the pre hash fragments (see EventHasher.prehash_fragments) without building the pre
+    hash string. The fragments are fed to the hash objects chunk by chunk. Otherwise like calculate_hash_from_pre_hash.
+    """
+    algorithms = _hash_algorithms([hashalg] if isinstance(hashalg, str) else hashalg)
+    hash_objects = [algorithm.constructor() for algorithm in algorithms]
+    if len(hash_objects) > 1:
+        _update_in_threads(hash_objects, _encoded_chunks(fragments))
+    else:
+        for data in _encoded_chunks(fragments):
+            hash_objects[0].update(data)
+
+    hashes = _ni_format(algorithms, [hash_object.hexdigest() for hash_object in hash_objects])
+    return hashes[0] if isinstance(hashalg, str) else hashes
 
 
 def calculate_hashes_from_pre_hashes(prehash_string_list, hashalg="sha256"):
     """Hash all strings in the list with the given algorithm. Returned in the appropriate NI format.
+    If hashalg is a list of algorithm names, each element of the result is the list of the respective hashes.
+    """
+    return [calculate_hash_from_pre_hash(pre_hash_string, hashalg) for pre_hash_string in prehash_string_list]
+
+
+class EventHasher:
+    """Calculate pre hash strings and hashes of EPCIS events with a fixed configuration.
+
+    `join_by`               String joining the parts of the pre hash string, see JOIN_BY.
+                            Escaped newlines and tabs ('\\n', '\\t') are replaced by the actual characters.
+    `hashalg`               Name of the hashing algorithm used by hashes or a list of names,
+                            see calculate_hashes_from_pre_hashes.
+    `value_cache_size`      If positive, memoize up to this many canonical values in an LRUCache.
+    `timestamp_cache_size`  If positive, memoize up to this many canonical timestamps in an LRUCache.
+    `workers`               If greater than one, event lists with more than chunk_size events are split into chunks
+                            of chunk_size events, processed by this many worker processes.
+    `chunk_size`            Number of events per chunk. Each worker process has its own caches.
+    `keep_prehashes`        Whether iter_hashes builds and yields the pre hash strings. If not set (the default), the
+                            pre hash fragments are fed to the hash objects directly, see calculate_hash_from_fragments.
+    `hook`                  metrics.MetricsHook receiving the duration of the prehash, hashing, canonicalisation,
+                            normaliser and timestamp stages. None (the default) disables the measurements.
+    `duplicate_cache_size`  If positive, keep the results of up to this many distinct events per event list in an
+                            LRUCache and reuse them for identical events (same fingerprint) later in the list.
+                            Only a fixed size digest of each event is kept along with its results.
+                            The number of reused results is counted in reused_events. Disabled by default, as
+                            fingerprinting costs a few percent of the prehash time of events which do not repeat.
+    `columnar`              Whether to canonize the values of an event list column by column before building any
+                            pre hash string, see _precompute_columns. By default, only the EPC values are
+                            canonized up front, see _precompute_epc_values.
+    `event_filter`          If given, only the events for which this predicate, called with the raw event, returns
+                            True are processed, e.g. an event_filter.EventFilter. The others are skipped before any
+                            canonicalisation, the results keep the index of each event in the event list. To be used
+                            with worker processes, the predicate has to be picklable.
+
+    All state, i.e. the configuration and the caches, is held by the instance. The compiled property order
+    and the other tables are shared read-only, so that separate instances can be used in parallel threads.
+    An instance itself is not to be used by several threads at the same time.
     """
-    hashValueList = []
-    for pre_hash_string in prehash_string_list:
-        if hashalg == 'sha256':
-            hash_string = 'ni:///sha-256;' + \
-                          hashlib.sha256(pre_hash_string.encode('utf-8')).hexdigest() + '?ver=CBV2.0'
-        elif hashalg == 'sha3-256':
-            hash_string = 'ni:///sha3-256;' + \
-                          hashlib.sha3_256(pre_hash_string.encode('utf-8')).hexdigest() + '?ver=CBV2.0'
-        elif hashalg == 'sha384':
-            hash_string = 'ni:///sha-384;' + \
-                          hashlib.sha384(pre_hash_string.encode('utf-8')).hexdigest() + '?ver=CBV2.0'
-        elif hashalg == 'sha512':
-            hash_string = 'ni:///sha-512;' + \
-                          hashlib.sha512(pre_hash_string.encode('utf-8')).hexdigest() + '?ver=CBV2.0'
+
+    def __init__(self, join_by=DEFAULT_JOIN_BY, hashalg="sha256", value_cache_size=0,
+                 timestamp_cache_size=TIMESTAMP_CACHE_SIZE, workers=1, chunk_size=PARALLEL_CHUNK_SIZE,
+                 keep_prehashes=False, hook=None, duplicate_cache_size=0, columnar=False,
+                 event_filter=None):
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive, got {}".format(chunk_size))
+        self.join_by = join_by.replace(r"\n", "\n").replace(r"\t", "\t")
+        self.hashalg = hashalg
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.keep_prehashes = keep_prehashes
+        self.hook = hook
+        self.duplicate_cache_size = duplicate_cache_size
+        self.columnar = columnar
+        self.event_filter = event_filter
+        self.reused_events = 0
+        self.value_cache = LRUCache(value_cache_size) if value_cache_size > 0 else None
+        self.timestamp_cache = LRUCache(timestamp_cache_size) if timestamp_cache_size > 0 else None
+
+        self._precomputed_values = {}
+        """Canonical forms of the EPCs and EPC classes (or all values, if columnar) of the event list currently
+        being processed, see _precompute. Consulted by _canonize_value before doing any work."""
+        self._precomputed_timestamps = {}
+        """Canonical forms of the timestamps of the event list currently being processed, if columnar.
+        Consulted by _fix_time_stamp_format before doing any work."""
+
+    def prehashes(self, events):
+        """
+        Compute a normalized form (pre-hash string) for each event (selected by the event_filter, if any).
+        This is the main functionality of the hash generator.
+        The events are not modified.
+        """
+        prehash_string_list = [prehash for (_, prehash, _) in self._results(events, True, False)]
+
+        # To see/check concatenated value string before hash algorithm is performed:
+        logging.debug("prehash_string_list = {}".format(prehash_string_list))
+        return prehash_string_list
+
+    def hashes(self, events):
+        """Calculate the list of hashes of the events through their pre hash strings.
+        The pre hash strings are never built, see calculate_hash_from_fragments.
+        """
+        return [hash_value for (_, _, hash_value) in self._results(events, False, True)]
+
+    def prehashes_and_hashes(self, events):
+        """Calculate the pre hash strings of the events and their hashes. Returns both lists."""
+        results = self._results(events, True, True)
+        return [prehash for (_, prehash, _) in results], [hash_value for (_, _, hash_value) in results]
+
+    def iter_prehashes(self, events):
+        """Yield (index, pre hash string) for each event as soon as it is computed,
+        index being the position of the event in the event list.
+        Events which cannot be processed are logged and skipped, i.e. their index is missing.
+
+        In contrast to prehashes, the event list may be any iterable, e.g. a generator, which is consumed lazily.
+        Consequently, EPC values are canonized per event. Worker processes are only used for lists.
+        With the columnar engine, the values of a list of events are canonized before the first event is yielded.
+        """
+        for (index, prehash, _) in self._iter_results(events, True, False):
+            yield index, prehash
+
+    def iter_hashes(self, events):
+        """Yield (index, pre hash string, hash) for each event as soon as it is computed, see iter_prehashes.
+        Unless keep_prehashes is set, the pre hash strings are never built and None is yielded instead.
+        """
+        return self._iter_results(events, self.keep_prehashes, True)
+
+    def prehash(self, event):
+        """Compute the pre hash string of a single event. Raises an exception if the event cannot be processed."""
+        return "".join(self.prehash_fragments(event))
+
+    def prehash_fragments(self, event):
+        """Compute the pre hash string of a single event as list of fragments, which are to be concatenated.
+        Raises an exception if the event cannot be processed.
+        """
+        pre_hash, remaining = self._recurse_through_children_in_order(event[2], plan_for_event(event))
+        fragments = ["eventType=", event[0], self.join_by] + pre_hash + [self.join_by] + \
+            self._gather_elements_not_in_order(remaining)
+        return fragments
+
+    def _results(self, events, with_prehashes, with_hashes):
+        """Return the list of (index, pre hash string or None, hash or None) of all events which can be processed.
+        Uses worker processes if configured, otherwise canonizes the EPC values (or all values, if columnar) of all
+        events in one pass.
+        """
+        if self._in_parallel(events):
+            return list(self._parallel_results(events, with_prehashes, with_hashes))
+
+        logging.debug("Using JOIN_BY='%s'", self.join_by)
+
+        logging.info("#events = %s", len(events[2]))
+        for i in range(len(events[2])):
+            logging.info("%s: %s\n", i, events[2][i])
+
+        reused_events = self.reused_events
+        try:
+            return list(self._precomputed_results(events[2], with_prehashes, with_hashes, True))
+        finally:
+            logging.info("Reused the results of %s identical events", self.reused_events - reused_events)
+
+    def _iter_results(self, events, with_prehashes, with_hashes):
+        """Yield the (index, pre hash string or None, hash or None) of each event as soon as it is computed.
+        Identical events only reuse their results if no pre hash strings are built, which the duplicate cache would
+        otherwise hold on to after they have been yielded.
+        """
+        if self._in_parallel(events):
+            return self._parallel_results(events, with_prehashes, with_hashes)
+
+        logging.debug("Using JOIN_BY='%s'", self.join_by)
+        if self.columnar and isinstance(events[2], list):
+            return self._precomputed_results(events[2], with_prehashes, with_hashes, not with_prehashes)
+        return self._results_per_event(self._selected(events[2]), with_prehashes, with_hashes, True,
+                                       not with_prehashes)
+
+    def _selected(self, events):
+        """Yield (index, event) for each event of the iterable selected by the event_filter, if any."""
+        if self.event_filter is None:
+            yield from enumerate(events)
+            return
+        for (index, event) in enumerate(events):
+            if self.event_filter(event):
+                yield index, event
+            else:
+                logging.debug("Event %s filtered out", index)
+
+    def _precomputed_results(self, events, with_prehashes, with_hashes, reuse):
+        """Like _results_per_event, canonizing the values of the selected events up front, see _precompute."""
+        selected = list(self._selected(events))
+        self._precompute([event for (_, event) in selected])
+        try:
+            yield from self._results_per_event(selected, with_prehashes, with_hashes, False, reuse)
+        finally:
+            self._precomputed_values = {}
+            self._precomputed_timestamps = {}
+
+    def _results_per_event(self, indexed_events, with_prehashes, with_hashes, precompute_each, reuse):
+        """Yield the (index, pre hash string or None, hash or None) of each (index, event) in the iterable.
+        Events which cannot be processed are logged and skipped.
+        If precompute_each is set, the EPC values are canonized per event, otherwise they are expected to be
+        precomputed.
+        If reuse is set, identical events reuse the result of their first occurrence, see duplicate_cache_size.
+        """
+        duplicates = LRUCache(self.duplicate_cache_size) if reuse and self.duplicate_cache_size > 0 else None
+        for (index, event) in indexed_events:
+            logging.debug("prehashing event %s:\n%s", index, event)
+            try:
+                if duplicates is None:
+                    (prehash, hash_value) = self._event_result(event, with_prehashes, with_hashes, precompute_each)
+                else:
+                    misses = duplicates.misses
+                    (prehash, hash_value) = duplicates.get_or_compute(
+                        metrics.timed(self.hook, "fingerprint", _fingerprint, event),
+                        lambda _: self._event_result(event, with_prehashes, with_hashes, precompute_each))
+                    if duplicates.misses == misses:
+                        logging.debug("Reusing the result of an identical event")
+                        self.reused_events += 1
+                        if self.hook is not None:
+                            self.hook.record("reused events", 0.0)
+            except Exception as ex:
+                logging.error("could not parse event:\n%s\n\nerror: %s", event, ex)
+                logging.debug("".join(traceback.format_tb(ex.__traceback__)))
+                continue
+
+            yield index, prehash, hash_value
+
+    def _event_result(self, event, with_prehashes, with_hashes, precompute_each):
+        """Compute the (pre hash string or None, hash or None) of the event, see _results_per_event."""
+        try:
+            if precompute_each:
+                self._precompute([event])
+            fragments = metrics.timed(self.hook, "prehash", self.prehash_fragments, event)
+        finally:
+            if precompute_each:
+                self._precomputed_values = {}
+                self._precomputed_timestamps = {}
+
+        prehash = "".join(fragments) if with_prehashes else None
+        hash_value = None
+        if with_hashes:
+            if prehash is None:
+                hash_value = metrics.timed(self.hook, "hashing", calculate_hash_from_fragments, fragments,
+                                           self.hashalg)
+            else:
+                hash_value = metrics.timed(self.hook, "hashing", calculate_hash_from_pre_hash, prehash,
+                                           self.hashalg)
+        return prehash, hash_value
+
+    def _in_parallel(self, events):
+        """Whether to use worker processes for this event list, i.e. there are workers and more than one chunk."""
+        return self.workers > 1 and isinstance(events[2], list) and len(events[2]) > self.chunk_size
+
+    def _parallel_results(self, events, with_prehashes, with_hashes):
+        """Split the events into chunks, process them in worker processes and yield the results in the original
+        order as they become available. As when processing serially, events which cannot be processed are logged
+        and left out.
+        """
+        offsets = range(0, len(events[2]), self.chunk_size)
+        chunks = [events[2][offset:offset + self.chunk_size] for offset in offsets]
+        logging.info("#events = %s in %s chunks on %s workers", len(events[2]), len(chunks), self.workers)
+
+        config = (self.join_by, self.hashalg, self.value_cache.maxsize if self.value_cache is not None else 0,
+                  self.timestamp_cache.maxsize if self.timestamp_cache is not None else 0, self.duplicate_cache_size,
+                  self.columnar, self.event_filter)
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)), initializer=_init_worker,
+                                 initargs=config) as executor:
+            for results in executor.map(_process_chunk, offsets, chunks, itertools.repeat(with_prehashes),
+                                        itertools.repeat(with_hashes)):
+                yield from results
+
+    def _fix_time_stamp_format(self, timestamp):
+        """Make sure that the timestamp is given at millisecond precision
+        and in UTC."""
+        precomputed = self._precomputed_timestamps.get(timestamp)
+        if precomputed is not None:
+            return precomputed
+        if self.hook is not None:
+            return metrics.timed(self.hook, "timestamps", self._cached_time_stamp_format, timestamp)
+        return self._cached_time_stamp_format(timestamp)
+
+    def _cached_time_stamp_format(self, timestamp):
+        """Canonize the timestamp, using the timestamp cache if enabled."""
+        if self.timestamp_cache is not None:
+            return self.timestamp_cache.get_or_compute(timestamp, _fix_time_stamp_format)
+        return _fix_time_stamp_format(timestamp)
+
+    def _canonize_value(self, text):
+        """Run a value through all format canonizations, using the value cache if enabled."""
+        precomputed = self._precomputed_values.get(text)
+        if precomputed is not None:
+            return precomputed
+        if self.hook is not None:
+            return metrics.timed(self.hook, "canonicalisation", self._measured_canonize_value, text)
+        if self.value_cache is not None:
+            return self.value_cache.get_or_compute(text, _canonize_value_uncached)
+        return _canonize_value_uncached(text)
+
+    def _measured_canonize_value(self, text):
+        """Like _canonize_value (without the precomputed values), reporting normaliser calls to the hook."""
+        compute = functools.partial(_canonize_value_uncached, hook=self.hook)
+        if self.value_cache is not None:
+            return self.value_cache.get_or_compute(text, compute)
+        return compute(text)
+
+    def _precompute(self, events):
+        """Canonize the values of the event list up front, all of them if columnar, otherwise the EPC values."""
+        if self.columnar:
+            self._precompute_columns(events)
         else:
-            raise ValueError("Unsupported Hashing Algorithm: " + hashalg)
+            self._precompute_epc_values(events)
+
+    def _precompute_columns(self, events):
+        """Canonize all values and timestamps of the event list column by column, each distinct value only once.
+        The values are gathered in a single walk over all events (see _gather_columns) and canonized by kind
+        (see _canonize_values), the URIs in bulk. Documents with millions of values typically contain only a few
+        thousand distinct ones, e.g. locations, business steps, units and sensor readings.
+        """
+        (self._precomputed_values, self._precomputed_timestamps) = metrics.timed(
+            self.hook, "column precomputation", _canonize_columns, events, self.hook)
+        logging.debug("Precomputed %s canonical values and %s canonical timestamps", len(self._precomputed_values),
+                      len(self._precomputed_timestamps))
+
+    def _precompute_epc_values(self, events):
+        """Canonize all EPC list and quantity list values of the event list in one pass.
+        Aggregation events easily contain thousands of child EPCs and the same EPC classes recur in many events.
+        """
+        self._precomputed_values = metrics.timed(self.hook, "epc precomputation", _canonize_values,
+                                                 _gather_epc_values(events), self.hook)
+        logging.debug("Precomputed %s canonical EPC values", len(self._precomputed_values))
+
+    def _child_to_pre_hash_fragments(self, child, entry):
+        """Build the pre hash fragments of child according to its PlanEntry,
+        applying the sub plan to its children if given.
+        Returns the list of fragments, empty if nothing is to be added, and child reduced to the grand children NOT
+        added to it.
+        """
+        logging.debug("Processing '%s'", child)
+        fragments = []
+        grand_child_fragments = []
+        if entry.sub_plan is not None:
+            grand_child_fragments, remaining_grand_children = self._recurse_through_children_in_order(
+                child[2], entry.sub_plan)
+            if remaining_grand_children is not child[2]:
+                child = (child[0], child[1], remaining_grand_children)
+        if child[1]:
+            text = child[1].strip()
+            if entry.is_time:
+                text = self._fix_time_stamp_format(text)
+            else:
+                text = self._canonize_value(text)
+
+            if text:
+                fragments = [child[0], "=", text] if child[0] else ["=", text]
+                logging.debug("pre hash string element: '=%s'", text)
+
+        if grand_child_fragments:
+            if not fragments and child[0]:
+                fragments = [child[0]]
+            fragments += grand_child_fragments
+
+        return fragments, child
+
+    def _children_to_pre_hash_fragments(self, children, indices, entry, reduced):
+        """Build the pre hash fragments of the children at the given indices, leaving out empty ones.
+        Records in reduced the remaining part of each processed child (by index),
+        or None if it has been added completely.
+        """
+        list_of_values = []
+        for i in indices:
+            child = reduced.get(i, children[i])
+            if child is None:
+                continue
+            child_fragments, child = self._child_to_pre_hash_fragments(child, entry)
+            if child_fragments:
+                list_of_values.append(child_fragments)
+            else:
+                logging.debug("Empty element ignored: %s", child)
+
+            if len(child[2]) == 0:
+                logging.debug("Finished processing %s", child)
+                reduced[i] = None
+            else:
+                reduced[i] = child
+
+        return list_of_values
+
+    def _leaves_to_pre_hash_strings(self, children, indices, entry, reduced):
+        """Build the sorted pre hash strings (name=value) of the children at the given indices in bulk, if all of
+        them are leaves not processed before, e.g. the thousands of EPCs of an EPC list. Returns None otherwise.
+        Each distinct value is canonized once and each string is built directly instead of from a fragment list.
+        As in _children_to_pre_hash_fragments, empty values are left out and the children are recorded in reduced
+        as added completely.
+        """
+        texts = []
+        for i in indices:
+            child = children[i]
+            if len(child[2]) != 0 or i in reduced:
+                return None
+            if child[1]:
+                texts.append(child[1].strip())
+
+        canonize = self._fix_time_stamp_format if entry.is_time else self._canonize_value
+        if len(texts) > 1:
+            canonize = {text: canonize(text) for text in dict.fromkeys(texts)}.__getitem__
+        prefix = entry.name + "="
+        values = [prefix + canonical for canonical in map(canonize, texts) if canonical]
+        if len(values) > 1:
+            values.sort()
+
+        for i in indices:
+            reduced[i] = None
+        return values
+
+    def _entry_to_pre_hash_fragments(self, children, indices, entry, reduced):
+        """Build the pre hash fragments of the children at the given indices, all matching the plan entry.
+        The values are sorted by their pre hash strings (fixes #10) and joined. Empty values are left out (fixes #16).
+        Lists of leaves are processed in bulk, see _leaves_to_pre_hash_strings.
+        """
+        if entry.sub_plan is None:
+            values = self._leaves_to_pre_hash_strings(children, indices, entry, reduced)
+            if values is not None:
+                return _interleave(values, self.join_by)
+
+        list_of_values = self._children_to_pre_hash_fragments(children, indices, entry, reduced)
+        if len(list_of_values) > 1:
+            list_of_values.sort(key="".join)
+
+        fragments = []
+        for value in list_of_values:
+            if fragments and self.join_by:
+                fragments.append(self.join_by)
+            fragments += value
+        return fragments
+
+    def _recurse_through_children_in_order(self, child_list, plan):
+        """
+        Loop over the plan entries, look for a child of root with matching key and build the pre-hash string
+        (mostly key=value). Recurse through the grand children applying the sub plan.
+        The children are grouped by name once, so that each plan entry is a lookup instead of a scan.
+        The tree is not modified. Instead, the children NOT added to the pre hash string are returned along with it:
+        Children which are added to the pre hash string including all their children are left out, children whose
+        grand children are only partly added are reduced to the remaining grand children.
+
+        The pre hash string is returned as a list of non empty fragments, to be concatenated,
+        so that large values are never copied into intermediate strings.
+
+        `child_list`    is to be a list of simple python object, i.e. triples of two strings (key/value) and a list of
+                        simple python objects (grand children).
+        `plan`          is expected to be a PrehashPlan compiled from a property order, see prehash_plan.
+
+        Returns the pre hash fragments and the list of remaining children.
+        """
+        fragments = []
+        logging.debug("Calculating pre hash for child list %s \nWith plan %s", child_list, plan)
+
+        user_extensions, remaining = _gather_user_extensions(child_list)
+
+        buckets = _group_by_name(remaining)
+        reduced = {}
+        for entry in plan.entries:
+            indices = buckets.get(entry.name)  # elements with the same name
+            if not indices:
+                continue
+            entry_fragments = self._entry_to_pre_hash_fragments(remaining, indices, entry, reduced)
+            if entry_fragments:
+                if fragments and self.join_by:
+                    fragments.append(self.join_by)
+                fragments += entry_fragments
+
+        if len(user_extensions) > 0:
+            if self.join_by:
+                fragments.append(self.join_by)
+            fragments += self._generic_child_list_to_prehash_fragments(user_extensions)
+
+        if reduced:
+            remaining = [reduced.get(i, child) for (i, child) in enumerate(remaining)]
+            remaining = [child for child in remaining if child is not None]
+
+        logging.debug("child list pre hash is %s", fragments)
+
+        return fragments, remaining
+
+    def _generic_child_list_to_prehash_fragments(self, children):
+        """Build the pre hash fragments of children not covered by a property order, e.g. user extensions,
+        sorting them by their pre hash strings unless the order is defined (see should_sort).
+        The pre hash string of each of several children is built once, serving both as its sort key and as its
+        only fragment. A single child is not sorted and its fragments are passed on as they are.
+        """
+        if len(children) == 1:
+            return self._generic_child_to_prehash_fragments(children[0])
+
+        values = []
+        for child in children:
+            name = child[0]
+            if isinstance(name, str) and not child[2]:  # no grand children, i.e. name=value
+                text = child[1].strip()
+                values.append(name + "=" + self._canonize_value(text) if text else name)
+            else:
+                values.append("".join(self._generic_child_to_prehash_fragments(child)))
+
+        if should_sort(children):
+            values.sort()
+        return _interleave(values, self.join_by)
+
+    def _generic_child_to_prehash_fragments(self, child):
+        """Build the pre hash fragments of a single child (name=value) and of all its children."""
+        if isinstance(child, tuple) and len(child) == 2 and isinstance(child[0], tuple):
+            return self._generic_child_list_to_prehash_fragments(child)
+
+        value = [child[0]] if child[0] else []
+        text = child[1].strip()
+        if text:
+            text = self._canonize_value(text)
+            value.append("=")
+            if text:
+                value.append(text)
+        if child[2]:
+            value += self._generic_child_list_to_prehash_fragments(child[2])
+        return value
+
+    def _gather_elements_not_in_order(self, children):
+        """
+        Collects vendor extensions not covered by the defined child order,
+        i.e. the children remaining after _recurse_through_children_in_order.
+        Returns the list of pre hash fragments.
+        """
 
-        hashValueList.append(hash_string)
+        # remove fields that are to be ignored in the hash:
+        # remove all elements from XML tree which do shouldn't take part in hash calculation
+        to_be_ignored = ["recordTime", "eventID", "type", "errorDeclaration"]
+        children = [child for child in children if child[0] not in to_be_ignored]
+        if children:
+            return self._generic_child_list_to_prehash_fragments(children)
 
-    return hashValueList
+        return []
+
+
+_worker_hasher = None
+"""EventHasher of a worker process, see _init_worker."""
+
+
+def _init_worker(join_by, hashalg, value_cache_size, timestamp_cache_size, duplicate_cache_size, columnar,
+                 event_filter):
+    """Set up the EventHasher of a worker process, configured like the EventHasher distributing the chunks.
+    Identical events are only detected within a chunk and not counted in the reused_events of the distributing
+    EventHasher.
+    """
+    global _worker_hasher
+    _worker_hasher = EventHasher("", hashalg, value_cache_size, timestamp_cache_size,
+                                 duplicate_cache_size=duplicate_cache_size, columnar=columnar,
+                                 event_filter=event_filter)  # without hook
+    _worker_hasher.join_by = join_by  # already unescaped
+
+
+def _process_chunk(offset, events, with_prehashes, with_hashes):
+    """Compute the (index, pre hash string or None, hash or None) of a chunk of events in a worker process,
+    the index being relative to the complete event list of which the chunk starts at offset.
+    """
+    results = _worker_hasher._results(("EventList", "", events), with_prehashes, with_hashes)
+    return [(offset + index, prehash, hash_value) for (index, prehash, hash_value) in results]
+
+
+_default_hasher = EventHasher()
+"""EventHasher holding the caches used by the module level functions below."""
+
+
+def _hasher(join_by=DEFAULT_JOIN_BY, **kwargs):
+    """Return a new EventHasher joining by join_by, sharing the caches of the default hasher and reporting to the
+    installed metrics hook. Further keyword arguments are passed on to EventHasher.
+    """
+    hasher = EventHasher(join_by, timestamp_cache_size=0, hook=metrics.current_hook(),
+                         duplicate_cache_size=_default_hasher.duplicate_cache_size, **kwargs)
+    hasher.value_cache = _default_hasher.value_cache
+    hasher.timestamp_cache = _default_hasher.timestamp_cache
+    return hasher
+
+
+def enable_value_cache(maxsize=DEFAULT_MAXSIZE):
+    """Memoize the canonical form of values in an LRU cache holding at most maxsize entries.
+    Replaces a previously enabled cache. Returns the new cache, e.g. to inspect its stats.
+    """
+    _default_hasher.value_cache = LRUCache(maxsize)
+    return _default_hasher.value_cache
+
+
+def disable_value_cache():
+    """Stop memoizing canonical values and drop the cache."""
+    _default_hasher.value_cache = None
+
+
+def clear_value_cache():
+    """Empty the value cache and reset its counters, e.g. between tenants. No-op if the cache is disabled."""
+    if _default_hasher.value_cache is not None:
+        _default_hasher.value_cache.clear()
+
+
+def value_cache_stats():
+    """Return the CacheStats (hits, misses, evictions, size, maxsize) of the value cache or None if disabled."""
+    if _default_hasher.value_cache is None:
+        return None
+    return _default_hasher.value_cache.stats()
+
+
+def enable_duplicate_reuse(maxsize=DUPLICATE_CACHE_SIZE):
+    """Let the module level functions reuse the results of identical events within an event list, keeping the
+    results of up to maxsize distinct events per event list, see EventHasher.
+    """
+    _default_hasher.duplicate_cache_size = maxsize
+
+
+def disable_duplicate_reuse():
+    """Stop reusing the results of identical events, the default."""
+    _default_hasher.duplicate_cache_size = 0
+
+
+def _canonize_value(text):
+    """Run a value through all format canonizations, using the value cache if enabled."""
+    return _default_hasher._canonize_value(text)
+
+
+def derive_prehashes_from_events(events, join_by=DEFAULT_JOIN_BY, workers=1, chunk_size=PARALLEL_CHUNK_SIZE,
+                                 columnar=False, event_filter=None):
+    """
+    Compute a normalized form (pre-hash string) for each event.
+    This is the main functionality of the hash generator, see EventHasher.prehashes.
+    Large event lists are processed by `workers` processes in chunks of `chunk_size` events, if workers > 1.
+    If columnar is set, all values are canonized column by column up front, see EventHasher.
+    If an event_filter is given, only the events it selects are processed, see EventHasher.
+    The events are not modified.
+    """
+    return _hasher(join_by, workers=workers, chunk_size=chunk_size, columnar=columnar,
+                   event_filter=event_filter).prehashes(events)
+
+
+def iter_prehashes(events, join_by=DEFAULT_JOIN_BY, workers=1, chunk_size=PARALLEL_CHUNK_SIZE, columnar=False,
+                   event_filter=None):
+    """Yield (index, pre hash string) for each event as soon as it is computed, see EventHasher.iter_prehashes.
+    If an event_filter is given, only the events it selects are processed, the index still being the position of
+    each event in the event list.
+    """
+    return _hasher(join_by, workers=workers, chunk_size=chunk_size, columnar=columnar,
+                   event_filter=event_filter).iter_prehashes(events)
+
+
+def iter_hashes(events, hashalg="sha256", join_by=DEFAULT_JOIN_BY, keep_prehashes=False, workers=1,
+                chunk_size=PARALLEL_CHUNK_SIZE, columnar=False, event_filter=None):
+    """Yield (index, pre hash string, hash) for each event as soon as it is computed, see EventHasher.iter_hashes.
+    Unless keep_prehashes is set, the pre hash strings are never built and None is yielded instead.
+    If an event_filter is given, only the events it selects are processed, the index still being the position of
+    each event in the event list.
+    """
+    return _hasher(join_by, hashalg=hashalg, keep_prehashes=keep_prehashes, workers=workers,
+                   chunk_size=chunk_size, columnar=columnar, event_filter=event_filter).iter_hashes(events)
 
 
 def epcis_hashes_from_events(events, hashalg="sha256"):
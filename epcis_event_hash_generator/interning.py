@@ -0,0 +1,131 @@
+"""Pool sharing a single instance of equal strings among the simple python objects built from EPCIS documents.
+
+Large documents repeat the same element names and values (EPC classes, locations, CBV URLs, ...)
+many thousand times. The XML/JSON converters pass each string through intern, which returns the pooled
+instance of an equal string, if interning is enabled. The duplicates can then be garbage collected.
+The canonical forms of the values are not interned, they only live while the pre hash strings are built.
+
+Interning is disabled by default, see enable_interning. The pool holds on to every string passed to intern,
+use clear_interning between documents. Use memory_report to compare the memory held by an event list with
+and without interning.
+
+.. module:: interning
+
+This program is free software: you can redistribute it and/or modify
+it under the terms given in the LICENSE file.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the LICENSE
+file for details.
+
+"""
+
+import sys
+from collections import namedtuple
+
+InternStats = namedtuple("InternStats", ["lookups", "distinct", "saved_bytes"])
+"""Snapshot of the counters of an InternPool. `saved_bytes` is the size of the duplicates replaced by pooled strings."""
+
+MemoryReport = namedtuple("MemoryReport", ["strings", "distinct_strings", "string_bytes", "containers",
+                                           "container_bytes"])
+"""Memory held by a simple python object, see memory_report.
+
+`strings`           Number of string references in the object, those of a shared tuple or list counted once.
+`distinct_strings`  Number of distinct string instances among them.
+`string_bytes`      Size of the distinct string instances.
+`containers`        Number of distinct tuple and list instances.
+`container_bytes`   Size of the distinct tuples and lists, not including their elements.
+"""
+
+
+class InternPool:
+    """Map every string to the first equal string passed to intern."""
+
+    def __init__(self):
+        self._pool = {}
+        self._lookups = 0
+        self._saved_bytes = 0
+
+    def intern(self, value):
+        """Return the pooled instance equal to value, adding value to the pool if there is none."""
+        self._lookups += 1
+        pooled = self._pool.setdefault(value, value)
+        if pooled is not value:
+            self._saved_bytes += sys.getsizeof(value)
+        return pooled
+
+    def clear(self):
+        """Empty the pool and reset its counters."""
+        self._pool.clear()
+        self._lookups = 0
+        self._saved_bytes = 0
+
+    def stats(self):
+        return InternStats(self._lookups, len(self._pool), self._saved_bytes)
+
+    def __len__(self):
+        return len(self._pool)
+
+
+_pool = None
+"""The InternPool used by intern. Disabled (None) by default."""
+
+
+def enable_interning():
+    """Start interning into a new, empty pool. Returns the pool, e.g. to inspect its stats."""
+    global _pool
+    _pool = InternPool()
+    return _pool
+
+
+def disable_interning():
+    """Stop interning and drop the pool."""
+    global _pool
+    _pool = None
+
+
+def clear_interning():
+    """Empty the pool and reset its counters, e.g. between documents. No-op if interning is disabled."""
+    if _pool is not None:
+        _pool.clear()
+
+
+def interning_stats():
+    """Return the InternStats (lookups, distinct, saved_bytes) of the pool or None if interning is disabled."""
+    if _pool is None:
+        return None
+    return _pool.stats()
+
+
+def intern(value):
+    """Return the pooled instance equal to value if interning is enabled, value itself otherwise."""
+    if _pool is None:
+        return value
+    return _pool.intern(value)
+
+
+def memory_report(obj):
+    """Measure the memory held by the strings, tuples and lists of a simple python object, e.g. an event list.
+    Every instance is counted once, no matter how often it is referenced.
+    """
+    strings = 0
+    distinct_strings = set()
+    string_bytes = 0
+    containers = set()
+    container_bytes = 0
+
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, str):
+            strings += 1
+            if id(current) not in distinct_strings:
+                distinct_strings.add(id(current))
+                string_bytes += sys.getsizeof(current)
+        elif isinstance(current, (tuple, list)) and id(current) not in containers:
+            containers.add(id(current))
+            container_bytes += sys.getsizeof(current)
+            stack.extend(current)
+
+    return MemoryReport(strings, len(distinct_strings), string_bytes, len(containers), container_bytes)
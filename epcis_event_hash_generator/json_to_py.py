@@ -56,7 +56,8 @@ try:
 except ImportError:
     from context import epcis_event_hash_generator  # noqa: F401
 
-from epcis_event_hash_generator import json_xml_model_mismatch_correction
+from epcis_event_hash_generator import json_xml_model_mismatch_correction, metrics
+from epcis_event_hash_generator.interning import intern
 
 _namespaces = {}  # global dictionary gathered during parsing
 
@@ -93,9 +94,10 @@ def _collect_namespaces_from_jsonld_context(context):
                         _namespaces[key] = "{" + c[key] + "}"
 
 
-def _json_to_py(json_obj, fields_to_ignore=None):
+def _json_to_py(json_obj, fields_to_ignore=None, sort=True):
     """
-    Recursively convert a string/list/dict to a simple python object
+    Recursively convert a string/list/dict to a simple python object.
+    If sort is not set, the children of a list are left in document order, because the caller sorts them anyway.
     """
     if fields_to_ignore is None:
         fields_to_ignore = []
@@ -108,10 +110,13 @@ def _json_to_py(json_obj, fields_to_ignore=None):
             py_obj[2].append(_json_to_py(child))
     elif isinstance(json_obj, dict):
         if "type" in json_obj:
-            py_obj = (json_obj["type"], "", [])
+            py_obj = (intern(json_obj["type"]), "", [])
 
         if "#text" in json_obj:
-            py_obj = (py_obj[0], json_obj["#text"], py_obj[2])
+            py_obj = (py_obj[0], intern(json_obj["#text"]), py_obj[2])
+
+        # do not sort elements with bizTransaction, source and destination
+        sort = not [k for k in ["bizTransaction", "source", "destination"] if k in json_obj]
 
         to_be_ignored = ["#text", "rdfs:comment", "comment"] + fields_to_ignore
         for (key, val) in [x for x in json_obj.items() if x[0] not in to_be_ignored]:
@@ -122,9 +127,10 @@ def _json_to_py(json_obj, fields_to_ignore=None):
                 py_obj = (_namespace_replace(py_obj[0]), py_obj[1], py_obj[2])
             else:
                 # first find namespaces in child, then replace in key!
-                child = _json_to_py(val)
+                # The elements of a list become children of py_obj, sorted along with them.
+                child = _json_to_py(val, sort=not (sort and isinstance(val, list)))
 
-                key = _namespace_replace(key)
+                key = intern(_namespace_replace(key))
 
                 if isinstance(val, list):
                     for element in child[2]:
@@ -135,10 +141,9 @@ def _json_to_py(json_obj, fields_to_ignore=None):
 
     else:
         logging.debug("converting '%s' to str", json_obj)
-        return "", str(_namespace_replace(json_obj, True)), []
+        return "", intern(str(_namespace_replace(json_obj, True))), []
 
-    # do not sort elements with bizTransaction, source and destination
-    if not [k for k in ["bizTransaction", "source", "destination"] if k in json_obj]:
+    if sort:
         py_obj[2].sort()
     return py_obj
 
@@ -226,7 +231,8 @@ def event_list_from_epcis_document_str(data):
     Apply the format corrections to match what we get from the respective xml representation.
     """
 
-    json_obj = json.loads(data)
+    with metrics.stage("json parsing"):
+        json_obj = json.loads(data)
 
     # remove empty entries from context
     cleaned_ctx = [element for element in json_obj["@context"] if not isinstance(element, dict) or element]
@@ -241,7 +247,8 @@ def event_list_from_epcis_document_json(json_obj):
     Convert the json_obj to a simple python object.
     Apply the format corrections to match what we get from the respective xml representation.
     """
-    json_obj = _bare_string_pre_preocessing(json_obj)
+    hook = metrics.current_hook()
+    json_obj = metrics.timed(hook, "jsonld expansion", _bare_string_pre_preocessing, json_obj)
 
     if not json_obj.get("@context") is None:
         _collect_namespaces_from_jsonld_context(json_obj["@context"])
@@ -268,6 +275,8 @@ def event_list_from_epcis_document_json(json_obj):
 
     # Correct JSON/XML data model mismatch
     for event in event_list:
-        events.append(json_xml_model_mismatch_correction.deep_structure_correction(_json_to_py(event, fields_to_ignore)))
+        py_obj = metrics.timed(hook, "json conversion", _json_to_py, event, fields_to_ignore)
+        events.append(metrics.timed(hook, "structure correction",
+                                    json_xml_model_mismatch_correction.deep_structure_correction, py_obj))
 
     return ("EventList", "", events)
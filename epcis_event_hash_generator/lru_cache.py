@@ -0,0 +1,85 @@
+"""Bounded least recently used (LRU) cache with hit, miss and eviction counters.
+
+Used to memoize the canonical form of values which are repeated throughout EPCIS documents,
+e.g. EPC classes, locations, read points, business steps and dispositions.
+
+.. module:: lru_cache
+
+This program is free software: you can redistribute it and/or modify
+it under the terms given in the LICENSE file.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the LICENSE
+file for details.
+
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+DEFAULT_MAXSIZE = 65536
+"""Default number of entries kept by an LRUCache."""
+
+CacheStats = namedtuple("CacheStats", ["hits", "misses", "evictions", "size", "maxsize"])
+"""Snapshot of the counters of an LRUCache."""
+
+
+class LRUCache:
+    """Map keys to computed values, evicting the least recently used entry once maxsize is exceeded.
+
+    `maxsize`   is the maximal number of entries kept in the cache. Must be positive.
+
+    The cache may be shared by several threads. The entries and counters are guarded by a lock, which is not held
+    while computing a value, so that threads missing the same key at the same time may each compute it.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        if maxsize < 1:
+            raise ValueError("LRU cache size must be positive, got {}".format(maxsize))
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key. On a miss, call compute(key), cache and return the result."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+
+        value = compute(key)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)  # in case another thread has added it in the meantime
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        """Remove all entries and reset the counters, e.g. between tenants."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Return the current counters as CacheStats."""
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self._entries), self.maxsize)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
@@ -0,0 +1,173 @@
+"""Hooks receiving the duration and number of calls of the stages of the hashing pipeline.
+
+A stage is e.g. reading a file, JSON-LD expansion, XML conversion, structure correction, canonicalisation of values,
+normaliser calls, timestamp parsing or hashing. The instrumented code reports each measured call to the installed
+hook via MetricsHook.record. Documents are delimited by start_document/end_document, see document.
+
+No hook is installed by default, in which case the instrumentation only checks for the hook and calls through.
+Use install_hook to collect the stage breakdown in a StageTimer (or any other MetricsHook).
+
+Stages are measured inclusively, i.e. the time of nested stages (e.g. normaliser within canonicalisation within
+prehash) is contained in the time of the enclosing stage. Worker processes (see hash_generator.EventHasher) do not
+report to the hook.
+
+.. module:: metrics
+
+This program is free software: you can redistribute it and/or modify
+it under the terms given in the LICENSE file.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the LICENSE
+file for details.
+
+"""
+
+import contextlib
+import time
+from collections import namedtuple
+
+StageStats = namedtuple("StageStats", ["calls", "seconds"])
+"""Number of calls of a stage and the total time spent in them."""
+
+DocumentStats = namedtuple("DocumentStats", ["name", "seconds", "stages"])
+"""Wall clock time between start and end of a document and the StageStats by stage recorded in between."""
+
+
+class MetricsHook:
+    """Interface of the hooks receiving the measurements. All methods do nothing, override the ones of interest."""
+
+    def start_document(self, name):
+        """Called before processing the document (e.g. file name) `name`."""
+
+    def end_document(self, name):
+        """Called after processing the document `name`."""
+
+    def record(self, stage, seconds, calls=1):
+        """Called after `calls` calls of `stage` took `seconds` in total."""
+
+
+class StageTimer(MetricsHook):
+    """Sum up the time and calls per stage, in total and per document."""
+
+    def __init__(self):
+        self._totals = {}
+        self._documents = []
+        self._current = None
+
+    def start_document(self, name):
+        self._current = (name, time.perf_counter(), {})
+
+    def end_document(self, name):
+        if self._current is None:
+            return
+        (current_name, start, stages) = self._current
+        self._documents.append(DocumentStats(current_name, time.perf_counter() - start, _snapshot(stages)))
+        self._current = None
+
+    def record(self, stage, seconds, calls=1):
+        _add(self._totals, stage, seconds, calls)
+        if self._current is not None:
+            _add(self._current[2], stage, seconds, calls)
+
+    def stats(self):
+        """Return the StageStats by stage of all documents (and of measurements outside any document)."""
+        return _snapshot(self._totals)
+
+    def documents(self):
+        """Return the DocumentStats of each finished document."""
+        return list(self._documents)
+
+    def clear(self):
+        """Drop all measurements."""
+        self._totals = {}
+        self._documents = []
+        self._current = None
+
+    def format_report(self):
+        """Format the breakdown per document and in total as a table, one stage per line."""
+        lines = []
+        for document in self._documents:
+            lines.append("Stages of '{}' ({:.3f} ms):".format(document.name, 1000 * document.seconds))
+            lines += _format_stages(document.stages)
+        lines.append("Stages of all documents:")
+        lines += _format_stages(self.stats())
+        return "\n".join(lines)
+
+
+def _add(stages, stage, seconds, calls):
+    stats = stages.get(stage)
+    if stats is None:
+        stages[stage] = [calls, seconds]
+    else:
+        stats[0] += calls
+        stats[1] += seconds
+
+
+def _snapshot(stages):
+    return {stage: StageStats(calls, seconds) for (stage, (calls, seconds)) in stages.items()}
+
+
+def _format_stages(stages):
+    return ["  {:<22} {:>9} calls {:>12.3f} ms".format(stage, stats.calls, 1000 * stats.seconds)
+            for (stage, stats) in stages.items()]
+
+
+_hook = None
+"""The installed MetricsHook. None (no instrumentation) by default."""
+
+
+def install_hook(hook=None):
+    """Report all measurements to hook, a new StageTimer if not given. Returns the hook."""
+    global _hook
+    _hook = StageTimer() if hook is None else hook
+    return _hook
+
+
+def remove_hook():
+    """Stop reporting measurements."""
+    global _hook
+    _hook = None
+
+
+def current_hook():
+    """Return the installed MetricsHook or None."""
+    return _hook
+
+
+def timed(hook, stage, func, *args, **kwargs):
+    """Return func(*args, **kwargs), reporting its duration as one call of stage to hook unless hook is None."""
+    if hook is None:
+        return func(*args, **kwargs)
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        hook.record(stage, time.perf_counter() - start)
+
+
+@contextlib.contextmanager
+def stage(name, calls=1):
+    """Report the duration of the with block as `calls` calls of stage `name` to the installed hook, if any."""
+    hook = _hook
+    if hook is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        hook.record(name, time.perf_counter() - start, calls)
+
+
+@contextlib.contextmanager
+def document(name):
+    """Delimit the processing of the document `name` (e.g. a file name) for the installed hook, if any."""
+    hook = _hook
+    if hook is not None:
+        hook.start_document(name)
+    try:
+        yield
+    finally:
+        if hook is not None:
+            hook.end_document(name)
@@ -0,0 +1,117 @@
+"""Compiled form of the property order PROP_ORDER, executed by the hash generator.
+
+PROP_ORDER is compiled once into a PrehashPlan: a sequence of PlanEntry per nesting level, each holding the
+property name, whether its value is a timestamp and the plan for its children. In addition, there is a
+plan per event type, which leaves out the top level properties that the type cannot have
+(e.g. an ObjectEvent has no childEPCs). Use plan_for_event to pick the plan for an event.
+
+.. module:: prehash_plan
+
+This program is free software: you can redistribute it and/or modify
+it under the terms given in the LICENSE file.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the LICENSE
+file for details.
+
+"""
+
+from collections import namedtuple
+
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+from epcis_event_hash_generator import PROP_ORDER
+
+PlanEntry = namedtuple("PlanEntry", ["name", "is_time", "sub_plan"])
+"""One property of a plan.
+
+`name`      Name of the element.
+`is_time`   Whether the value is a timestamp to be normalised to UTC at millisecond precision.
+`sub_plan`  PrehashPlan for the children of the element or None if the element has no ordered children.
+"""
+
+COMMON_PROPERTIES = ["eventTime", "eventTimeZoneOffset", "certificationInfo", "bizStep", "disposition",
+                     "persistentDisposition", "readPoint", "bizLocation", "bizTransactionList", "sourceList",
+                     "destinationList", "sensorElementList"]
+"""Top level properties of PROP_ORDER which every event type may have."""
+
+EVENT_TYPE_PROPERTIES = {
+    "ObjectEvent": ["epcList", "quantityList", "action"],
+    "AggregationEvent": ["parentID", "childEPCs", "childQuantityList", "action"],
+    "TransactionEvent": ["parentID", "epcList", "quantityList", "action"],
+    "TransformationEvent": ["inputEPCList", "inputQuantityList", "outputEPCList", "outputQuantityList",
+                            "transformationID"],
+    "AssociationEvent": ["parentID", "childEPCs", "childQuantityList", "action"],
+}
+"""Top level properties of PROP_ORDER specific to each event type, in addition to the COMMON_PROPERTIES."""
+
+
+class PrehashPlan:
+    """The property order of one nesting level.
+
+    `entries`   PlanEntry per property, in the order in which they are added to the pre hash string.
+    `excluded`  Names of properties left out of this plan, although present in the property order it was compiled
+                from. An element with such a name must be processed with the full plan instead.
+    `by_name`   PlanEntry by property name.
+    """
+
+    def __init__(self, entries, excluded=frozenset()):
+        self.entries = tuple(entries)
+        self.names = frozenset(entry.name for entry in self.entries)
+        self.by_name = {entry.name: entry for entry in reversed(self.entries)}
+        self.excluded = frozenset(excluded)
+
+    def restrict(self, names):
+        """Return a plan containing only the entries with the given names, sharing their sub plans."""
+        names = set(names)
+        return PrehashPlan([entry for entry in self.entries if entry.name in names], self.names - names)
+
+    def __repr__(self):
+        return "PrehashPlan({})".format([entry.name for entry in self.entries])
+
+
+def _is_time(name):
+    """Whether values of elements with this name are timestamps, e.g. eventTime but not eventTimeZoneOffset."""
+    name = name.lower()
+    return name.find("time") >= 0 and name.find("offset") < 0
+
+
+def compile_plan(property_order):
+    """Compile a property order (see PROP_ORDER) into a PrehashPlan.
+    Entries not named by a string, like the (type, bizTransaction) pairs in the bizTransactionList order,
+    never match an element and are left out. Their enclosing element keeps an (empty) sub plan though,
+    so that user extensions among its children are still collected.
+    """
+    entries = []
+    for (name, sub_order) in property_order:
+        if not isinstance(name, str):
+            continue
+        sub_plan = compile_plan(sub_order) if sub_order else None
+        entries.append(PlanEntry(name, _is_time(name), sub_plan))
+    return PrehashPlan(entries)
+
+
+FULL_PLAN = compile_plan(PROP_ORDER)
+"""Plan for all properties of PROP_ORDER, used for unknown event types."""
+
+EVENT_PLANS = {event_type: FULL_PLAN.restrict(COMMON_PROPERTIES + properties)
+               for (event_type, properties) in EVENT_TYPE_PROPERTIES.items()}
+"""Plan per event type."""
+
+
+def plan_for_event(event):
+    """Return the plan for the type of event.
+    Falls back to the FULL_PLAN for unknown types and for events having a property their type cannot have,
+    so that the pre hash string is the same as with the full plan in any case.
+    """
+    plan = EVENT_PLANS.get(event[0])
+    if plan is None:
+        return FULL_PLAN
+    for child in event[2]:
+        if isinstance(child[0], str) and child[0] in plan.excluded:
+            return FULL_PLAN
+    return plan
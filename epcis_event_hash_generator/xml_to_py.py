@@ -68,7 +68,16 @@ import xml.etree.ElementTree as ElementTree
 from lxml import etree
 from typing import Tuple
 
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+from epcis_event_hash_generator import metrics
+from epcis_event_hash_generator.interning import intern
+
 _expansions = {"gs1:": "https://gs1.org/voc/", "cbv:": "https://ref.gs1.org/cbv/"}
+_expansion_prefixes = tuple(_expansions)
 
 
 def _remove_extension_tags(data):
@@ -85,23 +94,35 @@ def _expand_value_prefix(obj):
     <sensorReport type="gs1:Temperature" value="26" uom="CEL" sDev="0.1"/>
     to
     <sensorReport type="https://gs1.org/voc/Temperature" value="26" uom="CEL" sDev="0.1"/>
+
+    Elements (and lists of children) without any value to expand are returned as they are, keeping their order.
     """
 
     # a special logic required to deal with nested tuple structure for elements
     # like sourceList, destinationList, bizTransactionList
-    (restructured_obj, skip) = check_for_nested_tuples_with_type_attribute(obj)
+    if len(obj) == 2:
+        (restructured_obj, skip) = check_for_nested_tuples_with_type_attribute(obj)
+        if skip:
+            return restructured_obj
 
-    if skip:
-        return restructured_obj
-    else:
+    text = obj[1]
+    if text.startswith(_expansion_prefixes):
         for key, value in _expansions.items():
-            if obj[1].startswith(key):
-                obj = (obj[0], obj[1].replace(key, value), obj[2])
+            if text.startswith(key):
+                text = intern(text.replace(key, value))
+
+    kids = obj[2]
+    new_kids = None
+    for (index, child) in enumerate(kids):
+        new_child = _expand_value_prefix(child)
+        if new_kids is None and new_child is not child:
+            new_kids = list(kids[:index])
+        if new_kids is not None:
+            new_kids.append(new_child)
 
-        new_kids = []
-        for child in obj[2]:
-            new_kids.append(_expand_value_prefix(child))
-        return obj[0], obj[1], new_kids
+    if new_kids is None and text is obj[1] and len(obj) == 3 and isinstance(kids, list):
+        return obj
+    return obj[0], text, list(kids) if new_kids is None else new_kids
 
 
 def check_for_nested_tuples_with_type_attribute(obj):
@@ -122,7 +143,7 @@ def check_for_nested_tuples_with_type_attribute(obj):
                     skip = True
                     if str(child_as_list[1]).startswith(key):
                         altered = True
-                        child_as_list[1] = str(child_as_list[1]).replace(key, value)
+                        child_as_list[1] = intern(str(child_as_list[1]).replace(key, value))
                         obj_as_list[index] = tuple(child_as_list)
             restructured_obj = tuple(obj_as_list)
 
@@ -138,7 +159,7 @@ def _xml_to_py(root, sort=True):
     children = []
 
     # add all XML Attributes
-    children += [(x, y, []) for (x, y) in root.items()]
+    children += [(intern(x), intern(y), []) for (x, y) in root.items()]
 
     # Recurs through children
     for child in root:
@@ -163,7 +184,7 @@ def _xml_to_py(root, sort=True):
     text = ""
     if root.text:
         text = root.text.strip()
-    obj = (root.tag, text, children)
+    obj = (intern(root.tag), intern(text), children)
 
     logging.debug("xml_to_py(%s) = %s", root, obj)
     return obj
@@ -202,14 +223,15 @@ def event_list_from_epcis_document_str(xmlStr: str) -> Tuple[str, str, list]:
     Read EPCIS XML document and generate the event List in the form of a simple python object
     """
     try:
-        data = _remove_extension_tags(xmlStr)
+        with metrics.stage("xml parsing"):
+            data = _remove_extension_tags(xmlStr)
 
-        ignore_field_ns_prefix = get_ignore_field_prefix_ns(xmlStr)
+            ignore_field_ns_prefix = get_ignore_field_prefix_ns(xmlStr)
 
-        if ignore_field_ns_prefix is not None:
-            data = data.replace(ignore_field_ns_prefix + ':', '')
+            if ignore_field_ns_prefix is not None:
+                data = data.replace(ignore_field_ns_prefix + ':', '')
 
-        root = ElementTree.fromstring(data)
+            root = ElementTree.fromstring(data)
 
         eventList = root.find("*EventList")
 
@@ -231,10 +253,11 @@ def event_list_from_epcis_document_str(xmlStr: str) -> Tuple[str, str, list]:
         logging.error("Input string does not contain a valid EPCIS XML document with EventList.")
         return ("", "", [])
 
-    # sort=False => preserve document order of events
-    obj = _xml_to_py(eventList, False)
+    with metrics.stage("xml conversion"):
+        # sort=False => preserve document order of events
+        obj = _xml_to_py(eventList, False)
 
-    obj = _expand_value_prefix(obj)
+        obj = _expand_value_prefix(obj)
 
     logging.debug("Simple python object:\n%s", obj)
 
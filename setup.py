@@ -33,5 +33,8 @@ setuptools.setup(
         'Flask>=1.1',
         'PyLD>=2.0.3'
     ],
+    extras_require={
+        'numpy': ['numpy'],  # optional: bulk check digit computation
+    },
     include_package_data=True,
 )
@@ -0,0 +1,93 @@
+"""Benchmark the dl_normaliser per scheme against the original, sequential reference implementation.
+
+Run from the tests directory:
+
+    python dl_normaliser_benchmark.py [-n NUMBER] [-g COUNT] [-s SEED]
+
+For every scheme of the sample corpus, or of a generated corpus with COUNT realistic URIs
+per scheme, the throughput of both implementations in conversions per second, the resulting
+speed-up and the memory (bytes and blocks) allocated per conversion are printed. Before timing, the outputs of
+both implementations are compared and any difference is reported.
+"""
+
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+import argparse
+import logging
+import timeit
+import tracemalloc
+
+from epcis_event_hash_generator.dl_normaliser import normaliser
+
+from dl_normaliser_corpus import SAMPLES, generate
+from reference_dl_normaliser import normaliser as reference_normaliser
+
+
+def _conversions_per_second(function, uris, number):
+    """Average number of calls of function per second over all uris."""
+    duration = timeit.timeit(lambda: [function(uri) for uri in uris], number=number)
+    return number * len(uris) / duration
+
+
+def _allocations_per_conversion(function, uris):
+    """Average (bytes, blocks) allocated and still held by a single call of function, i.e. its result and any memo,
+    over all uris. Each uri is converted once before, so that one-off allocations, e.g. of compiled patterns, are
+    left out. Each result is dropped before the next call.
+    """
+    for uri in uris:
+        function(uri)
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    size = count = 0
+    tracemalloc.start()
+    try:
+        for uri in uris:
+            before = tracemalloc.take_snapshot().filter_traces(ignored)
+            result = function(uri)
+            after = tracemalloc.take_snapshot().filter_traces(ignored)
+            for difference in after.compare_to(before, "traceback"):
+                size += difference.size_diff
+                count += difference.count_diff
+            del result
+    finally:
+        tracemalloc.stop()
+    return size / len(uris), count / len(uris)
+
+
+def run(corpus, number):
+    """Print a table of the per scheme benchmarks and return the number of outputs differing from the reference."""
+    differences = 0
+    print("{:<10} {:>6} {:>16} {:>16} {:>9} {:>14} {:>12}".format(
+        "scheme", "uris", "reference [1/s]", "normaliser [1/s]", "speed-up", "alloc [B/uri]", "blocks/uri"))
+    for scheme, uris in corpus.items():
+        for uri in uris:
+            if normaliser(uri) != reference_normaliser(uri):
+                differences += 1
+                print("DIFFERENT OUTPUT for '{}'".format(uri))
+
+        reference = _conversions_per_second(reference_normaliser, uris, number)
+        current = _conversions_per_second(normaliser, uris, number)
+        print("{:<10} {:>6} {:>16,.0f} {:>16,.0f} {:>8.1f}x {:>14.0f} {:>12.1f}".format(
+            scheme, len(uris), reference, current, current / reference, *_allocations_per_conversion(normaliser, uris)))
+    return differences
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dl_normaliser per scheme.")
+    parser.add_argument("-n", "--number", type=int, default=None,
+                        help="Number of passes over the corpus. Default: 2000 for the samples, 5 if generated.")
+    parser.add_argument("-g", "--generate", type=int, metavar="COUNT", default=0,
+                        help="Benchmark a generated corpus with COUNT URIs per scheme instead of the samples.")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the generated corpus.")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    if args.generate:
+        corpus = generate(args.generate, args.seed)
+        number = args.number or 5
+    else:
+        corpus = SAMPLES
+        number = args.number or 2000
+    exit(1 if run(corpus, number) else 0)
@@ -0,0 +1,299 @@
+"""Sample URIs for every scheme supported by the dl_normaliser, grouped by scheme.
+
+Used by the equivalence tests and the benchmarks of the dl_normaliser.
+Each group contains valid URIs as well as near misses which are expected to be rejected.
+Larger, realistic corpora for the same schemes can be generated with 'generate'.
+"""
+
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+import random
+
+from epcis_event_hash_generator.dl_normaliser import check_digit
+
+SAMPLES = {
+    "sgtin": [
+        'urn:epc:id:sgtin:4012345.011111.98%22',
+        'urn:epc:id:sgtin:415056789012.0.987654',
+        'urn:epc:id:sgtin:0614141.812345.6789%2F%26%25%22!%3F()',
+        'urn:epc:id:sgtin:0614141.107346.2017',
+        'urn:epc:id:sgtin:0614141.1073467.2017',
+    ],
+    "sscc": [
+        'urn:epc:id:sscc:4012345.3111111111',
+        'urn:epc:id:sscc:4012345.0000000011',
+        'urn:epc:id:sscc:4012345.0000000111',
+        'urn:epc:id:sscc:4012345.00000001',
+    ],
+    "sgln": [
+        'urn:epc:id:sgln:4012345.00005.122',
+        'urn:epc:id:sgln:4012345.00005.0',
+        'urn:epc:id:sgln:0614141.07346.1234',
+        'urn:epc:id:sgln:4012345.00011.987',
+    ],
+    "grai": [
+        'urn:epc:id:grai:4012345.00022.334455',
+        'urn:epc:id:grai:4012345.00022.',
+    ],
+    "giai": [
+        'urn:epc:id:giai:4012345.ABC345',
+        'urn:epc:id:giai:4012345.',
+    ],
+    "gsrn": [
+        'urn:epc:id:gsrn:4012345.0000006765',
+        'urn:epc:id:gsrn:4012345.9876540000',
+    ],
+    "gsrnp": [
+        'urn:epc:id:gsrnp:4012345.0000000007',
+        'urn:epc:id:gsrnp:4012345.0000098765',
+    ],
+    "gdti": [
+        'urn:epc:id:gdti:4012345.00009.PO-4711',
+        'urn:epc:id:gdti:987659999999..9',
+    ],
+    "cpi": [
+        'urn:epc:id:cpi:0614141.11111111111111-A%23%2F.1234',
+        'urn:epc:id:cpi:0614141.a.1234',
+    ],
+    "sgcn": [
+        'urn:epc:id:sgcn:4012345.67890.04711',
+        'urn:epc:id:sgcn:4012345.67890.ABC',
+    ],
+    "ginc": [
+        'urn:epc:id:ginc:0614141.xyz47%2F11',
+        'urn:epc:id:ginc:0614141.',
+    ],
+    "gsin": [
+        'urn:epc:id:gsin:4012345.222333444',
+        'urn:epc:id:gsin:4012345.999987654',
+    ],
+    "itip": [
+        'urn:epc:id:itip:4012345.011111.01.02.987',
+        'urn:epc:id:itip:4012345.011111.1.02.987',
+    ],
+    "upui": [
+        'urn:epc:id:upui:1234567.098765.51qIgY)%3C%26Jp3*j7SDB',
+        'urn:epc:id:upui:1234567.098765.',
+    ],
+    "pgln": [
+        'urn:epc:id:pgln:4000001.00000',
+        'urn:epc:id:pgln:999999999999.',
+        'urn:epc:id:pgln:4000001.0000',
+    ],
+    "lgtin": [
+        'urn:epc:class:lgtin:4012345.012345.Lot987',
+        'urn:epc:class:lgtin:4012345.012345.',
+    ],
+    "idpat": [
+        'urn:epc:idpat:sgtin:4012345.012345.*',
+        'urn:epc:idpat:grai:4012345.99999.*',
+        'urn:epc:idpat:gdti:4012345.11111.*',
+        'urn:epc:idpat:sgcn:4012345.22222.*',
+        'urn:epc:idpat:cpi:4012345.AB12.*',
+        'urn:epc:idpat:itip:4012345.012345.01.02.*',
+        'urn:epc:idpat:upui:4012345.012345.*',
+        'urn:epc:idpat:sgtin:4012345.012345.6789',
+    ],
+    "dl": [
+        'https://id.gs1.org/gtin/09780345418913',
+        'https://example.com/gtin/09780345418913/21/765tz?abc=211121',
+        'http://example.de/gtin-8/01/97803111',
+        'http://us-company-with-UPC.com/01/001122334455/ser/GHB',
+        'https://id.gs1.org/gtin/9780345418913/cpv/344/lot/1223/ser/765tz',
+        'https://fashion-corp.com/8006/040123451234560102/10/Lot-123/21/ser987',
+        'https://gs1.test.example.org/01/9780345418913/10/1223',
+        'https://id.gs1.org/00/340123453111111115',
+        'https://example.co.uk/party/4226350800008',
+        'https://id.gs1.org/414/4280000000002/254/12',
+        'https://id.gs1.org/8010/0628165987/8011/9876',
+        'http://example.de/01/97803',
+        'https://id.gs1.org/8006/04012345123456/22/ABCD/10/XYZ',
+    ],
+    "non-key": [
+        'https://ref.gs1.org/cbv/BizStep-shipping',
+        'https://ref.gs1.org/cbv/Disp-in_transit',
+        'http://transaction.acme.com/po/12345678',
+        'urn:epcglobal:cbv:bizstep:receiving',
+        'http://example.org/123/4012345ABC987/456/4711',
+        'urn:epc:id:unknown:4012345.011111.987',
+        'https://gs1.org/voc/Temperature',
+        '26.5',
+        'Hello World!',
+        'OBSERVE',
+    ],
+}
+"""Mapping of scheme name to a list of sample URIs."""
+
+
+def all_samples():
+    """Return all sample URIs of all schemes as a flat list."""
+    return [uri for uris in SAMPLES.values() for uri in uris]
+
+
+_DIGITS = "0123456789"
+_SERIAL_CHARACTERS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-._"
+_CPI_CHARACTERS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-"
+_ESCAPES = ["%2F", "%26", "%25", "%22", "%3F"]
+_DOMAINS = ["https://id.gs1.org", "https://example.com", "https://brand.example.co.uk/products",
+            "http://dl.example.org", "https://fashion-corp.com/p/de"]
+_SHORT_NAMES = {"00": "sscc", "01": "gtin", "253": "gdti", "255": "gcn", "401": "ginc", "402": "gsin", "414": "gln",
+                "417": "party", "8003": "grai", "8004": "giai", "8006": "itip", "8010": "cpid", "8017": "gsrnp",
+                "8018": "gsrn", "10": "lot", "21": "ser", "22": "cpv"}
+
+
+def _numeric(rng, length):
+    return "".join(rng.choice(_DIGITS) for _ in range(length))
+
+
+def _serial(rng, max_length, escapes=True):
+    serial = "".join(rng.choice(_SERIAL_CHARACTERS) for _ in range(rng.randint(1, max_length)))
+    if escapes and rng.random() < 0.1 and len(serial) < max_length:
+        position = rng.randint(0, len(serial))
+        serial = serial[:position] + rng.choice(_ESCAPES) + serial[position:]
+    return serial
+
+
+def _company_prefix(rng):
+    return _numeric(rng, rng.choice([7, 7, 8, 9, 10]))
+
+
+def _gtin_parts(rng):
+    company_prefix = _company_prefix(rng)
+    return company_prefix, _numeric(rng, 13 - len(company_prefix))
+
+
+def _sgtin(rng, scheme="urn:epc:id:sgtin:", max_serial=20):
+    company_prefix, reference = _gtin_parts(rng)
+    return "{}{}.{}.{}".format(scheme, company_prefix, reference, _serial(rng, max_serial))
+
+
+def _numeric_key(scheme, key_length):
+    def generate(rng):
+        company_prefix = _company_prefix(rng)
+        return "urn:epc:id:{}:{}.{}".format(scheme, company_prefix, _numeric(rng, key_length - len(company_prefix)))
+    return generate
+
+
+def _gln_based(scheme, serial):
+    def generate(rng):
+        company_prefix = _company_prefix(rng)
+        return "urn:epc:id:{}:{}.{}.{}".format(scheme, company_prefix, _numeric(rng, 12 - len(company_prefix)),
+                                               serial(rng))
+    return generate
+
+
+def _alphanumeric_key(scheme):
+    def generate(rng):
+        company_prefix = _company_prefix(rng)
+        return "urn:epc:id:{}:{}.{}".format(scheme, company_prefix, _serial(rng, 30 - len(company_prefix) - 3))
+    return generate
+
+
+def _cpi(rng):
+    company_prefix = _company_prefix(rng)
+    reference = "".join(rng.choice(_CPI_CHARACTERS) for _ in range(rng.randint(1, 30 - len(company_prefix))))
+    return "urn:epc:id:cpi:{}.{}.{}".format(company_prefix, reference, _numeric(rng, rng.randint(1, 12)))
+
+
+def _itip(rng):
+    company_prefix, reference = _gtin_parts(rng)
+    return "urn:epc:id:itip:{}.{}.{}.{}.{}".format(company_prefix, reference, _numeric(rng, 2), _numeric(rng, 2),
+                                                   _serial(rng, 20))
+
+
+def _idpat(rng):
+    company_prefix, reference = _gtin_parts(rng)
+    scheme = rng.choice(["sgtin", "upui", "itip", "grai", "gdti", "sgcn", "cpi"])
+    if scheme in ("sgtin", "upui"):
+        return "urn:epc:idpat:{}:{}.{}.*".format(scheme, company_prefix, reference)
+    if scheme == "itip":
+        return "urn:epc:idpat:itip:{}.{}.{}.{}.*".format(company_prefix, reference, _numeric(rng, 2), _numeric(rng, 2))
+    if scheme == "cpi":
+        return "urn:epc:idpat:cpi:{}.{}.*".format(company_prefix, "".join(
+            rng.choice(_CPI_CHARACTERS) for _ in range(rng.randint(1, 30 - len(company_prefix)))))
+    return "urn:epc:idpat:{}:{}.{}.*".format(scheme, company_prefix, reference[1:])
+
+
+def _dl(rng):
+    """A GS1 Digital Link URI derived from a canonical one, using short names, custom domains and query strings."""
+    path = _canonical_dl_path(rng)
+    segments = path.split("/")
+    if rng.random() < 0.5:
+        segments = [_SHORT_NAMES.get(segment, segment) if index % 2 == 0 else segment
+                    for index, segment in enumerate(segments)]
+    uri = rng.choice(_DOMAINS) + "/" + "/".join(segments)
+    if rng.random() < 0.2:
+        uri += "?linkType=all"
+    return uri
+
+
+def _canonical_dl_path(rng):
+    company_prefix, reference = _gtin_parts(rng)
+    gtin = reference[:1] + company_prefix + reference[1:]
+    gtin += str(check_digit(gtin))
+    choice = rng.random()
+    if choice < 0.3:
+        return "01/{}/21/{}".format(gtin, _serial(rng, 20, escapes=False))
+    if choice < 0.45:
+        return "01/{}/10/{}".format(gtin, _serial(rng, 20, escapes=False))
+    if choice < 0.55:
+        return "01/{}/10/{}/21/{}".format(gtin, _serial(rng, 8, escapes=False), _serial(rng, 8, escapes=False))
+    if choice < 0.6:
+        return "01/{}".format(gtin.lstrip("0") if rng.random() < 0.5 else gtin)
+    if choice < 0.7:
+        sscc = _numeric(rng, 17)
+        return "00/{}{}".format(sscc, check_digit(sscc))
+    if choice < 0.85:
+        gln = company_prefix + _numeric(rng, 12 - len(company_prefix))
+        gln += str(check_digit(gln))
+        return "414/{}".format(gln) if rng.random() < 0.5 else "414/{}/254/{}".format(gln, _serial(rng, 20, False))
+    if choice < 0.95:
+        return "8004/{}{}".format(company_prefix, _serial(rng, 30 - len(company_prefix), escapes=False))
+    return "8006/{}{}{}/21/{}".format(gtin, _numeric(rng, 2), _numeric(rng, 2), _serial(rng, 20, escapes=False))
+
+
+def _non_key(rng):
+    return rng.choice([
+        "https://ref.gs1.org/cbv/BizStep-" + rng.choice(["shipping", "receiving", "commissioning", "packing"]),
+        "https://ref.gs1.org/cbv/Disp-" + rng.choice(["in_transit", "active", "in_progress"]),
+        "urn:epcglobal:cbv:bizstep:" + rng.choice(["shipping", "receiving"]),
+        "http://transaction.example.com/po/" + _numeric(rng, 8),
+        "{}.{}".format(rng.randint(-40, 40), _numeric(rng, 1)),
+        rng.choice(["OBSERVE", "ADD", "DELETE", "KGM", "CEL"]),
+    ])
+
+
+_GENERATORS = {
+    "sgtin": _sgtin,
+    "sscc": _numeric_key("sscc", 17),
+    "sgln": _gln_based("sgln", lambda rng: "0" if rng.random() < 0.5 else _serial(rng, 20)),
+    "grai": _gln_based("grai", lambda rng: _serial(rng, 16)),
+    "giai": _alphanumeric_key("giai"),
+    "gsrn": _numeric_key("gsrn", 17),
+    "gsrnp": _numeric_key("gsrnp", 17),
+    "gdti": _gln_based("gdti", lambda rng: _serial(rng, 17)),
+    "cpi": _cpi,
+    "sgcn": _gln_based("sgcn", lambda rng: _numeric(rng, rng.randint(1, 12))),
+    "ginc": _alphanumeric_key("ginc"),
+    "gsin": _numeric_key("gsin", 16),
+    "itip": _itip,
+    "upui": lambda rng: _sgtin(rng, "urn:epc:id:upui:", 28),
+    "pgln": _numeric_key("pgln", 12),
+    "lgtin": lambda rng: _sgtin(rng, "urn:epc:class:lgtin:"),
+    "idpat": _idpat,
+    "dl": _dl,
+    "non-key": _non_key,
+}
+
+
+def generate(count=1000, seed=0):
+    """Generate a realistic corpus with count URIs for each scheme of SAMPLES.
+
+    The corpus is reproducible for a given seed. Apart from the non-key values, all
+    URIs are valid and expected to be converted by the dl_normaliser.
+    """
+    rng = random.Random(seed)
+    return {scheme: [generator(rng) for _ in range(count)] for scheme, generator in _GENERATORS.items()}
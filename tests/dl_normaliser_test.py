@@ -3,7 +3,16 @@ try:
 except ImportError:
     from context import epcis_event_hash_generator  # noqa: F401
 
-from epcis_event_hash_generator.dl_normaliser import normaliser
+import random
+
+import pytest
+
+from epcis_event_hash_generator import dl_normaliser
+from epcis_event_hash_generator.dl_normaliser import (normaliser, normalise_many, check_digit, check_digits,
+                                                      parse_epc_uri, epc_key_to_dl, EPCKey)
+
+from dl_normaliser_corpus import all_samples, generate
+from reference_dl_normaliser import normaliser as reference_normaliser, check_digit as reference_check_digit
 
 
 def test_good_epc_conversion():
@@ -140,3 +149,102 @@ def test_regression_52():
     assert normaliser("urn:epc:id:gsrn:4012345.9876540000") == "https://id.gs1.org/8018/401234598765400000"
     assert normaliser("urn:epc:id:gsrnp:4012345.0000098765") == "https://id.gs1.org/8017/401234500000987658"
     assert normaliser("urn:epc:id:gsin:4012345.999987654") == "https://id.gs1.org/402/40123459999876541"
+
+
+def test_identical_to_reference_implementation():
+    """The normaliser must produce exactly the output of the original sequential implementation."""
+    for uri in all_samples():
+        assert normaliser(uri) == reference_normaliser(uri), "Output for {} differs from reference".format(uri)
+
+
+def test_generated_corpus():
+    """The generated benchmark corpus consists of valid URIs (except the non-key values) and converts like the reference"""
+    corpus = generate(100, seed=4711)
+    assert corpus == generate(100, seed=4711)
+    for scheme, uris in corpus.items():
+        assert len(uris) == 100
+        for uri in uris:
+            assert (normaliser(uri) is None) == (scheme == "non-key"), uri
+            assert normaliser(uri) == reference_normaliser(uri), uri
+
+
+def test_normalise_many():
+    uris = ['urn:epc:id:sscc:4012345.3111111111', 'Hello World!', 'urn:epc:id:sscc:4012345.3111111111',
+            'https://id.gs1.org/gtin/09780345418913']
+    expected = ["https://id.gs1.org/00/340123451111111111", None, "https://id.gs1.org/00/340123451111111111",
+                "https://id.gs1.org/01/09780345418913"]
+
+    assert normalise_many(uris) == expected
+    assert normalise_many(iter(uris)) == expected
+    assert normalise_many(uris, as_mapping=True) == dict(zip(uris, expected))
+    assert normalise_many([]) == []
+
+
+def test_normalise_many_matches_normaliser():
+    uris = list(all_samples()) * 3
+    assert normalise_many(uris) == [normaliser(uri) for uri in uris]
+
+
+def test_parse_epc_uri():
+    assert parse_epc_uri('urn:epc:id:sgtin:4012345.011111.987') == EPCKey('sgtin', '4012345', '011111', '987', None)
+    assert parse_epc_uri('urn:epc:id:sgln:4012345.00005.0') == EPCKey('sgln', '4012345', '00005', None, '0')
+    assert parse_epc_uri('urn:epc:id:itip:4012345.011111.01.02.987') == EPCKey(
+        'itip', '4012345', '011111', '987', '0102')
+    assert parse_epc_uri('urn:epc:class:lgtin:4012345.012345.998877') == EPCKey(
+        'lgtin', '4012345', '012345', '998877', None)
+    assert parse_epc_uri('urn:epc:idpat:cpi:0614141.123ABC.*') == EPCKey('cpi', '0614141', '123ABC', None, None)
+    assert parse_epc_uri('urn:epc:id:pgln:999999999999.') == EPCKey('pgln', '999999999999', '', None, None)
+
+    assert parse_epc_uri('urn:epc:id:sgtin:4012345.011111.') is None
+    assert parse_epc_uri('urn:epc:id:sgtin:40123.0111111.987') is None
+    assert parse_epc_uri('urn:epc:id:sscc:4012345.311111111') is None
+    assert parse_epc_uri('urn:epc:id:giai:4012345.ABC%') is None
+    assert parse_epc_uri('urn:epc:id:unknown:4012345.011111.987') is None
+    # a trailing line break is not part of the URI
+    assert parse_epc_uri('urn:epc:id:sscc:4012345.3111111111\n') is None
+
+
+def test_epc_key_to_dl():
+    key = parse_epc_uri('urn:epc:id:sgtin:4012345.011111.987')
+    assert epc_key_to_dl(key) == "https://id.gs1.org/01/04012345111118/21/987"
+    assert epc_key_to_dl(key, checkdigit=8) == "https://id.gs1.org/01/04012345111118/21/987"
+    assert epc_key_to_dl(EPCKey('giai', '4012345', 'ABC:345', None, None)) == "https://id.gs1.org/8004/4012345ABC%3A345"
+
+
+def test_dl_uri_parser_matches_reference():
+    hosts = ['https://id.gs1.org', 'http://example.com/some/path', 'https:', 'https://idXgs1Yorg']
+    keys = ['gtin/9780345418913', '01/97803454', 'itip/123456789012345678', 'gln/4012345000054', '8010/0614141ABC/X',
+            'gdti/4012345000092PO-4711', '8004/4012345ABC345', 'sscc/1234', '01/1234']
+    tails = ['', '/', '/ser/ABC', '/lot/ABC/ser/1-2', '/cpv/X/lot/ABC/ser/1-2', '/cpv/' + 'X' * 20, '/254/122',
+             '/10/lot/10/lot', '/ser/gtin', '/235/' + 'a' * 28, '/8011/1234', '#fragment', '?linkType=all', '?a/b']
+    for host in hosts:
+        for key in keys:
+            for tail in tails:
+                uri = host + '/' + key + tail
+                assert normaliser(uri) == reference_normaliser(uri), "Output for {} differs from reference".format(uri)
+
+
+def test_check_digit_matches_reference_for_every_key_length():
+    """GTIN-8 (7 digits w/o check digit) up to SSCC/GSRN (17) and beyond, including edge cases like all nines"""
+    rng = random.Random(4711)
+    for length in range(0, 20):
+        keys = ["0" * length, "9" * length] + ["".join(rng.choice("0123456789") for _ in range(length))
+                                               for _ in range(100)]
+        expected = [reference_check_digit(key) for key in keys]
+        assert [check_digit(key) for key in keys] == expected
+        assert check_digits(keys) == expected
+
+
+def test_check_digits_without_numpy(monkeypatch):
+    monkeypatch.setattr(dl_normaliser, "numpy", None)
+    keys = ["4012345011111", "40123453111111111", "9780311"] * 100
+    assert check_digits(keys) == [reference_check_digit(key) for key in keys]
+
+
+def test_check_digits_mixed_column():
+    keys = ["4012345011111", "٤٠١٢٣٤٥٠١١١١١", "40123453111111111", ""] * 50
+    assert check_digits(keys) == [reference_check_digit(key) for key in keys]
+    with pytest.raises(ValueError):
+        check_digits(["4012345A11111"] * 100)
+    with pytest.raises(ValueError):
+        check_digit("4012345A11111")
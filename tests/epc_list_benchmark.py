@@ -0,0 +1,87 @@
+"""Benchmark the hashing of events with huge EPC lists against processing each EPC as a child of its own.
+
+Run from the tests directory:
+
+    python epc_list_benchmark.py [-e EPCS ...] [-n NUMBER] [-s SEED]
+
+For each given number of EPCs, an object event with an EPC list and an aggregation event with child EPCs of that
+size are generated (serialised SGTINs, SSCCs and GS1 Digital Link URIs, some of them repeated). The time to hash
+both events, the resulting EPCs per second and the speed-up over processing the EPCs one by one, i.e. without the
+bulk processing of lists of leaves, are printed. Before timing, the hashes of both are compared and any difference
+is reported.
+"""
+
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+import argparse
+import logging
+import random
+import timeit
+
+from epcis_event_hash_generator.hash_generator import EventHasher
+
+
+class _PerChildEventHasher(EventHasher):
+    """EventHasher processing each EPC as a child of its own, the reference of the benchmark."""
+
+    def _leaves_to_pre_hash_strings(self, children, indices, entry, reduced):
+        return None
+
+
+def _epc(rng):
+    company = rng.choice(["4012345", "0614141", "9520123"])
+    serial = rng.randrange(10 ** 9)
+    return rng.choice([
+        "urn:epc:id:sgtin:{}.0{}.{}".format(company, rng.randrange(10000, 99999), serial),
+        "urn:epc:id:sscc:{}.{:010d}".format(company, serial),
+        "https://id.gs1.org/01/0{}{:05d}8/21/{}".format(company, rng.randrange(100000), serial),
+    ])
+
+
+def generate(epcs, seed):
+    """Return an event list with an object event and an aggregation event, each with the given number of EPCs."""
+    rng = random.Random(seed)
+    values = [_epc(rng) for _ in range(epcs)]
+    values[::10] = [rng.choice(values) for _ in values[::10]]  # repeated reads
+    common = [("eventTime", "2020-03-04T11:00:30.000+01:00", []), ("eventTimeZoneOffset", "+01:00", []),
+              ("bizStep", "urn:epcglobal:cbv:bizstep:shipping", []), ("action", "OBSERVE", [])]
+    object_event = ("ObjectEvent", "", common + [("epcList", "", [("epc", value, []) for value in values])])
+    aggregation_event = ("AggregationEvent", "", common + [
+        ("parentID", "urn:epc:id:sscc:4012345.0000000001", []),
+        ("childEPCs", "", [("epc", value, []) for value in reversed(values)])])
+    return ("EventList", "", [object_event, aggregation_event])
+
+
+def run(sizes, number, seed):
+    """Print a table of the benchmarks per number of EPCs and return the number of differing hashes."""
+    differences = 0
+    print("{:>8} {:>16} {:>16} {:>14} {:>9}".format("epcs", "per child [ms]", "bulk [ms]", "bulk [epc/s]",
+                                                    "speed-up"))
+    for epcs in sizes:
+        events = generate(epcs, seed)
+        reference_hasher = _PerChildEventHasher()
+        hasher = EventHasher()
+        if reference_hasher.hashes(events) != hasher.hashes(events):
+            differences += 1
+            print("DIFFERENT HASHES for {} EPCs".format(epcs))
+
+        reference = timeit.timeit(lambda: reference_hasher.hashes(events), number=number) / number
+        current = timeit.timeit(lambda: hasher.hashes(events), number=number) / number
+        print("{:>8} {:>16.1f} {:>16.1f} {:>14,.0f} {:>8.1f}x".format(
+            epcs, 1000 * reference, 1000 * current, 2 * epcs / current, reference / current))
+    return differences
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the hashing of events with huge EPC lists.")
+    parser.add_argument("-e", "--epcs", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Numbers of EPCs per event. Default: 1000 10000 100000.")
+    parser.add_argument("-n", "--number", type=int, default=3, help="Number of passes per size. Default: 3.")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the generated EPCs.")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    exit(1 if run(args.epcs, args.number, args.seed) else 0)
@@ -0,0 +1,65 @@
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+import pytest
+
+from epcis_event_hash_generator.event_filter import EventFilter
+from epcis_event_hash_generator.events_from_file_reader import event_list_from_file
+from epcis_event_hash_generator.hash_generator import EventHasher, derive_prehashes_from_events, iter_hashes, \
+    iter_prehashes
+
+TEST_FILE_PATH = "examples/"
+
+EVENTS = ("EventList", "", [
+    ("ObjectEvent", "", [("eventTime", "2020-03-04T11:00:30.000+01:00", []),
+                         ("bizStep", "urn:epcglobal:cbv:bizstep:shipping", [])]),
+    ("AggregationEvent", "", [("eventTime", "2020-03-04T10:00:30.000Z", []),
+                              ("bizStep", "https://ref.gs1.org/cbv/BizStep-receiving", [])]),
+    ("ObjectEvent", "", [("eventTime", "2020-03-04T12:00:00.000+01:00", []), ("bizStep", " shipping ", [])]),
+    ("ObjectEvent", "", [("bizStep", "https://example.com/bizstep/exampling", [])]),
+    ("ObjectEvent", "", [("eventTime", "no time", [])]),
+])
+
+
+def _selected(event_filter):
+    return [index for (index, event) in enumerate(EVENTS[2]) if event_filter(event)]
+
+
+def test_criteria():
+    assert _selected(EventFilter()) == [0, 1, 2, 3, 4]
+    assert _selected(EventFilter(event_types=["AggregationEvent", "TransformationEvent"])) == [1]
+    assert _selected(EventFilter(biz_steps=["shipping"])) == [0, 2]
+    assert _selected(EventFilter(biz_steps=["https://ref.gs1.org/cbv/BizStep-shipping"])) == [0, 2]
+    assert _selected(EventFilter(biz_steps=["urn:epcglobal:cbv:bizstep:receiving",
+                                            "https://example.com/bizstep/exampling"])) == [1, 3]
+    assert _selected(EventFilter(since="2020-03-04T10:00:30Z")) == [0, 1, 2]
+    assert _selected(EventFilter(since="2020-03-04T10:00:30.001Z")) == [2]
+    assert _selected(EventFilter(until="2020-03-04T12:00:00+01:00")) == [0, 1]  # exclusive
+    assert _selected(EventFilter(["ObjectEvent"], ["shipping"], until="2020-03-04T11:00:00.001Z")) == [0, 2]
+
+
+def test_invalid_bounds_and_malformed_events():
+    with pytest.raises(ValueError):
+        EventFilter(since="yesterday")
+    event_filter = EventFilter(biz_steps=["shipping"], since="2020-01-01T00:00:00Z")
+    assert not event_filter(("ObjectEvent", "", None))
+    assert not event_filter(("ObjectEvent", "", [("bizStep", 42, [])]))
+
+
+def test_filtered_events_keep_their_index():
+    events = event_list_from_file(TEST_FILE_PATH + "epcisDocWithVariousEventTypes.xml")
+    event_filter = EventFilter(event_types=["AggregationEvent", "TransformationEvent"])
+
+    expected = [result for result in iter_hashes(events, keep_prehashes=True) if event_filter(events[2][result[0]])]
+    assert 0 < len(expected) < len(events[2])
+    assert list(iter_hashes(events, keep_prehashes=True, event_filter=event_filter)) == expected
+    assert list(iter_hashes(events, keep_prehashes=True, event_filter=event_filter, columnar=True)) == expected
+    assert derive_prehashes_from_events(events, event_filter=event_filter) == [prehash for (_, prehash, _) in expected]
+    assert list(iter_prehashes(events, workers=2, chunk_size=1, columnar=True, event_filter=event_filter)) == \
+        [(index, prehash) for (index, prehash, _) in expected]
+
+    parallel = EventHasher(workers=2, chunk_size=1, keep_prehashes=True, event_filter=event_filter)
+    assert parallel._in_parallel(events)
+    assert list(parallel.iter_hashes(events)) == expected
@@ -0,0 +1,251 @@
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+from concurrent.futures import ThreadPoolExecutor
+from os import walk
+import tracemalloc
+
+import pytest
+
+from epcis_event_hash_generator.events_from_file_reader import event_list_from_file
+from epcis_event_hash_generator.hash_generator import EventHasher, derive_prehashes_from_events, \
+    calculate_hashes_from_pre_hashes, iter_hashes, iter_prehashes, calculate_hash_from_fragments, HASH_CHUNK_SIZE, \
+    _fingerprint, DUPLICATE_CACHE_SIZE, enable_duplicate_reuse, disable_duplicate_reuse
+from epcis_event_hash_generator import metrics
+from epcis_event_hash_generator.metrics import StageTimer
+
+TEST_FILE_PATH = "examples/"
+
+BROKEN_EVENT = ("ObjectEvent", "", [("bizStep", 42, [])])  # cannot be processed and is left out
+
+
+def _event_lists():
+    return [event_list_from_file(TEST_FILE_PATH + f) for f in sorted(next(walk(TEST_FILE_PATH))[2])
+            if f.endswith("xml") or f.endswith("jsonld")]
+
+
+def _distinct_events():
+    """The events of all examples, each once: the XML and JSON variants of an example convert to equal events."""
+    return list({repr(event): event for event_list in _event_lists() for event in event_list[2]}.values())
+
+
+def test_event_hasher_matches_module_functions():
+    hasher = EventHasher(join_by=r"\n", hashalg="sha512", value_cache_size=32)
+    assert hasher.join_by == "\n"
+
+    for events in _event_lists():
+        expected = derive_prehashes_from_events(events, r"\n")
+        assert hasher.prehashes(events) == expected
+        assert hasher.hashes(events) == calculate_hashes_from_pre_hashes(expected, "sha512")
+        assert [hasher.prehash(event) for event in events[2]] == expected
+    assert hasher.value_cache.stats().hits > 0
+
+
+def test_hashers_in_parallel_threads():
+    event_lists = _event_lists()
+    join_strings = ["", "\n", "|", "\t"]
+    expected = {join_by: [derive_prehashes_from_events(events, join_by) for events in event_lists]
+                for join_by in join_strings}
+
+    def run(join_by):
+        hasher = EventHasher(join_by)
+        return [[hasher.prehashes(events) for events in event_lists] for _ in range(3)]
+
+    with ThreadPoolExecutor(max_workers=len(join_strings)) as pool:
+        results = dict(zip(join_strings, pool.map(run, join_strings)))
+
+    for join_by in join_strings:
+        assert results[join_by] == [expected[join_by]] * 3
+
+
+def test_parallel_prehashes_match_serial():
+    events = _distinct_events()
+    event_list = ("EventList", "", events[:5] + [BROKEN_EVENT] + events[5:])
+
+    serial = EventHasher(hashalg="sha384")
+    parallel = EventHasher(hashalg="sha384", workers=2, chunk_size=4)
+    assert parallel._in_parallel(event_list) and not serial._in_parallel(event_list)
+
+    expected = serial.prehashes_and_hashes(event_list)
+    assert len(expected[0]) == len(events)
+    assert parallel.prehashes_and_hashes(event_list) == expected
+    assert parallel.prehashes(event_list) == expected[0]
+    assert derive_prehashes_from_events(event_list, workers=3, chunk_size=7) == expected[0]
+
+
+def test_columnar_engine_matches_per_event_engine():
+    events = _distinct_events()
+    event_list = ("EventList", "", events[:5] + [BROKEN_EVENT] + events[5:] + events[:3])
+
+    expected = EventHasher(r"\n").prehashes(event_list)
+    assert len(expected) == len(events) + 3
+    assert EventHasher(r"\n", columnar=True).prehashes(event_list) == expected
+    assert [prehash for (_, prehash) in EventHasher(r"\n", columnar=True).iter_prehashes(event_list)] == expected
+    assert derive_prehashes_from_events(event_list, r"\n", workers=2, chunk_size=8, columnar=True) == expected
+
+    # all values and timestamps are canonized up front, each distinct value once
+    timer = StageTimer()
+    assert EventHasher(columnar=True, hook=timer).hashes(event_list) == EventHasher().hashes(event_list)
+    stats = timer.stats()
+    assert stats["column precomputation"].calls == 1
+    assert "canonicalisation" not in stats and "timestamps" not in stats and "epc precomputation" not in stats
+
+
+def test_small_event_lists_stay_serial():
+    events = _event_lists()[0]
+    assert not EventHasher(workers=4, chunk_size=len(events[2]))._in_parallel(events)
+    with pytest.raises(ValueError):
+        EventHasher(chunk_size=0)
+
+
+def test_iter_hashes_yield_results_per_event():
+    for events in _event_lists():
+        expected = derive_prehashes_from_events(events)
+        results = list(iter_hashes(events, "sha3-256", keep_prehashes=True))
+
+        assert [index for (index, _, _) in results] == list(range(len(events[2])))
+        assert [prehash for (_, prehash, _) in results] == expected
+        assert [hash_string for (_, _, hash_string) in results] == \
+            calculate_hashes_from_pre_hashes(expected, "sha3-256")
+        assert list(iter_prehashes(events)) == list(enumerate(expected))
+
+
+def test_iter_prehashes_consumes_generators_lazily():
+    events = [event for event_list in _event_lists() for event in event_list[2]]
+    consumed = []
+
+    def generate():
+        for (index, event) in enumerate(events[:2] + [BROKEN_EVENT] + events[2:]):
+            consumed.append(index)
+            yield event
+
+    results = EventHasher().iter_prehashes(("EventList", "", generate()))
+    assert next(results)[0] == 0 and consumed == [0]
+    assert [index for (index, _) in results] == [1] + list(range(3, len(events) + 1))  # 2 cannot be processed
+
+
+def test_incremental_hashing_without_pre_hash_strings():
+    events = [event for event_list in _event_lists() for event in event_list[2]]
+    raw_data = "".join("QUJDRA=="[i % 8] for i in range(3 * HASH_CHUNK_SIZE))
+    events.append(("ObjectEvent", "", [("eventTime", "2020-03-04T10:00:30.000Z", []),
+                                       ("sensorElementList", "", [("sensorElement", "", [
+                                           ("sensorReport", "", [("rawData", raw_data, [])]),
+                                           ("sensorReport", "", [("rawData", raw_data[1:], [])])])])]))
+    event_list = ("EventList", "", events)
+    algorithms = ["sha256", "blake2b-512"]
+    expected = EventHasher(hashalg=algorithms).prehashes_and_hashes(event_list)
+
+    hasher = EventHasher(hashalg=algorithms)
+    assert hasher.hashes(event_list) == expected[1]
+    assert list(hasher.iter_hashes(event_list)) == [(index, None, hash_value)
+                                                    for (index, hash_value) in enumerate(expected[1])]
+    assert [calculate_hash_from_fragments(hasher.prehash_fragments(event), "sha256") for event in events] == \
+        [hash_values[0] for hash_values in expected[1]]
+
+    parallel = EventHasher(hashalg=algorithms, workers=2, chunk_size=8)
+    assert list(parallel.iter_hashes(event_list)) == list(hasher.iter_hashes(event_list))
+    assert list(EventHasher(hashalg=algorithms, keep_prehashes=True).iter_hashes(event_list)) == \
+        [(index, prehash, hash_value) for (index, (prehash, hash_value)) in enumerate(zip(*expected))]
+
+
+def test_identical_events_reuse_results():
+    events = _distinct_events()
+    # equal copies (not the same objects) of each event, the first three evicted from a small cache in between
+    copies = [event_list_from_file(TEST_FILE_PATH + "ReferenceEventHashAlgorithm.xml")[2][0]] * 3 + events[:3]
+    retransmitted = ("EventList", "", events + copies + [("ObjectEvent", "", [("eventTime", "no time", None)])] * 2)
+
+    expected = EventHasher().prehashes_and_hashes(retransmitted)
+    hasher = EventHasher(duplicate_cache_size=DUPLICATE_CACHE_SIZE)
+    assert hasher.prehashes_and_hashes(retransmitted) == expected
+    assert len(expected[0]) == len(events) + len(copies)
+    assert hasher.reused_events == len(copies)
+    assert EventHasher().reused_events == 0
+
+    # opt-in for the module level functions
+    timer = metrics.install_hook()
+    try:
+        assert derive_prehashes_from_events(retransmitted) == expected[0]
+        assert "reused events" not in timer.stats()
+        enable_duplicate_reuse()
+        assert derive_prehashes_from_events(retransmitted) == expected[0]
+        assert timer.stats()["reused events"].calls == len(copies)
+    finally:
+        disable_duplicate_reuse()
+        metrics.remove_hook()
+
+    hasher = EventHasher(duplicate_cache_size=2)
+    assert hasher.prehashes_and_hashes(retransmitted) == expected
+    assert hasher.reused_events == 2
+
+
+def test_fingerprint_is_a_fixed_size_digest():
+    event = ("ObjectEvent", "", [("epcList", "", [("epc", "urn:epc:id:sgtin:4012345.011111.{}".format(serial), [])
+                                                  for serial in range(1000)])])
+    assert len(_fingerprint(event)) == 16
+    assert _fingerprint(event) == _fingerprint(("ObjectEvent", "", [("epcList", "", list(event[2][0][2]))]))
+    assert _fingerprint(("a", "b", [])) != _fingerprint(("ab", "", [])) != _fingerprint(("a", "b", None))
+
+
+def test_user_extensions_and_remaining_elements():
+    ext = "{https://ns.example.com/epcis/}"
+    event = ("ObjectEvent", "", [
+        ("eventTime", "2020-01-01T00:00:00Z", []), ("action", "OBSERVE", []),
+        ("readPoint", "", [("id", "urn:epc:id:sgln:4012345.00001.0", []), (ext + "b", "2", []),
+                           (ext + "a", "", [(ext + "z", "1", []), (ext + "y", "", [])])]),
+        (ext + "list", "", [("bizTransaction", "b", []), ("bizTransaction", "a", [])]),
+        (ext + "single", "", [((ext + "type", "t", []), (ext + "value", "v", []))])])
+
+    assert EventHasher("\n").prehash(event).split("\n") == [
+        "eventType=ObjectEvent", "eventTime=2020-01-01T00:00:00.000Z", "action=OBSERVE",
+        "readPointid=https://id.gs1.org/414/4012345000016", ext + "a" + ext + "y", ext + "z=1", ext + "b=2",
+        ext + "listbizTransaction=b", "bizTransaction=a",  # bizTransactions are not sorted
+        ext + "single" + ext + "type=t", ext + "value=v"]
+    assert EventHasher().prehash(event) == EventHasher("\n").prehash(event).replace("\n", "")
+
+
+def test_epc_lists_processed_in_bulk():
+    epcs = ["urn:epc:id:sgtin:4012345.011111.{}".format(serial) for serial in range(1000, 0, -1)]
+    event = ("AggregationEvent", "", [
+        ("eventTime", "2020-01-01T00:00:00Z", []), ("action", "ADD", []),
+        ("childEPCs", "", [("epc", epc, []) for epc in epcs + [" " + epcs[0] + "\n", "", " "]]),
+        ("epcList", "", [("epc", "urn:epc:id:sscc:4012345.0000000001", []), ("epc", "", [("x", "1", [])])])])
+
+    prehash = EventHasher("\n").prehash(event).split("\n")
+    # an EPC with children is not a leaf, so that epcList is processed child by child
+    assert prehash[:4] == ["eventType=AggregationEvent", "eventTime=2020-01-01T00:00:00.000Z",
+                           "epcListepc=https://id.gs1.org/00/040123450000000016",
+                           "childEPCsepc=https://id.gs1.org/01/04012345111118/21/1"]
+    # sorted as strings, duplicates kept, empty EPCs left out
+    assert prehash[4:1004] == sorted("epc=https://id.gs1.org/01/04012345111118/21/" + epc.rsplit(".", 1)[1]
+                                     for epc in epcs + [epcs[0]])[1:]
+    assert prehash[1004:] == ["action=ADD", "epcListepcx=1"]
+
+
+def test_streaming_memory_does_not_grow_with_reused_events():
+    def generate(count):
+        for number in range(count):
+            epcs = ["urn:epc:id:sgtin:4012345.0{}.{}".format(10000 + number, serial) for serial in range(2000)]
+            yield ("ObjectEvent", "", [("eventTime", "2020-01-01T00:00:00Z", []),
+                                       ("epcList", "", [("epc", epc, []) for epc in epcs])])
+
+    def peak(count):
+        hasher = EventHasher(keep_prehashes=True, duplicate_cache_size=DUPLICATE_CACHE_SIZE)
+        tracemalloc.start()
+        try:
+            for (_, prehash, _) in hasher.iter_hashes(("EventList", "", generate(count))):
+                assert prehash
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # the pre hash strings yielded are not kept, neither by the caller nor by the hasher
+    assert peak(16) < 1.5 * peak(4)
+
+    # only the hashes are kept for identical events, if no pre hash strings are built
+    repeated = ("EventList", "", [next(generate(1))] * 3)
+    for keep_prehashes in (False, True):
+        hasher = EventHasher(keep_prehashes=keep_prehashes, duplicate_cache_size=DUPLICATE_CACHE_SIZE)
+        assert len(list(hasher.iter_hashes(repeated))) == 3
+        assert hasher.reused_events == (0 if keep_prehashes else 2)
@@ -0,0 +1,32 @@
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+import copy
+from os import walk
+
+from epcis_event_hash_generator.hash_generator import derive_prehashes_from_events
+from epcis_event_hash_generator.events_from_file_reader import event_list_from_file
+
+TEST_FILE_PATH = "examples/"
+
+
+def test_events_are_not_modified():
+    for filename in next(walk(TEST_FILE_PATH))[2]:
+        if filename.endswith("xml") or filename.endswith("jsonld"):
+            events = event_list_from_file(TEST_FILE_PATH + filename)
+            original = copy.deepcopy(events)
+            prehashes = derive_prehashes_from_events(events)
+
+            assert events == original, "Events of {} modified".format(filename)
+            assert derive_prehashes_from_events(events) == prehashes
+
+
+def test_repeated_event_object():
+    """The very same event object occurring twice in the event list yields the same pre hash twice"""
+    events = event_list_from_file(TEST_FILE_PATH + "ReferenceEventHashAlgorithm.xml")
+    event = events[2][0]
+
+    expected = derive_prehashes_from_events(("EventList", "", [event]))
+    assert derive_prehashes_from_events(("EventList", "", [event, event])) == expected * 2
@@ -0,0 +1,71 @@
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from epcis_event_hash_generator import hash_generator
+from epcis_event_hash_generator.hash_generator import HASH_ALGORITHMS, calculate_hash_from_pre_hash, \
+    calculate_hashes_from_pre_hashes, calculate_hash_from_fragments, register_hash_algorithm
+
+PRE_HASH = "eventType=ObjectEventeventTime=2020-03-04T10:00:30.000ZeventTimeZoneOffset=+01:00"
+
+
+def test_several_algorithms_at_once():
+    names = list(HASH_ALGORITHMS)
+    hashes = calculate_hash_from_pre_hash(PRE_HASH, names)
+    assert hashes == [calculate_hash_from_pre_hash(PRE_HASH, name) for name in names]
+
+    assert hashes[0] == "ni:///sha-256;" + hashlib.sha256(PRE_HASH.encode("utf-8")).hexdigest() + "?ver=CBV2.0"
+    assert hashes[names.index("blake2b-256")] == \
+        "ni:///blake2b-256;" + hashlib.blake2b(PRE_HASH.encode("utf-8"), digest_size=32).hexdigest() + "?ver=CBV2.0"
+    assert calculate_hashes_from_pre_hashes([PRE_HASH, ""], ["sha3-256", "sha256"]) == \
+        [calculate_hash_from_pre_hash(PRE_HASH, ["sha3-256", "sha256"]),
+         calculate_hash_from_pre_hash("", ["sha3-256", "sha256"])]
+
+
+def test_large_pre_hashes_are_hashed_in_threads(monkeypatch):
+    expected = calculate_hash_from_pre_hash(PRE_HASH * 10, ["sha256", "sha512", "sha3-256"])
+    monkeypatch.setattr(hash_generator, "HASH_THREADING_THRESHOLD", 16)
+    assert calculate_hash_from_pre_hash(PRE_HASH * 10, ["sha256", "sha512", "sha3-256"]) == expected
+
+
+def test_large_pre_hash_fragments_are_hashed_in_threads(monkeypatch):
+    algorithms = ["sha256", "sha512", "sha3-256"]
+    fragments = [PRE_HASH[offset:offset + 7] for offset in range(0, len(PRE_HASH), 7)] * 10
+    expected = calculate_hash_from_pre_hash("".join(fragments), algorithms)
+
+    executors = []
+
+    class CountingThreadPoolExecutor(ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            executors.append(self)
+
+    monkeypatch.setattr(hash_generator, "ThreadPoolExecutor", CountingThreadPoolExecutor)
+    assert calculate_hash_from_fragments(fragments, algorithms) == expected
+    assert calculate_hash_from_fragments(fragments, "sha512") == expected[1]
+    assert not executors
+
+    monkeypatch.setattr(hash_generator, "HASH_CHUNK_SIZE", 50)
+    monkeypatch.setattr(hash_generator, "HASH_THREADING_THRESHOLD", 200)  # 3 batches of 4 chunks, 3 chunks remaining
+    assert calculate_hash_from_fragments(fragments, algorithms) == expected
+    assert len(executors) == 1
+    assert calculate_hash_from_fragments(fragments, "sha512") == expected[1]
+    assert len(executors) == 1
+
+
+@pytest.mark.skipif("sha512_256" not in hashlib.algorithms_available, reason="sha512_256 not provided by OpenSSL")
+def test_register_hash_algorithm(monkeypatch):
+    monkeypatch.setattr(hash_generator, "HASH_ALGORITHMS", dict(HASH_ALGORITHMS))
+    with pytest.raises(ValueError):
+        calculate_hash_from_pre_hash(PRE_HASH, "sha512-256")
+
+    register_hash_algorithm("sha512-256", "sha-512-256", functools.partial(hashlib.new, "sha512_256"))
+    assert calculate_hash_from_pre_hash(PRE_HASH, "sha512-256") == \
+        "ni:///sha-512-256;" + hashlib.new("sha512_256", PRE_HASH.encode("utf-8")).hexdigest() + "?ver=CBV2.0"
@@ -0,0 +1,95 @@
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+import sys
+from os import walk
+
+from epcis_event_hash_generator import events_from_file_reader, hash_generator, interning
+from epcis_event_hash_generator.__main__ import epcis_hash_from_file
+from epcis_event_hash_generator.interning import InternPool, memory_report
+
+TEST_FILE_PATH = "examples/"
+
+
+def test_intern_pool_shares_equal_strings():
+    pool = InternPool()
+    first = "".join(["urn:epc:id:sgln:", "4012345.00001.0"])
+    second = "".join(["urn:epc:id:sgln:", "4012345.00001.0"])
+    assert first is not second
+
+    assert pool.intern(first) is first
+    assert pool.intern(second) is first
+    assert pool.intern("OBSERVE") == "OBSERVE"
+    stats = pool.stats()
+    assert (stats.lookups, stats.distinct) == (3, 2)
+    assert stats.saved_bytes > 0
+
+    pool.clear()
+    assert len(pool) == 0
+    assert tuple(pool.stats()) == (0, 0, 0)
+
+
+def test_memory_report_counts_shared_strings_once():
+    value = "".join(["urn:epc:id:sgln:", "4012345.00001.0"])
+    copy = "".join(["urn:epc:id:sgln:", "4012345.00001.0"])
+    shared = memory_report(("readPoint", "", [("id", value, []), ("id", value, [])]))
+    separate = memory_report(("readPoint", "", [("id", value, []), ("id", copy, [])]))
+
+    assert shared.strings == separate.strings == 6
+    assert shared.distinct_strings == separate.distinct_strings - 1
+    assert shared.string_bytes < separate.string_bytes
+    assert shared.containers == 6
+
+
+def test_memory_report_counts_shared_containers_once():
+    def children():
+        return [("id", "urn:epc:id:sgln:4012345.00001.0", [])]
+
+    shared_children = children()
+    shared = memory_report(("EventList", "", [("readPoint", "", shared_children),
+                                              ("bizLocation", "", shared_children)]))
+    separate = memory_report(("EventList", "", [("readPoint", "", children()), ("bizLocation", "", children())]))
+
+    assert (shared.containers, separate.containers) == (7, 10)
+    assert separate.container_bytes - shared.container_bytes == \
+        sys.getsizeof(shared_children) + sys.getsizeof(shared_children[0]) + sys.getsizeof(shared_children[0][2])
+    assert (shared.strings, separate.strings) == (8, 10)
+    assert shared.distinct_strings == separate.distinct_strings
+
+
+def test_interned_events_and_hashes_are_identical():
+    filenames = [f for f in next(walk(TEST_FILE_PATH))[2] if f.endswith("xml") or f.endswith("jsonld")]
+    expected_events = [events_from_file_reader.event_list_from_file(TEST_FILE_PATH + f) for f in filenames]
+    expected_hashes = [epcis_hash_from_file(TEST_FILE_PATH + f)[0] for f in filenames]
+
+    interning.enable_interning()
+    try:
+        events = [events_from_file_reader.event_list_from_file(TEST_FILE_PATH + f) for f in filenames]
+        hashes = [epcis_hash_from_file(TEST_FILE_PATH + f)[0] for f in filenames]
+        stats = interning.interning_stats()
+    finally:
+        interning.disable_interning()
+
+    assert events == expected_events
+    assert hashes == expected_hashes
+    assert stats.lookups > stats.distinct > 0
+    assert sum(memory_report(e).distinct_strings for e in events) <= sum(
+        memory_report(e).distinct_strings for e in expected_events)
+    assert interning.interning_stats() is None
+
+
+def test_canonical_values_are_not_interned():
+    interning.enable_interning()
+    try:
+        events = events_from_file_reader.event_list_from_file(TEST_FILE_PATH + "ReferenceEventHashAlgorithm.xml")
+        distinct = interning.interning_stats().distinct
+        hash_generator.derive_prehashes_from_events(events)
+        assert interning.interning_stats().distinct == distinct
+
+        interning.clear_interning()
+        assert tuple(interning.interning_stats()) == (0, 0, 0)
+    finally:
+        interning.disable_interning()
+    interning.clear_interning()  # no-op if disabled
@@ -0,0 +1,85 @@
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+from epcis_event_hash_generator import metrics
+from epcis_event_hash_generator.__main__ import epcis_hash_from_file
+from epcis_event_hash_generator.hash_generator import EventHasher
+from epcis_event_hash_generator.metrics import MetricsHook, StageTimer
+
+TEST_FILE_PATH = "examples/"
+
+
+class _RecordingHook(MetricsHook):
+    def __init__(self):
+        self.calls = []
+
+    def start_document(self, name):
+        self.calls.append(("start", name))
+
+    def end_document(self, name):
+        self.calls.append(("end", name))
+
+    def record(self, stage, seconds, calls=1):
+        assert seconds >= 0
+        self.calls.append((stage, calls))
+
+
+def test_no_hook_installed_by_default():
+    assert metrics.current_hook() is None
+    assert metrics.timed(None, "stage", max, 1, 2) == 2
+    with metrics.stage("stage"), metrics.document("document"):
+        pass
+
+
+def test_stage_timer_per_document_and_in_total():
+    timer = StageTimer()
+    timer.record("outside", 0.5)
+    timer.start_document("a")
+    timer.record("read", 1.0)
+    timer.record("read", 2.0, 3)
+    timer.end_document("a")
+
+    assert timer.stats() == {"outside": (1, 0.5), "read": (4, 3.0)}
+    [document] = timer.documents()
+    assert document.name == "a"
+    assert document.stages == {"read": (4, 3.0)}
+    report = timer.format_report()
+    assert "Stages of 'a'" in report and "Stages of all documents:" in report
+
+    timer.clear()
+    assert timer.stats() == {} and timer.documents() == []
+
+
+def test_hook_receives_stages_of_the_pipeline():
+    expected = {name: epcis_hash_from_file(TEST_FILE_PATH + name)
+                for name in ["ReferenceEventHashAlgorithm.xml", "ReferenceEventHashAlgorithm.jsonld"]}
+
+    hook = metrics.install_hook(_RecordingHook())
+    try:
+        for (name, hashes) in expected.items():
+            with metrics.document(name):
+                assert epcis_hash_from_file(TEST_FILE_PATH + name) == hashes
+    finally:
+        metrics.remove_hook()
+
+    assert hook.calls[0] == ("start", "ReferenceEventHashAlgorithm.xml")
+    assert hook.calls[-1] == ("end", "ReferenceEventHashAlgorithm.jsonld")
+    stages = {call[0] for call in hook.calls}
+    assert {"read", "xml parsing", "xml conversion", "json parsing", "jsonld expansion", "json conversion",
+            "structure correction", "prehash", "canonicalisation", "normaliser", "timestamps",
+            "hashing"} <= stages
+    assert metrics.current_hook() is None
+
+
+def test_event_hasher_reports_to_its_hook_only():
+    events = ("EventList", "", [("ObjectEvent", "", [("eventTime", "2020-01-01T00:00:00+01:00", []),
+                                                     ("bizStep", "shipping", []),
+                                                     ("action", "OBSERVE", [])])])
+    timer = StageTimer()
+    assert EventHasher(hook=timer).hashes(events) == EventHasher().hashes(events)
+
+    stats = timer.stats()
+    assert stats["prehash"].calls == stats["hashing"].calls == stats["timestamps"].calls == 1
+    assert stats["canonicalisation"].calls == 2
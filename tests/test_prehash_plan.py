@@ -0,0 +1,48 @@
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+from epcis_event_hash_generator import PROP_ORDER
+from epcis_event_hash_generator.hash_generator import EventHasher
+from epcis_event_hash_generator.events_from_file_reader import event_list_from_file
+from epcis_event_hash_generator.prehash_plan import EVENT_PLANS, FULL_PLAN, compile_plan, plan_for_event
+
+TEST_FILE_PATH = "examples/"
+
+
+def test_full_plan_follows_prop_order():
+    assert [entry.name for entry in FULL_PLAN.entries] == [name for (name, _) in PROP_ORDER]
+    entries = {entry.name: entry for entry in FULL_PLAN.entries}
+
+    assert entries["eventTime"].is_time
+    assert not entries["eventTimeZoneOffset"].is_time
+    assert entries["epcList"].sub_plan.names == {"epc"}
+    assert entries["bizTransactionList"].sub_plan.entries == ()
+
+    sensor_element = entries["sensorElementList"].sub_plan.entries[0].sub_plan
+    metadata = {entry.name: entry for entry in sensor_element.entries[0].sub_plan.entries}
+    assert metadata["startTime"].is_time and metadata["time"].is_time and not metadata["deviceID"].is_time
+
+
+def test_event_type_plans():
+    assert "childEPCs" in EVENT_PLANS["ObjectEvent"].excluded
+    assert "action" not in EVENT_PLANS["TransformationEvent"].names
+    assert EVENT_PLANS["AggregationEvent"].names | EVENT_PLANS["AggregationEvent"].excluded == FULL_PLAN.names
+    assert compile_plan([("a", [("b", None)])]).entries[0].sub_plan.names == {"b"}
+
+
+def test_unexpected_properties_fall_back_to_full_plan():
+    assert plan_for_event(("ObjectEvent", "", [("action", "ADD", [])])) is EVENT_PLANS["ObjectEvent"]
+    assert plan_for_event(("ObjectEvent", "", [("childEPCs", "", [])])) is FULL_PLAN
+    assert plan_for_event(("SomeFutureEvent", "", [])) is FULL_PLAN
+
+    events = event_list_from_file(TEST_FILE_PATH + "epcisDocWithVariousEventTypes.xml")
+    hasher = EventHasher()
+    for event in events[2]:
+        # every type plan yields the same result as the full plan, also for properties its type cannot have
+        unexpected = (event[0], "", event[2] + [("childEPCs", "", [("epc", "urn:epc:id:sscc:4012345.0000000333", [])]),
+                                                ("transformationID", "urn:epc:id:gdti:4012345.55555.1234", [])])
+        for candidate in [event, unexpected]:
+            assert hasher._recurse_through_children_in_order(candidate[2], plan_for_event(candidate)) == \
+                hasher._recurse_through_children_in_order(candidate[2], FULL_PLAN)
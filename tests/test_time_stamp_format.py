@@ -0,0 +1,52 @@
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+from epcis_event_hash_generator import hash_generator
+
+SAMPLES = [
+    "2019-04-02T15:00:00.000+01:00",
+    "2020-01-01T00:30:00Z",
+    "2020-01-01T00:30:00.5-05:30",
+    "2020-03-01T01:00:00.0005+02:00",
+    "2020-03-01T01:00:00.0015+02:00",
+    "2020-03-01T01:00:00.123456789Z",
+    "2020-03-01T01:00:00.1234995Z",
+    "2020-12-31T23:59:59.9994999-00:00",
+    "0001-01-01T00:00:00Z",
+    "9999-12-31T23:00:00.000-00:59",
+]
+
+FALLBACK_SAMPLES = [
+    "2020-12-31T23:59:59.9995Z",  # rounds up to the next second
+    "2020-02-30T00:00:00Z",  # invalid date
+    "0001-01-01T00:00:00+01:00",  # out of range in UTC
+    "2020-01-01T00:00:00+0100",
+    "2020-01-01 00:00:00Z",
+    "2020-01-01T00:00:00",  # naive, i.e. local time
+]
+
+
+def test_fast_path_matches_dateutil():
+    for timestamp in SAMPLES:
+        assert hash_generator._fast_fix_time_stamp_format(timestamp) == \
+            hash_generator._parse_fix_time_stamp_format(timestamp), timestamp
+
+    assert hash_generator._fix_time_stamp_format("2019-04-02T15:00:00.000+01:00") == "2019-04-02T14:00:00.000Z"
+    assert hash_generator._fix_time_stamp_format("2020-03-01T01:00:00.0025Z") == "2020-03-01T01:00:00.002Z"
+
+
+def test_unusual_time_stamps_use_dateutil():
+    for timestamp in FALLBACK_SAMPLES:
+        assert hash_generator._fast_fix_time_stamp_format(timestamp) is None, timestamp
+
+    assert hash_generator._fix_time_stamp_format("2020-01-01T00:00:00+0100") == "2019-12-31T23:00:00.000Z"
+    assert hash_generator._fix_time_stamp_format("no time") == "no time"
+
+
+def test_canonical_time_stamp():
+    for timestamp in SAMPLES:
+        assert hash_generator.canonical_time_stamp(" " + timestamp) == hash_generator._fix_time_stamp_format(timestamp)
+    assert hash_generator.canonical_time_stamp("2020-03-04T11:00:30+01:00") == "2020-03-04T10:00:30.000Z"
+    assert hash_generator.canonical_time_stamp("yesterday") is None
@@ -0,0 +1,76 @@
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+from concurrent.futures import ThreadPoolExecutor
+from os import walk
+
+import pytest
+
+from epcis_event_hash_generator import hash_generator
+from epcis_event_hash_generator.__main__ import epcis_hash_from_file
+from epcis_event_hash_generator.lru_cache import LRUCache
+
+TEST_FILE_PATH = "examples/"
+
+
+def test_lru_eviction_and_stats():
+    cache = LRUCache(2)
+    calls = []
+
+    def compute(key):
+        calls.append(key)
+        return key.upper()
+
+    assert cache.get_or_compute("a", compute) == "A"
+    assert cache.get_or_compute("b", compute) == "B"
+    assert cache.get_or_compute("a", compute) == "A"  # hit, "b" is now least recently used
+    assert cache.get_or_compute("c", compute) == "C"  # evicts "b"
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert calls == ["a", "b", "c"]
+    assert tuple(cache.stats()) == (1, 3, 1, 2, 2)
+
+    cache.clear()
+    assert len(cache) == 0
+    assert tuple(cache.stats()) == (0, 0, 0, 0, 2)
+
+
+def test_lru_shared_by_threads():
+    cache = LRUCache(4)
+    keys = [str(i % 7) for i in range(5000)]
+
+    def lookups(offset):
+        return [cache.get_or_compute(key, str.upper) for key in keys[offset:] + keys[:offset]]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lookups, range(8)))
+
+    assert all(sorted(values) == sorted(keys) for values in results)
+    stats = cache.stats()
+    assert stats.hits + stats.misses == 8 * len(keys)
+    assert stats.size == 4 and stats.size + stats.evictions <= stats.misses
+
+
+def test_lru_size_must_be_positive():
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+
+def test_cached_hashes_are_identical():
+    filenames = [f for f in next(walk(TEST_FILE_PATH))[2] if f.endswith("xml") or f.endswith("json")]
+    expected = [epcis_hash_from_file(TEST_FILE_PATH + f)[0] for f in filenames]
+
+    hash_generator.enable_value_cache(16)
+    try:
+        actual = [epcis_hash_from_file(TEST_FILE_PATH + f)[0] for f in filenames]
+        stats = hash_generator.value_cache_stats()
+        hash_generator.clear_value_cache()
+        assert hash_generator.value_cache_stats().size == 0
+    finally:
+        hash_generator.disable_value_cache()
+
+    assert actual == expected
+    assert stats.hits > 0 and stats.evictions > 0
+    assert hash_generator.value_cache_stats() is None
@@ -0,0 +1,42 @@
+try:
+    from .context import epcis_event_hash_generator
+except ImportError:
+    from context import epcis_event_hash_generator  # noqa: F401
+
+import pytest
+
+from epcis_event_hash_generator import hash_generator
+from epcis_event_hash_generator.dl_normaliser import normaliser
+
+VALUES = ["urn:epcglobal:cbv:bizstep:shipping", "urn:epcglobal:cbv:disp:in_progress", "urn:epcglobal:cbv:btt:po",
+          "urn:epcglobal:cbv:sdt:owning_party", "urn:epcglobal:cbv:er:incorrect_data", "urn:epcglobal:cbv:fmcg:x",
+          "urn:epcglobal:cbv:bizstep", "urn:epcglobal:cbv:bizstep:/01/09520123456788", "xurn:epcglobal:cbv:disp:y",
+          "urn:epcglobal:cbv:bizstep:x urn:epcglobal:cbv:disp:y", "https://ref.gs1.org/cbv/BizStep-shipping",
+          "urn:epc:id:sgtin:4012345.011111.9876", "urn:epc:class:lgtin:4012345.012345.998877",
+          "https://example.com/01/9520123456788/10/ABC/21/12345", "200", "-0.50", "+12", "1_000", " 12 ", "١٢",
+          "nan", "1e5", "KGM", "OBSERVE", "gs1:Temperature", "+01:00", "", " "]
+
+
+def _all_canonizations(text):
+    """The original canonization, running every value through all canonizations in turn."""
+    text = hash_generator._try_format_numeric(hash_generator._try_format_web_vocabulary(text))
+    return normaliser(text) or text
+
+
+@pytest.mark.parametrize("text", VALUES)
+def test_classified_canonization_matches_all_canonizations(text):
+    assert hash_generator._canonize_value_uncached(text) == _all_canonizations(text)
+    assert hash_generator._canonize_values([text]) == {text: _all_canonizations(text)}
+
+
+def test_classification():
+    assert hash_generator._classify_value("urn:epcglobal:cbv:bizstep:shipping") == hash_generator._CBV_VALUE
+    assert hash_generator._classify_value("urn:epc:id:sgtin:4012345.011111.9876") == hash_generator._URI_VALUE
+    assert hash_generator._classify_value("https://id.gs1.org/01/09520123456788") == hash_generator._URI_VALUE
+    assert hash_generator._classify_value("١٢") == hash_generator._NUMERIC_VALUE
+    assert hash_generator._classify_value("Infinity") == hash_generator._NUMERIC_VALUE
+    assert hash_generator._classify_value("OBSERVE") == hash_generator._OTHER_VALUE
+    assert hash_generator._classify_value("x urn:epcglobal:cbv:disp:y") == hash_generator._MIXED_VALUE
+    assert hash_generator._cbv_web_vocabulary("urn:epcglobal:cbv:bizstep:shipping") == \
+        "https://ref.gs1.org/cbv/BizStep-shipping"
+    assert hash_generator._cbv_web_vocabulary("urn:epcglobal:cbv:bizstep:/01/09520123456788") is None
@@ -6,7 +6,7 @@ except ImportError:
 import xml.etree.ElementTree as ElementTree
 
 from epcis_event_hash_generator.events_from_file_reader import event_list_from_file
-from epcis_event_hash_generator.xml_to_py import _xml_to_py
+from epcis_event_hash_generator.xml_to_py import _xml_to_py, _expand_value_prefix
 
 
 def test_docstring_example():
@@ -61,3 +61,15 @@ def test_epcsi_reference_example():
                                                                  [])])])])
 
     assert expected_obj == actual_obj
+
+
+def test_expand_value_prefix_keeps_unchanged_elements():
+    unchanged = ("sensorReport", "", [("uom", "CEL", []), ("value", "26", [])])
+    assert _expand_value_prefix(unchanged) is unchanged
+
+    obj = ("sensorElement", "", [unchanged, ("sensorReport", "", [("type", "gs1:Temperature", [])])])
+    expanded = _expand_value_prefix(obj)
+    assert expanded == ("sensorElement", "", [unchanged,
+                                              ("sensorReport", "", [("type", "https://gs1.org/voc/Temperature", [])])])
+    assert expanded[2][0] is unchanged
+    assert obj[2][1][2][0][1] == "gs1:Temperature"